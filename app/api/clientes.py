@@ -1,5 +1,8 @@
 from flask import Blueprint, request, jsonify
 from app.database.db_connection import execute_query
+from app.database.paginacion import PaginacionInvalidaError, consulta_paginada, obtener_parametros_paginacion
+from app.services.catalogo_service import CatalogoService
+from app.services.sync_service import ENTIDAD_CLIENTE, SyncService
 from config import Config
 
 clientes_bp = Blueprint('clientes', __name__)
@@ -7,25 +10,37 @@ clientes_bp = Blueprint('clientes', __name__)
 @clientes_bp.route('/api/clientes', methods=['GET'])
 def obtener_clientes():
     try:
-        query = """
-        SELECT c.*, 
-               est.nombre as estatus_nombre,
-               t.telefono,
-               co.correo_electronico,
-               d.calle, d.colonia, d.ciudad, d.estado, d.codigo_postal
-        FROM clientes c
-        LEFT JOIN estatus_general est ON c.fk_estatus_general = est.id_estatus_general
+        paginacion = obtener_parametros_paginacion(request.args)
+        
+        columnas = """
+        c.*, 
+        t.telefono,
+        co.correo_electronico,
+        d.calle, d.colonia, d.ciudad, d.estado, d.codigo_postal
+        """
+        origen = """
+        clientes c
         LEFT JOIN telefonos t ON c.fk_telefonos = t.id_telefono
         LEFT JOIN correos_electronicos co ON c.fk_correo_electronico = co.id_correo_electronico
         LEFT JOIN direccion d ON c.fk_direccion = d.id_direccion
-        WHERE c.fk_estatus_general = ?
-        ORDER BY c.nombre
         """
-        results = execute_query(query, (Config.ESTATUS_ACTIVO,), fetch_all=True)
+        results, pagina = consulta_paginada(
+            columnas, origen, ['c.fk_estatus_general = ?'], [Config.ESTATUS_ACTIVO],
+            [('c.nombre', 'nombre'), ('c.id_clientes', 'id_clientes')],
+            paginacion['limite'], paginacion['cursor'],
+            incluir_total=paginacion['incluir_total']
+        )
+        CatalogoService.resolver_nombres(results, {'estatus_nombre': ('estatus_general', 'fk_estatus_general')})
         return jsonify({
             'success': True,
-            'data': results
+            'data': results,
+            'pagination': pagina
         })
+    except PaginacionInvalidaError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -37,12 +52,10 @@ def obtener_cliente(cliente_id):
     try:
         query = """
         SELECT c.*, 
-               est.nombre as estatus_nombre,
                t.telefono,
                co.correo_electronico,
                d.calle, d.colonia, d.ciudad, d.estado, d.codigo_postal
         FROM clientes c
-        LEFT JOIN estatus_general est ON c.fk_estatus_general = est.id_estatus_general
         LEFT JOIN telefonos t ON c.fk_telefonos = t.id_telefono
         LEFT JOIN correos_electronicos co ON c.fk_correo_electronico = co.id_correo_electronico
         LEFT JOIN direccion d ON c.fk_direccion = d.id_direccion
@@ -51,6 +64,7 @@ def obtener_cliente(cliente_id):
         result = execute_query(query, (cliente_id, Config.ESTATUS_ACTIVO), fetch=True)
         
         if result:
+            result['estatus_nombre'] = CatalogoService.nombre('estatus_general', result['fk_estatus_general'])
             return jsonify({
                 'success': True,
                 'data': result
@@ -126,6 +140,7 @@ def crear_cliente():
             direccion_id,
             Config.ESTATUS_ACTIVO
         ))
+        SyncService.registrar(ENTIDAD_CLIENTE, [cliente_id])
         
         return jsonify({
             'success': True,
@@ -148,13 +163,15 @@ def actualizar_cliente(cliente_id):
         SET nombre = ?, rfc = ?, limite_credito = ?
         WHERE id_clientes = ? AND fk_estatus_general = ?
         """
-        execute_query(query, (
+        actualizados = execute_query(query, (
             data.get('nombre'),
             data.get('rfc'),
             data.get('limite_credito'),
             cliente_id,
             Config.ESTATUS_ACTIVO
         ))
+        if actualizados:
+            SyncService.registrar(ENTIDAD_CLIENTE, [cliente_id])
         
         return jsonify({
             'success': True,
@@ -171,7 +188,8 @@ def actualizar_cliente(cliente_id):
 def eliminar_cliente(cliente_id):
     try:
         query = "UPDATE clientes SET fk_estatus_general = ? WHERE id_clientes = ?"
-        execute_query(query, (Config.ESTATUS_INACTIVO, cliente_id))
+        if execute_query(query, (Config.ESTATUS_INACTIVO, cliente_id)):
+            SyncService.registrar(ENTIDAD_CLIENTE, [cliente_id])
         
         return jsonify({
             'success': True,
@@ -189,13 +207,15 @@ def obtener_info_credito(cliente_id):
     try:
         query = """
         SELECT limite_credito, saldo_actual, 
-               (limite_credito - saldo_actual) as credito_disponible
+               (limite_credito - saldo_actual) as credito_disponible,
+               fk_estatus_general
         FROM clientes 
         WHERE id_clientes = ? AND fk_estatus_general = ?
         """
         result = execute_query(query, (cliente_id, Config.ESTATUS_ACTIVO), fetch=True)
         
         if result:
+            result['estatus_nombre'] = CatalogoService.nombre('estatus_general', result['fk_estatus_general'])
             return jsonify({
                 'success': True,
                 'data': result
@@ -215,21 +235,31 @@ def obtener_info_credito(cliente_id):
 @clientes_bp.route('/api/clientes/<int:cliente_id>/ventas', methods=['GET'])
 def obtener_ventas_cliente(cliente_id):
     try:
-        query = """
-        SELECT v.*, mp.forma_pago, vt.tipo_ventas
-        FROM ventas v
-        LEFT JOIN metodo_pago mp ON v.fk_metodo_pago = mp.id_metodo_pago
-        LEFT JOIN ventas_tipo vt ON v.fk_ventas_tipo = vt.id_ventas_tipo
-        WHERE v.fk_cliente = ? AND v.fk_estatus_general = ?
-        ORDER BY v.fecha_ventas DESC
-        """
-        results = execute_query(query, (cliente_id, Config.ESTATUS_ACTIVO), fetch_all=True)
+        paginacion = obtener_parametros_paginacion(request.args)
+        
+        results, pagina = consulta_paginada(
+            "v.*", "ventas v",
+            ['v.fk_cliente = ?', 'v.fk_estatus_general = ?'], [cliente_id, Config.ESTATUS_ACTIVO],
+            [('v.fecha_ventas', 'fecha_ventas'), ('v.id_ventas', 'id_ventas')],
+            paginacion['limite'], paginacion['cursor'],
+            descendente=True, incluir_total=paginacion['incluir_total']
+        )
+        CatalogoService.resolver_nombres(results, {
+            'forma_pago': ('metodo_pago', 'fk_metodo_pago'),
+            'tipo_ventas': ('ventas_tipo', 'fk_ventas_tipo')
+        })
         
         return jsonify({
             'success': True,
-            'data': results
+            'data': results,
+            'pagination': pagina
         })
         
+    except PaginacionInvalidaError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -1,4 +1,6 @@
 from flask import Blueprint, request, jsonify
+from app.database.db_connection import execute_query
+from app.database.paginacion import PaginacionInvalidaError, obtener_parametros_paginacion
 from app.services.empleado_service import EmpleadoService
 from config import Config
 
@@ -7,11 +9,20 @@ empleados_bp = Blueprint('empleados', __name__)
 @empleados_bp.route('/api/empleados', methods=['GET'])
 def obtener_empleados():
     try:
-        empleados = EmpleadoService.obtener_empleados_activos()
+        paginacion = obtener_parametros_paginacion(request.args)
+        empleados, pagina = EmpleadoService.listar_empleados_activos(
+            paginacion['limite'], paginacion['cursor'], paginacion['incluir_total']
+        )
         return jsonify({
             'success': True,
-            'data': empleados
+            'data': empleados,
+            'pagination': pagina
         })
+    except PaginacionInvalidaError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -77,15 +88,23 @@ def obtener_ventas_empleado(empleado_id):
     try:
         fecha_inicio = request.args.get('fecha_inicio')
         fecha_fin = request.args.get('fecha_fin')
+        paginacion = obtener_parametros_paginacion(request.args)
         
-        ventas = EmpleadoService.obtener_ventas_empleado(
-            empleado_id, fecha_inicio, fecha_fin
+        ventas, pagina = EmpleadoService.listar_ventas_empleado(
+            empleado_id, paginacion['limite'], paginacion['cursor'],
+            fecha_inicio, fecha_fin, paginacion['incluir_total']
         )
         
         return jsonify({
             'success': True,
-            'data': ventas
+            'data': ventas,
+            'pagination': pagina
         })
+    except PaginacionInvalidaError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
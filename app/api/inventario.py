@@ -1,4 +1,5 @@
 from flask import Blueprint, request, jsonify
+from app.api.streaming import respuesta_streaming
 from app.services.inventario_service import InventarioService
 from config import Config
 
@@ -41,6 +42,27 @@ def obtener_movimientos_producto(producto_id):
             'error': f'Error obteniendo movimientos: {str(e)}'
         }), 500
 
+@inventario_bp.route('/api/inventario/movimientos/exportar', methods=['GET'])
+def exportar_movimientos():
+    try:
+        formato = request.args.get('formato', 'ndjson')
+        rows = InventarioService.stream_movimientos(
+            request.args.get('producto_id', type=int),
+            request.args.get('fecha_inicio'),
+            request.args.get('fecha_fin')
+        )
+        return respuesta_streaming(rows, formato)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Error exportando movimientos: {str(e)}'
+        }), 500
+
 @inventario_bp.route('/api/inventario/stock-bajo', methods=['GET'])
 def obtener_productos_stock_bajo():
     try:
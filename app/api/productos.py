@@ -0,0 +1,151 @@
+from flask import Blueprint, request, jsonify
+from app.database.paginacion import PaginacionInvalidaError, obtener_parametros_paginacion
+from app.services.product_service import ProductService
+from config import Config
+
+productos_bp = Blueprint('productos', __name__)
+
+@productos_bp.route('/api/productos', methods=['GET'])
+def obtener_productos():
+    try:
+        paginacion = obtener_parametros_paginacion(request.args)
+        productos, pagina = ProductService.get_products_page(
+            paginacion['limite'], paginacion['cursor'], paginacion['incluir_total']
+        )
+        return jsonify({
+            'success': True,
+            'data': productos,
+            'pagination': pagina
+        })
+    except PaginacionInvalidaError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Error obteniendo productos: {str(e)}'
+        }), 500
+
+@productos_bp.route('/api/productos/buscar', methods=['GET'])
+def buscar_productos():
+    try:
+        q = request.args.get('q', '').strip()
+        if not q:
+            return jsonify({
+                'success': False,
+                'error': 'Parámetro requerido: q'
+            }), 400
+        
+        try:
+            limite = int(request.args.get('limite', Config.BUSQUEDA_LIMITE_DEFAULT))
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': 'limite debe ser un número entero'
+            }), 400
+        limite = max(1, min(limite, Config.BUSQUEDA_LIMITE_MAX))
+        
+        productos = ProductService.search_products(q, limite)
+        return jsonify({
+            'success': True,
+            'data': productos
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Error buscando productos: {str(e)}'
+        }), 500
+
+@productos_bp.route('/api/productos/<int:producto_id>', methods=['GET'])
+def obtener_producto(producto_id):
+    try:
+        producto = ProductService.get_product_by_id(producto_id)
+        
+        if producto:
+            return jsonify({
+                'success': True,
+                'data': producto
+            })
+        else:
+            return jsonify({
+                'success': False,
+                'error': 'Producto no encontrado'
+            }), 404
+            
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Error obteniendo producto: {str(e)}'
+        }), 500
+
+@productos_bp.route('/api/productos/codigo/<path:codigo_barras>', methods=['GET'])
+def obtener_producto_por_codigo(codigo_barras):
+    try:
+        producto = ProductService.get_product_by_barcode(codigo_barras)
+        
+        if producto:
+            return jsonify({
+                'success': True,
+                'data': producto
+            })
+        else:
+            return jsonify({
+                'success': False,
+                'error': 'Producto no encontrado'
+            }), 404
+            
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Error obteniendo producto: {str(e)}'
+        }), 500
+
+@productos_bp.route('/api/productos', methods=['POST'])
+def crear_producto():
+    try:
+        data = request.get_json()
+        
+        campos_requeridos = ['nombre', 'precio_compra', 'precio_venta']
+        for campo in campos_requeridos:
+            if data.get(campo) is None:
+                return jsonify({
+                    'success': False,
+                    'error': f'Campo requerido: {campo}'
+                }), 400
+        
+        producto_id = ProductService.create_product(data)
+        
+        return jsonify({
+            'success': True,
+            'data': {'id_productos': producto_id}
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Error creando producto: {str(e)}'
+        }), 500
+
+@productos_bp.route('/api/productos/<int:producto_id>', methods=['PUT'])
+def actualizar_producto(producto_id):
+    try:
+        data = request.get_json() or {}
+        
+        if not ProductService.update_product(producto_id, data):
+            return jsonify({
+                'success': False,
+                'error': 'Producto no encontrado'
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'message': 'Producto actualizado correctamente'
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Error actualizando producto: {str(e)}'
+        }), 500
@@ -1,33 +1,51 @@
 from flask import Blueprint, request, jsonify
 from app.database.db_connection import execute_query
+from app.database.paginacion import PaginacionInvalidaError, consulta_paginada, obtener_parametros_paginacion
+from app.services.catalogo_service import CatalogoService
 from config import Config
 
 proveedores_bp = Blueprint('proveedores', __name__)
 
+# Nombres de catálogo que se agregan a cada proveedor sin JOIN
+PROVEEDOR_NOMBRES = {
+    'categoria_nombre': ('proveedor_categorias', 'fk_proveedor_cateogoria'),
+    'estatus_nombre': ('estatus_general', 'fk_estatus_general')
+}
+
 @proveedores_bp.route('/api/proveedores', methods=['GET'])
 def obtener_proveedores():
     try:
-        query = """
-        SELECT p.*, 
-               pc.nombre as categoria_nombre,
-               est.nombre as estatus_nombre,
-               t.telefono,
-               co.correo_electronico,
-               d.calle, d.colonia, d.ciudad
-        FROM proveedores p
-        LEFT JOIN proveedor_categorias pc ON p.fk_proveedor_cateogoria = pc.id_proveedor_categoria
-        LEFT JOIN estatus_general est ON p.fk_estatus_general = est.id_estatus_general
+        paginacion = obtener_parametros_paginacion(request.args)
+        
+        columnas = """
+        p.*, 
+        t.telefono,
+        co.correo_electronico,
+        d.calle, d.colonia, d.ciudad
+        """
+        origen = """
+        proveedores p
         LEFT JOIN telefonos t ON p.fk_telefono = t.id_telefono
         LEFT JOIN correos_electronicos co ON p.fk_correo_electronico = co.id_correo_electronico
         LEFT JOIN direccion d ON p.fk_direccion = d.id_direccion
-        WHERE p.fk_estatus_general = ?
-        ORDER BY p.nombre
         """
-        results = execute_query(query, (Config.ESTATUS_ACTIVO,), fetch_all=True)
+        results, pagina = consulta_paginada(
+            columnas, origen, ['p.fk_estatus_general = ?'], [Config.ESTATUS_ACTIVO],
+            [('p.nombre', 'nombre'), ('p.id_proveedores', 'id_proveedores')],
+            paginacion['limite'], paginacion['cursor'],
+            incluir_total=paginacion['incluir_total']
+        )
+        CatalogoService.resolver_nombres(results, PROVEEDOR_NOMBRES)
         return jsonify({
             'success': True,
-            'data': results
+            'data': results,
+            'pagination': pagina
         })
+    except PaginacionInvalidaError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -38,17 +56,14 @@ def obtener_proveedores():
 def obtener_proveedor(proveedor_id):
     try:
         query = """
-        SELECT p.*, 
-               pc.nombre as categoria_nombre,
-               est.nombre as estatus_nombre
+        SELECT p.*
         FROM proveedores p
-        LEFT JOIN proveedor_categorias pc ON p.fk_proveedor_cateogoria = pc.id_proveedor_categoria
-        LEFT JOIN estatus_general est ON p.fk_estatus_general = est.id_estatus_general
         WHERE p.id_proveedores = ? AND p.fk_estatus_general = ?
         """
         result = execute_query(query, (proveedor_id, Config.ESTATUS_ACTIVO), fetch=True)
         
         if result:
+            CatalogoService.resolver_nombres([result], PROVEEDOR_NOMBRES)
             return jsonify({
                 'success': True,
                 'data': result
@@ -1,5 +1,5 @@
 from flask import Blueprint, request, jsonify
-from app.services.reporte_service import ReporteService
+from app.services.reporte_service import ReporteService, ESTADISTICAS_ORIGENES
 from datetime import datetime, timedelta
 
 reportes_bp = Blueprint('reportes', __name__)
@@ -113,7 +113,14 @@ def reporte_ventas_metodos_pago():
 @reportes_bp.route('/api/reportes/inventario/estadisticas', methods=['GET'])
 def reporte_estadisticas_inventario():
     try:
-        estadisticas = ReporteService.obtener_estadisticas_inventario()
+        fuente = request.args.get('fuente', 'existencias')
+        if fuente not in ESTADISTICAS_ORIGENES:
+            return jsonify({
+                'success': False,
+                'error': f"Fuente inválida: {fuente}. Opciones: {', '.join(ESTADISTICAS_ORIGENES)}"
+            }), 400
+        
+        estadisticas = ReporteService.obtener_estadisticas_inventario(fuente)
         
         return jsonify({
             'success': True,
@@ -0,0 +1,72 @@
+from flask import Response, current_app, stream_with_context
+
+FORMATOS_STREAMING = ('json', 'ndjson')
+
+# Renglones serializados que se acumulan antes de escribir al socket
+RENGLONES_POR_CHUNK = 200
+
+def respuesta_streaming(rows, formato='json'):
+    """Respuesta Flask que serializa los renglones conforme llegan.
+    
+    formato='ndjson' emite un objeto JSON por línea; formato='json' emite el
+    sobre {"data": [...], "success": true} por partes. La primera fila se lee
+    antes de responder para que un error de SQL todavía devuelva 500. Un error
+    posterior ya no puede cambiar el estado HTTP: en json el sobre termina con
+    "success": false y "error" (por eso success va después de los datos), en
+    ndjson la última línea es {"success": false, "error": ...}.
+    """
+    if formato not in FORMATOS_STREAMING:
+        raise ValueError(f"Formato no soportado: {formato}. Usa: {', '.join(FORMATOS_STREAMING)}")
+    
+    rows = iter(rows)
+    primero = next(rows, None)
+    dumps = current_app.json.dumps
+    
+    def generar_ndjson():
+        buffer = []
+        try:
+            if primero is not None:
+                buffer.append(dumps(primero))
+            for row in rows:
+                buffer.append(dumps(row))
+                if len(buffer) >= RENGLONES_POR_CHUNK:
+                    yield '\n'.join(buffer) + '\n'
+                    buffer = []
+            if buffer:
+                yield '\n'.join(buffer) + '\n'
+        except Exception as e:
+            # El estado HTTP ya se envió; el error viaja como última línea
+            yield '\n'.join(buffer + [dumps({'success': False, 'error': str(e)})]) + '\n'
+        finally:
+            _cerrar(rows)
+    
+    def generar_json():
+        buffer = []
+        separador = ''
+        yield '{"data": ['
+        try:
+            if primero is not None:
+                buffer.append(dumps(primero))
+            for row in rows:
+                buffer.append(dumps(row))
+                if len(buffer) >= RENGLONES_POR_CHUNK:
+                    yield separador + ','.join(buffer)
+                    buffer = []
+                    separador = ','
+            yield (separador + ','.join(buffer) if buffer else '') + '], "success": true}'
+        except Exception as e:
+            # El estado HTTP ya se envió; el sobre cierra como fallido
+            parcial = separador + ','.join(buffer) if buffer else ''
+            yield parcial + '], "success": false, "error": ' + dumps(str(e)) + '}'
+        finally:
+            _cerrar(rows)
+    
+    if formato == 'ndjson':
+        return Response(stream_with_context(generar_ndjson()), mimetype='application/x-ndjson')
+    return Response(stream_with_context(generar_json()), mimetype='application/json')
+
+def _cerrar(rows):
+    """Devolver la conexión al pool aunque el cliente corte la descarga"""
+    close = getattr(rows, 'close', None)
+    if close:
+        close()
@@ -0,0 +1,34 @@
+from flask import Blueprint, request, jsonify
+from app.services.sync_service import SyncService, TokenSyncInvalidoError
+
+sync_bp = Blueprint('sync', __name__)
+
+@sync_bp.route('/api/sync/changes', methods=['GET'])
+def obtener_cambios():
+    try:
+        limite = request.args.get('limit')
+        if limite is not None:
+            try:
+                limite = max(1, int(limite))
+            except ValueError:
+                return jsonify({
+                    'success': False,
+                    'error': 'El parámetro limit debe ser numérico'
+                }), 400
+        
+        cambios = SyncService.cambios(request.args.get('since') or None, limite)
+        return jsonify({
+            'success': True,
+            'data': cambios
+        })
+    except TokenSyncInvalidoError as e:
+        # La terminal vuelve a sincronizar sin token
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Error obteniendo cambios: {str(e)}'
+        }), 500
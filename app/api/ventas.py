@@ -1,64 +1,242 @@
 from flask import Blueprint, request, jsonify
-from app.database.db_connection import execute_query
+from app.database.db_connection import execute_query_stream
+from app.database.paginacion import PaginacionInvalidaError, consulta_paginada, obtener_parametros_paginacion
+from app.services.catalogo_service import CatalogoService
+from app.api.streaming import respuesta_streaming
+from app.services.apagado import ServidorDeteniendoseError, apagado
+from app.services.idempotencia import (
+    ESTADO_COMPLETADO, IdempotenciaConflictoError, huella_peticion, idempotencia_ventas
+)
+from app.services.venta_cola import ColaLlenaError, cola_ventas
 from app.services.venta_service import VentaService
-from config import Config
 
 ventas_bp = Blueprint('ventas', __name__)
 
 @ventas_bp.route('/api/ventas', methods=['POST'])
 def crear_venta():
+    """Procesar una venta.
+    
+    Con el encabezado Idempotency-Key un reintento de la misma venta regresa
+    la respuesta original en lugar de registrarla dos veces. Con ?modo=async
+    la venta se encola y se responde 202 con un ticket.
+    """
+    llave = None
     try:
         data = request.get_json()
+        modo = request.args.get('modo', 'sync')
+        if modo not in ('sync', 'async'):
+            return jsonify({
+                'success': False,
+                'error': 'modo debe ser sync o async'
+            }), 400
         
-        # Procesar la venta usando el servicio
-        resultado = VentaService.procesar_venta(data)
+        # Antes de la llave, la cola, el folio y los bloqueos: un renglón
+        # inválido no debe llegar a las existencias
+        items, error = VentaService.validar_items((data or {}).get('items'))
+        if error:
+            return jsonify({
+                'success': False,
+                'error': error
+            }), 400
+        data = dict(data, items=items)
+        
+        llave = request.headers.get('Idempotency-Key')
+        if llave:
+            try:
+                nueva, entrada = idempotencia_ventas.reservar(llave, huella_peticion(data))
+            except IdempotenciaConflictoError as e:
+                return jsonify({
+                    'success': False,
+                    'error': str(e)
+                }), 422
+            if not nueva:
+                llave = None  # La petición original es dueña de la llave
+                return _respuesta_repetida(entrada)
+        
+        if modo == 'async':
+            try:
+                ticket = cola_ventas.encolar(data, llave)
+            except (ColaLlenaError, ServidorDeteniendoseError) as e:
+                if llave:
+                    idempotencia_ventas.liberar(llave)
+                return _respuesta_no_disponible(e)
+            if llave:
+                idempotencia_ventas.asociar_ticket(llave, ticket['ticket'])
+            return _respuesta_ticket(ticket)
+        
+        # Procesar la venta usando el servicio; al detener el servidor se
+        # espera a las ventas que ya entraron aquí
+        try:
+            with apagado.venta():
+                resultado = VentaService.procesar_venta(data)
+        except ServidorDeteniendoseError as e:
+            if llave:
+                idempotencia_ventas.liberar(llave)
+            return _respuesta_no_disponible(e)
         
         if resultado['success']:
-            return jsonify({
+            respuesta = {
                 'success': True,
                 'data': resultado['data']
-            })
+            }
+            if llave:
+                idempotencia_ventas.completar(llave, 200, respuesta)
+            return jsonify(respuesta)
         else:
-            return jsonify({
+            if llave:
+                idempotencia_ventas.liberar(llave)
+            respuesta = {
                 'success': False,
                 'error': resultado['error']
-            }), 400
+            }
+            if resultado.get('faltantes'):
+                respuesta['faltantes'] = resultado['faltantes']
+            return jsonify(respuesta), 400
             
     except Exception as e:
+        if llave:
+            idempotencia_ventas.liberar(llave)
         return jsonify({
             'success': False,
             'error': f'Error creando venta: {str(e)}'
         }), 500
 
+def _respuesta_repetida(entrada):
+    """Respuesta para un reintento con una Idempotency-Key ya registrada"""
+    if entrada['estado'] == ESTADO_COMPLETADO:
+        respuesta = jsonify(entrada['respuesta'])
+        respuesta.status_code = entrada['status']
+    elif entrada['ticket']:
+        ticket = cola_ventas.obtener(entrada['ticket'])
+        if ticket is None:
+            return jsonify({
+                'success': False,
+                'error': 'La venta con esta llave sigue en proceso'
+            }), 409
+        respuesta = _respuesta_ticket(ticket)
+    else:
+        respuesta = jsonify({
+            'success': False,
+            'error': 'La venta con esta llave sigue en proceso'
+        })
+        respuesta.status_code = 409
+        respuesta.headers['Retry-After'] = '1'
+    respuesta.headers['Idempotent-Replayed'] = 'true'
+    return respuesta
+
+def _respuesta_no_disponible(error):
+    """503 con Retry-After: cola llena o servidor deteniéndose"""
+    respuesta = jsonify({
+        'success': False,
+        'error': str(error)
+    })
+    respuesta.status_code = 503
+    respuesta.headers['Retry-After'] = '2'
+    return respuesta
+
+def _respuesta_ticket(ticket):
+    respuesta = jsonify({
+        'success': True,
+        'data': ticket
+    })
+    respuesta.status_code = 202
+    respuesta.headers['Location'] = f"/api/ventas/tickets/{ticket['ticket']}"
+    return respuesta
+
+@ventas_bp.route('/api/ventas/tickets/<ticket_id>', methods=['GET'])
+def obtener_ticket_venta(ticket_id):
+    ticket = cola_ventas.obtener(ticket_id)
+    
+    if ticket:
+        return jsonify({
+            'success': True,
+            'data': ticket
+        })
+    else:
+        return jsonify({
+            'success': False,
+            'error': 'Ticket no encontrado'
+        }), 404
+
 @ventas_bp.route('/api/ventas', methods=['GET'])
 def obtener_ventas():
     try:
-        query = """
-        SELECT v.*, 
-               c.nombre as cliente_nombre,
-               e.nombre + ' ' + e.apellido_1 as empleado_nombre,
-               mp.forma_pago,
-               vt.tipo_ventas,
-               est.nombre as estatus_nombre
-        FROM ventas v
+        paginacion = obtener_parametros_paginacion(request.args)
+        
+        columnas = """
+        v.*, 
+        c.nombre as cliente_nombre,
+        e.nombre + ' ' + e.apellido_1 as empleado_nombre
+        """
+        origen = """
+        ventas v
         LEFT JOIN clientes c ON v.fk_cliente = c.id_clientes
         LEFT JOIN empleados e ON v.fk_empleados = e.id_empleados
-        LEFT JOIN metodo_pago mp ON v.fk_metodo_pago = mp.id_metodo_pago
-        LEFT JOIN ventas_tipo vt ON v.fk_ventas_tipo = vt.id_ventas_tipo
-        LEFT JOIN estatus_general est ON v.fk_estatus_general = est.id_estatus_general
-        ORDER BY v.fecha_ventas DESC
         """
-        results = execute_query(query, fetch_all=True)
+        results, pagina = consulta_paginada(
+            columnas, origen, [], [],
+            [('v.fecha_ventas', 'fecha_ventas'), ('v.id_ventas', 'id_ventas')],
+            paginacion['limite'], paginacion['cursor'],
+            descendente=True, incluir_total=paginacion['incluir_total']
+        )
+        CatalogoService.resolver_nombres(results, {
+            'forma_pago': ('metodo_pago', 'fk_metodo_pago'),
+            'tipo_ventas': ('ventas_tipo', 'fk_ventas_tipo'),
+            'estatus_nombre': ('estatus_general', 'fk_estatus_general')
+        })
         return jsonify({
             'success': True,
-            'data': results
+            'data': results,
+            'pagination': pagina
         })
+    except PaginacionInvalidaError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
             'error': f'Error obteniendo ventas: {str(e)}'
         }), 500
 
+@ventas_bp.route('/api/ventas/exportar', methods=['GET'])
+def exportar_ventas():
+    try:
+        formato = request.args.get('formato', 'ndjson')
+        fecha_inicio = request.args.get('fecha_inicio')
+        fecha_fin = request.args.get('fecha_fin')
+        
+        if fecha_inicio and fecha_fin:
+            rows = VentaService.stream_ventas_por_fecha(fecha_inicio, fecha_fin)
+        else:
+            query = """
+            SELECT v.*, 
+                   c.nombre as cliente_nombre,
+                   e.nombre + ' ' + e.apellido_1 as empleado_nombre,
+                   mp.forma_pago,
+                   vt.tipo_ventas
+            FROM ventas v
+            LEFT JOIN clientes c ON v.fk_cliente = c.id_clientes
+            LEFT JOIN empleados e ON v.fk_empleados = e.id_empleados
+            LEFT JOIN metodo_pago mp ON v.fk_metodo_pago = mp.id_metodo_pago
+            LEFT JOIN ventas_tipo vt ON v.fk_ventas_tipo = vt.id_ventas_tipo
+            ORDER BY v.fecha_ventas DESC
+            """
+            rows = execute_query_stream(query)
+        
+        return respuesta_streaming(rows, formato)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Error exportando ventas: {str(e)}'
+        }), 500
+
 @ventas_bp.route('/api/ventas/<int:venta_id>', methods=['GET'])
 def obtener_venta(venta_id):
     try:
@@ -84,8 +262,7 @@ def obtener_venta(venta_id):
 @ventas_bp.route('/api/ventas/metodos-pago', methods=['GET'])
 def obtener_metodos_pago():
     try:
-        query = "SELECT * FROM metodo_pago WHERE fk_estatus_general = ?"
-        results = execute_query(query, (Config.ESTATUS_ACTIVO,), fetch_all=True)
+        results = CatalogoService.obtener('metodo_pago', solo_activos=True)
         return jsonify({
             'success': True,
             'data': results
@@ -99,8 +276,7 @@ def obtener_metodos_pago():
 @ventas_bp.route('/api/ventas/tipos-venta', methods=['GET'])
 def obtener_tipos_venta():
     try:
-        query = "SELECT * FROM ventas_tipo"
-        results = execute_query(query, fetch_all=True)
+        results = CatalogoService.obtener('ventas_tipo')
         return jsonify({
             'success': True,
             'data': results
@@ -0,0 +1,76 @@
+import os
+from config import Config
+
+class BackendSQLServer:
+    """SQL Server vía pyodbc, el backend de producción"""
+    
+    nombre = 'mssql'
+    descripcion = 'SQL Server'
+    
+    def __init__(self):
+        # pyodbc solo se necesita con este backend
+        import pyodbc
+        self._pyodbc = pyodbc
+        # Llave duplicada u otra restricción violada, para reintentar solo ese caso
+        self.error_integridad = pyodbc.IntegrityError
+        
+        self.connection_string = (
+            f"DRIVER={{ODBC Driver 17 for SQL Server}};"
+            f"SERVER={Config.DB_HOST},{Config.DB_PORT};"
+            f"DATABASE={Config.DB_NAME};"
+            f"UID={Config.DB_USER};"
+            f"PWD={Config.DB_PASSWORD};"
+            f"Trusted_Connection=no;"
+        )
+        # El pool propio reemplaza al del driver manager de ODBC
+        pyodbc.pooling = False
+    
+    def conectar(self):
+        return self._pyodbc.connect(self.connection_string)
+
+class BackendSQLite:
+    """SQLite en archivo o en memoria para pruebas locales, CI y benchmarks.
+    
+    Cada consulta pasa por dialecto_sqlite.traducir(), así los servicios
+    siguen escribiendo T-SQL. Con SQLITE_RUTA=':memory:' todas las conexiones
+    del pool comparten una base en memoria que vive mientras viva el proceso;
+    SQLite serializa las escrituras, para pruebas de carga con varios hilos
+    conviene un archivo (modo WAL).
+    """
+    
+    nombre = 'sqlite'
+    descripcion = 'SQLite'
+    ESQUEMA = os.path.join(os.path.dirname(__file__), 'esquema_sqlite.sql')
+    
+    def __init__(self, ruta=None):
+        from app.database import dialecto_sqlite
+        self._dialecto = dialecto_sqlite
+        self.error_integridad = dialecto_sqlite.sqlite3.IntegrityError
+        
+        ruta = ruta or Config.SQLITE_RUTA
+        self.en_memoria = ruta == ':memory:'
+        self.ruta = f"file:pos_{os.getpid()}?mode=memory&cache=shared" if self.en_memoria else ruta
+        
+        # La base en memoria desaparece al cerrar su última conexión
+        self._ancla = self.conectar()
+        if Config.SQLITE_CREAR_ESQUEMA:
+            self.crear_esquema(self._ancla)
+    
+    def conectar(self):
+        return self._dialecto.conectar(self.ruta, Config.SQLITE_BUSY_TIMEOUT, uri=self.en_memoria)
+    
+    def crear_esquema(self, conexion):
+        with open(self.ESQUEMA, encoding='utf-8') as archivo:
+            conexion.raw.executescript(archivo.read())
+        conexion.commit()
+
+BACKENDS = {
+    BackendSQLServer.nombre: BackendSQLServer,
+    BackendSQLite.nombre: BackendSQLite
+}
+
+def crear_backend(nombre=None):
+    nombre = nombre or Config.DB_BACKEND
+    if nombre not in BACKENDS:
+        raise ValueError(f"DB_BACKEND desconocido: {nombre}. Opciones: {', '.join(BACKENDS)}")
+    return BACKENDS[nombre]()
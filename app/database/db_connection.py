@@ -1,7 +1,247 @@
-import pyodbc
 import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from app.database.backends import crear_backend
+from app.services.metricas import metricas
 from config import Config
 
+class PoolTimeoutError(Exception):
+    """No hay conexiones libres en el pool dentro del tiempo de espera"""
+    pass
+
+class ConexionDevueltaError(Exception):
+    """Uso de una conexión que ya se devolvió al pool"""
+    pass
+
+class _PoolEntry:
+    """Conexión física administrada por el pool"""
+    __slots__ = ('raw', 'created_at', 'last_used')
+    
+    def __init__(self, raw):
+        self.raw = raw
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+class PooledConnection:
+    """Conexión prestada por el pool; close() la devuelve en lugar de cerrarla"""
+    
+    def __init__(self, pool, entry):
+        self._pool = pool
+        self._entry = entry
+    
+    def _raw(self):
+        if self._entry is None:
+            raise ConexionDevueltaError("La conexión ya fue devuelta al pool")
+        return self._entry.raw
+    
+    @property
+    def autocommit(self):
+        return self._raw().autocommit
+    
+    @autocommit.setter
+    def autocommit(self, value):
+        self._raw().autocommit = value
+    
+    def cursor(self):
+        return self._raw().cursor()
+    
+    def commit(self):
+        self._raw().commit()
+    
+    def rollback(self):
+        self._raw().rollback()
+    
+    def close(self):
+        if self._entry is not None:
+            entry, self._entry = self._entry, None
+            self._pool.release(entry)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+class ConnectionPool:
+    """Pool de conexiones acotado y seguro entre hilos"""
+    
+    def __init__(self, connect, min_size=2, max_size=20, timeout=10.0,
+                 max_lifetime=1800.0, max_idle=300.0, ping_idle=10.0):
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.ping_idle = ping_idle
+        
+        self._idle = deque()
+        self._size = 0  # conexiones físicas abiertas (libres + prestadas)
+        self._cond = threading.Condition(threading.Lock())
+        
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+            'timeouts': 0,
+            'created': 0,
+            'discarded': 0,
+            'failed_health_checks': 0
+        }
+    
+    def fill(self):
+        """Abrir conexiones hasta alcanzar el tamaño mínimo"""
+        while True:
+            with self._cond:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                entry = self._new_entry()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._idle.append(entry)
+                self._cond.notify()
+    
+    def acquire(self):
+        """Obtener una conexión del pool, esperando hasta `timeout` segundos"""
+        started = time.monotonic()
+        waited = False
+        
+        while True:
+            entry = None
+            create = False
+            
+            with self._cond:
+                deadline = started + self.timeout
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeoutError(
+                            f"No se obtuvo conexión en {self.timeout}s "
+                            f"({self._size} en uso de {self.max_size})"
+                        )
+                    waited = True
+                    self._cond.wait(remaining)
+                
+                if self._idle:
+                    # LIFO: la más reciente tiene menos probabilidad de estar caída
+                    entry = self._idle.pop()
+                else:
+                    self._size += 1
+                    create = True
+            
+            if create:
+                try:
+                    entry = self._new_entry()
+                except Exception:
+                    self._discard_slot()
+                    raise
+            elif not self._is_usable(entry):
+                self._discard(entry)
+                continue
+            
+            self._record_checkout(time.monotonic() - started, waited)
+            return PooledConnection(self, entry)
+    
+    def release(self, entry):
+        """Devolver una conexión al pool dejando limpio su estado transaccional"""
+        try:
+            # Descartar cualquier transacción abierta y restaurar el modo por defecto
+            entry.raw.rollback()
+            if entry.raw.autocommit:
+                entry.raw.autocommit = False
+        except Exception:
+            self._discard(entry)
+            return
+        
+        now = time.monotonic()
+        if self.max_lifetime and now - entry.created_at > self.max_lifetime:
+            self._discard(entry)
+            return
+        
+        entry.last_used = now
+        with self._cond:
+            self._idle.append(entry)
+            self._cond.notify()
+    
+    def stats(self):
+        """Estadísticas del pool para dimensionarlo"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'min_size': self.min_size,
+                'max_size': self.max_size
+            })
+        checkouts = stats['checkouts']
+        stats['wait_time_avg'] = stats['wait_time_total'] / stats['waits'] if stats['waits'] else 0.0
+        stats['wait_ratio'] = stats['waits'] / checkouts if checkouts else 0.0
+        return stats
+    
+    def close_all(self):
+        """Cerrar todas las conexiones libres"""
+        with self._cond:
+            entries = list(self._idle)
+            self._idle.clear()
+        for entry in entries:
+            self._discard(entry)
+    
+    def _new_entry(self):
+        entry = _PoolEntry(self._connect())
+        with self._cond:
+            self._stats['created'] += 1
+        return entry
+    
+    def _is_usable(self, entry):
+        now = time.monotonic()
+        if self.max_lifetime and now - entry.created_at > self.max_lifetime:
+            return False
+        if self.max_idle and now - entry.last_used > self.max_idle:
+            return False
+        if now - entry.last_used >= self.ping_idle:
+            try:
+                cursor = entry.raw.cursor()
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+                cursor.close()
+            except Exception:
+                with self._cond:
+                    self._stats['failed_health_checks'] += 1
+                return False
+        return True
+    
+    def _discard(self, entry):
+        try:
+            entry.raw.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._stats['discarded'] += 1
+        self._discard_slot()
+    
+    def _discard_slot(self):
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+    
+    def _record_checkout(self, wait_time, waited):
+        with self._cond:
+            self._stats['checkouts'] += 1
+            if waited:
+                self._stats['waits'] += 1
+                self._stats['wait_time_total'] += wait_time
+                self._stats['wait_time_max'] = max(self._stats['wait_time_max'], wait_time)
+
 class DatabaseManager:
     _instance = None
     _lock = threading.Lock()
@@ -9,8 +249,9 @@ class DatabaseManager:
     def __new__(cls):
         with cls._lock:
             if cls._instance is None:
-                cls._instance = super().__new__(cls)
-                cls._instance._initialize()
+                instance = super().__new__(cls)
+                instance._initialize()
+                cls._instance = instance
             return cls._instance
     
     def _initialize(self):
@@ -18,52 +259,90 @@ class DatabaseManager:
             # Validar configuración primero
             Config.validate_config()
             
-            # Cadena de conexión para SQL Server
-            self.connection_string = (
-                f"DRIVER={{ODBC Driver 17 for SQL Server}};"
-                f"SERVER={Config.DB_HOST},{Config.DB_PORT};"
-                f"DATABASE={Config.DB_NAME};"
-                f"UID={Config.DB_USER};"
-                f"PWD={Config.DB_PASSWORD};"
-                f"Trusted_Connection=no;"
+            # SQL Server en producción, SQLite para pruebas locales (DB_BACKEND)
+            self.backend = crear_backend()
+            print(f"[DATABASE] Configuración de {self.backend.descripcion} lista")
+            
+            self.pool = ConnectionPool(
+                self._connect,
+                min_size=Config.DB_POOL_MIN_SIZE,
+                max_size=Config.DB_POOL_MAX_SIZE,
+                timeout=Config.DB_POOL_TIMEOUT,
+                max_lifetime=Config.DB_POOL_MAX_LIFETIME,
+                max_idle=Config.DB_POOL_MAX_IDLE,
+                ping_idle=Config.DB_POOL_PING_IDLE
             )
-            print("[DATABASE] Configuración de SQL Server lista")
             
             # Probar conexión
             self._test_connection()
             
         except Exception as e:
-            print(f"[DATABASE ERROR] Error configurando SQL Server: {e}")
+            print(f"[DATABASE ERROR] Error configurando la base de datos: {e}")
             raise
     
     def _test_connection(self):
-        """Probar la conexión a la base de datos"""
+        """Probar la conexión a la base de datos y precargar el pool"""
         try:
+            self.pool.fill()
             conn = self.get_connection()
             cursor = conn.cursor()
             cursor.execute("SELECT 1")
             cursor.close()
             conn.close()
-            print("[DATABASE] Conexión a SQL Server verificada")
+            print(f"[DATABASE] Conexión a {self.backend.descripcion} verificada")
+            print(f"[DATABASE] Pool de conexiones: {self.pool.min_size}-{self.pool.max_size}")
         except Exception as e:
-            print(f"[DATABASE ERROR] No se pudo conectar a SQL Server: {e}")
+            print(f"[DATABASE ERROR] No se pudo conectar a {self.backend.descripcion}: {e}")
             raise
     
+    def _connect(self):
+        return self.backend.conectar()
+    
     def get_connection(self):
+        """Obtener una conexión del pool; se devuelve llamando a close()"""
+        inicio = time.perf_counter()
         try:
-            connection = pyodbc.connect(self.connection_string)
+            connection = self.pool.acquire()
+            metricas.observar_adquisicion(time.perf_counter() - inicio)
             return connection
         except Exception as e:
             print(f"[DATABASE ERROR] Error obteniendo conexión: {e}")
             raise
+    
+    @contextmanager
+    def transaction(self):
+        """Cursor dentro de una transacción: commit al salir, rollback si hay error"""
+        connection = self.get_connection()
+        cursor = None
+        try:
+            connection.autocommit = False
+            cursor = connection.cursor()
+            cursor.fast_executemany = True
+            yield cursor
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            if cursor:
+                cursor.close()
+            connection.close()
+    
+    def pool_stats(self):
+        return self.pool.stats()
 
-# Función helper para ejecutar queries en SQL Server
+# Función helper para ejecutar queries en la base configurada
 def execute_query(query, params=None, fetch=False, fetch_all=False):
     connection = None
     cursor = None
+    inicio = None
+    renglones = None
     try:
         db = DatabaseManager()
+        espera = time.perf_counter()
         connection = db.get_connection()
+        inicio = time.perf_counter()
+        espera = inicio - espera
         cursor = connection.cursor()
         
         if params:
@@ -76,31 +355,91 @@ def execute_query(query, params=None, fetch=False, fetch_all=False):
             columns = [column[0] for column in cursor.description]
             row = cursor.fetchone()
             result = dict(zip(columns, row)) if row else None
+            renglones = 1 if row else 0
         elif fetch_all:
             columns = [column[0] for column in cursor.description]
             rows = cursor.fetchall()
             result = [dict(zip(columns, row)) for row in rows]
+            renglones = len(rows)
+        elif cursor.description is not None and query.strip().upper().startswith('INSERT'):
+            # INSERT ... OUTPUT INSERTED.id: leer el id generado antes del commit
+            result = cursor.fetchone()[0]
+            connection.commit()
+            renglones = 1
         else:
             # Para INSERT, UPDATE, DELETE
+            renglones = cursor.rowcount
             connection.commit()
             # Obtener el ID insertado (si es INSERT)
             if query.strip().upper().startswith('INSERT'):
                 cursor.execute("SELECT SCOPE_IDENTITY()")
                 result = cursor.fetchone()[0]
             else:
-                result = cursor.rowcount
+                result = renglones
         
+        metricas.observar_consulta(query, time.perf_counter() - inicio, renglones, espera)
         return result
         
     except Exception as e:
+        if inicio is not None:
+            metricas.observar_consulta(query, time.perf_counter() - inicio, renglones, espera, error=True)
         if connection:
             connection.rollback()
-        print(f"[QUERY ERROR] Error en query SQL Server: {e}")
+        print(f"[QUERY ERROR] Error en query: {e}")
+        print(f"[QUERY DEBUG] Query: {query}")
+        print(f"[QUERY DEBUG] Params: {params}")
+        raise
+    finally:
+        if cursor:
+            cursor.close()
+        if connection:
+            connection.close()
+
+def execute_query_stream(query, params=None, batch_size=None):
+    """Generador de renglones (dict) leídos con fetchmany.
+    
+    La conexión permanece prestada mientras se consume el generador y vuelve
+    al pool al agotarlo o cerrarlo, así la memoria no crece con el resultado.
+    La duración que se registra en las métricas incluye ese tiempo de consumo.
+    """
+    batch_size = batch_size or Config.STREAMING_BATCH_SIZE
+    connection = None
+    cursor = None
+    inicio = None
+    renglones = 0
+    error = False
+    try:
+        db = DatabaseManager()
+        espera = time.perf_counter()
+        connection = db.get_connection()
+        inicio = time.perf_counter()
+        espera = inicio - espera
+        cursor = connection.cursor()
+        
+        if params:
+            cursor.execute(query, params)
+        else:
+            cursor.execute(query)
+        
+        columns = [column[0] for column in cursor.description]
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            renglones += len(rows)
+            for row in rows:
+                yield dict(zip(columns, row))
+                
+    except Exception as e:
+        error = True
+        print(f"[QUERY ERROR] Error en query (stream): {e}")
         print(f"[QUERY DEBUG] Query: {query}")
         print(f"[QUERY DEBUG] Params: {params}")
         raise
     finally:
+        if inicio is not None:
+            metricas.observar_consulta(query, time.perf_counter() - inicio, renglones, espera, error=error)
         if cursor:
             cursor.close()
         if connection:
-            connection.close()
\ No newline at end of file
+            connection.close()
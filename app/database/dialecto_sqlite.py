@@ -0,0 +1,206 @@
+import re
+import sqlite3
+from collections import namedtuple
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+
+# Marcador temporal de parámetros: permite mover `?` al reacomodar la
+# consulta (TOP -> LIMIT) y saber después en qué orden quedaron
+_MARCA = '\x00{}\x00'
+_MARCA_RE = re.compile('\x00(\\d+)\x00')
+
+_COMENTARIO_RE = re.compile(r'--[^\n]*')
+_CREAR_SI_NO_EXISTE_RE = re.compile(
+    r"IF\s+OBJECT_ID\(\s*'(?:dbo\.)?\w+'\s*(?:,\s*'U'\s*)?\)\s+IS\s+NULL\s+CREATE\s+TABLE\s+",
+    re.IGNORECASE
+)
+_DBO_RE = re.compile(r'\bdbo\.', re.IGNORECASE)
+_HINT_RE = re.compile(
+    r'\s*WITH\s*\(\s*((?:UPDLOCK|HOLDLOCK|ROWLOCK|NOLOCK|READPAST|XLOCK|TABLOCKX?|PAGLOCK|SERIALIZABLE)'
+    r'(?:\s*,\s*(?:UPDLOCK|HOLDLOCK|ROWLOCK|NOLOCK|READPAST|XLOCK|TABLOCKX?|PAGLOCK|SERIALIZABLE))*)\s*\)',
+    re.IGNORECASE
+)
+_HINTS_DE_ESCRITURA = {'UPDLOCK', 'HOLDLOCK', 'XLOCK', 'TABLOCKX', 'SERIALIZABLE'}
+_OUTPUT_RE = re.compile(r'\s+OUTPUT\s+(INSERTED\.\w+(?:\s*,\s*INSERTED\.\w+)*)', re.IGNORECASE)
+_TOP_RE = re.compile(r'^(\s*SELECT\s+(?:DISTINCT\s+)?)TOP\s*(?:\(\s*(\S+?)\s*\)|(\d+))', re.IGNORECASE)
+_OFFSET_FETCH_RE = re.compile(
+    r'OFFSET\s+(\S+?)\s+ROWS?\s+FETCH\s+(?:NEXT|FIRST)\s+(\S+?)\s+ROWS?\s+ONLY', re.IGNORECASE
+)
+_CAST_DATE_RE = re.compile(r'CAST\(((?:[^()]|\([^()]*\))+?)\s+AS\s+DATE\)', re.IGNORECASE)
+_REEMPLAZOS = [
+    (re.compile(r'\bGETDATE\(\)|\bSYSDATETIME\(\)', re.IGNORECASE), "(datetime('now', 'localtime'))"),
+    (re.compile(r'\bSCOPE_IDENTITY\(\)', re.IGNORECASE), 'last_insert_rowid()'),
+    (re.compile(r'\bISNULL\(', re.IGNORECASE), 'IFNULL('),
+    (re.compile(r'\bLEN\(', re.IGNORECASE), 'LENGTH('),
+    (re.compile(r'\bSUBSTRING\(', re.IGNORECASE), 'SUBSTR('),
+    (re.compile(r'\bAS\s+BIGINT\)', re.IGNORECASE), 'AS INTEGER)'),
+    # Concatenación: solo el `+` pegado a una cadena literal, el resto es aritmético
+    (re.compile(r"'\s*\+"), "' ||"),
+    (re.compile(r"\+\s*'"), "|| '"),
+]
+
+Traduccion = namedtuple('Traduccion', 'sentencias permutacion bloquea')
+
+@lru_cache(maxsize=1024)
+def traducir(sql):
+    """Traducir los modismos de T-SQL que usan los servicios al dialecto de SQLite.
+    
+    Cubre IF OBJECT_ID ... CREATE TABLE, dbo., hints de tabla, OUTPUT
+    INSERTED (-> RETURNING), GETDATE(), SCOPE_IDENTITY(), TOP y OFFSET/FETCH
+    (-> LIMIT), CAST AS DATE, SUBSTRING y concatenación con `+`. Regresa las
+    sentencias resultantes, el nuevo orden de los parámetros (None si no
+    cambia) y si la consulta pedía bloqueo de escritura (UPDLOCK, HOLDLOCK).
+    """
+    sql = _COMENTARIO_RE.sub('', sql)
+    contador = iter(range(sql.count('?')))
+    sql = re.sub(r'\?', lambda _: _MARCA.format(next(contador)), sql)
+    
+    sql = _CREAR_SI_NO_EXISTE_RE.sub('CREATE TABLE IF NOT EXISTS ', sql)
+    sql = _DBO_RE.sub('', sql)
+    
+    bloquea = False
+    for hints in _HINT_RE.findall(sql):
+        bloquea = bloquea or any(
+            hint.strip().upper() in _HINTS_DE_ESCRITURA for hint in hints.split(',')
+        )
+    sql = _HINT_RE.sub('', sql)
+    
+    for patron, reemplazo in _REEMPLAZOS:
+        sql = patron.sub(reemplazo, sql)
+    sql = _CAST_DATE_RE.sub(r'DATE(\1)', sql)
+    
+    # Cláusulas que en SQLite van al final de la sentencia
+    al_final = []
+    output = _OUTPUT_RE.search(sql)
+    if output:
+        columnas = [columna.strip()[len('INSERTED.'):] for columna in output.group(1).split(',')]
+        sql = sql[:output.start()] + sql[output.end():]
+        al_final.append('RETURNING ' + ', '.join(columnas))
+    
+    top = _TOP_RE.search(sql)
+    if top:
+        sql = top.group(1) + sql[top.end():]
+        al_final.insert(0, f"LIMIT {top.group(2) or top.group(3)}")
+    
+    sql = _OFFSET_FETCH_RE.sub(lambda m: f"LIMIT {m.group(2)} OFFSET {m.group(1)}", sql)
+    
+    if al_final:
+        sql = sql.rstrip().rstrip(';') + '\n' + ' '.join(al_final)
+    
+    orden = [int(indice) for indice in _MARCA_RE.findall(sql)]
+    sql = _MARCA_RE.sub('?', sql)
+    sentencias = [sentencia.strip() for sentencia in sql.split(';') if sentencia.strip()]
+    permutacion = tuple(orden) if orden != sorted(orden) else None
+    return Traduccion(sentencias, permutacion, bloquea)
+
+def _parse_datetime(valor):
+    return datetime.fromisoformat(valor.decode())
+
+def _parse_date(valor):
+    return date.fromisoformat(valor.decode()[:10])
+
+# pyodbc regresa datetime, date y Decimal según el tipo de la columna
+sqlite3.register_adapter(Decimal, float)
+sqlite3.register_adapter(datetime, lambda valor: valor.isoformat(' '))
+sqlite3.register_adapter(date, lambda valor: valor.isoformat())
+sqlite3.register_converter('DATETIME', _parse_datetime)
+sqlite3.register_converter('DATE', _parse_date)
+sqlite3.register_converter('DECIMAL', lambda valor: Decimal(valor.decode()))
+
+class CursorSQLite:
+    """Cursor con la interfaz de pyodbc que traduce cada consulta antes de ejecutarla"""
+    
+    def __init__(self, conexion, raw):
+        self._conexion = conexion
+        self._raw = raw
+        self.fast_executemany = False  # atributo de pyodbc, sin efecto en SQLite
+    
+    @staticmethod
+    def _ordenar(params, permutacion):
+        if params is None:
+            return ()
+        params = tuple(params)
+        return tuple(params[i] for i in permutacion) if permutacion else params
+    
+    def execute(self, sql, params=None):
+        traduccion = traducir(sql)
+        if traduccion.bloquea and not self._conexion.autocommit and not self._conexion.raw.in_transaction:
+            # Equivalente a UPDLOCK: tomar el lock de escritura desde la lectura
+            self._raw.execute('BEGIN IMMEDIATE')
+        
+        if len(traduccion.sentencias) > 1:
+            for sentencia in traduccion.sentencias:
+                self._raw.execute(sentencia)
+        else:
+            self._raw.execute(traduccion.sentencias[0], self._ordenar(params, traduccion.permutacion))
+        return self
+    
+    def executemany(self, sql, seq_params):
+        traduccion = traducir(sql)
+        self._raw.executemany(
+            traduccion.sentencias[0],
+            [self._ordenar(params, traduccion.permutacion) for params in seq_params]
+        )
+        return self
+    
+    @property
+    def description(self):
+        return self._raw.description
+    
+    @property
+    def rowcount(self):
+        return self._raw.rowcount
+    
+    def fetchone(self):
+        return self._raw.fetchone()
+    
+    def fetchall(self):
+        return self._raw.fetchall()
+    
+    def fetchmany(self, size):
+        return self._raw.fetchmany(size)
+    
+    def close(self):
+        self._raw.close()
+    
+    def __iter__(self):
+        return iter(self._raw)
+
+class ConexionSQLite:
+    """Conexión sqlite3 con la interfaz que usa el pool (autocommit, cursor, commit, rollback)"""
+    
+    def __init__(self, raw):
+        self.raw = raw
+    
+    @property
+    def autocommit(self):
+        return self.raw.isolation_level is None
+    
+    @autocommit.setter
+    def autocommit(self, valor):
+        self.raw.isolation_level = None if valor else 'IMMEDIATE'
+    
+    def cursor(self):
+        return CursorSQLite(self, self.raw.cursor())
+    
+    def commit(self):
+        self.raw.commit()
+    
+    def rollback(self):
+        self.raw.rollback()
+    
+    def close(self):
+        self.raw.close()
+
+def conectar(ruta, timeout, uri=False):
+    """Abrir una conexión lista para el pool"""
+    raw = sqlite3.connect(
+        ruta, timeout=timeout, uri=uri, check_same_thread=False,
+        detect_types=sqlite3.PARSE_DECLTYPES, isolation_level='IMMEDIATE'
+    )
+    raw.execute('PRAGMA foreign_keys = OFF')
+    if not uri:
+        raw.execute('PRAGMA journal_mode = WAL')
+        raw.execute('PRAGMA synchronous = NORMAL')
+    return ConexionSQLite(raw)
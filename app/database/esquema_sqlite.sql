@@ -0,0 +1,234 @@
+-- Esquema mínimo de POS_Refaccionaria para el backend SQLite (pruebas locales y de carga).
+-- Las columnas siguen a las tablas de SQL Server que usan los servicios; los
+-- catálogos llevan los registros que el código da por existentes.
+
+CREATE TABLE IF NOT EXISTS estatus_general (
+    id_estatus_general INTEGER PRIMARY KEY,
+    nombre TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS metodo_pago (
+    id_metodo_pago INTEGER PRIMARY KEY,
+    forma_pago TEXT NOT NULL,
+    fk_estatus_general INTEGER DEFAULT 1
+);
+
+CREATE TABLE IF NOT EXISTS ventas_tipo (
+    id_ventas_tipo INTEGER PRIMARY KEY,
+    tipo_ventas TEXT NOT NULL,
+    fk_estatus_general INTEGER DEFAULT 1
+);
+
+CREATE TABLE IF NOT EXISTS marcas (
+    id_marcas INTEGER PRIMARY KEY,
+    nombre_marca TEXT NOT NULL,
+    fk_estatus_general INTEGER DEFAULT 1
+);
+
+CREATE TABLE IF NOT EXISTS categorias (
+    id_categorias INTEGER PRIMARY KEY,
+    nombre TEXT NOT NULL,
+    fk_estatus_general INTEGER DEFAULT 1
+);
+
+CREATE TABLE IF NOT EXISTS unidades_medida (
+    id_unidades_medida INTEGER PRIMARY KEY,
+    nombre_unidad_medida TEXT NOT NULL,
+    fk_estatus_general INTEGER DEFAULT 1
+);
+
+CREATE TABLE IF NOT EXISTS usuarios_tipos (
+    id_usuario_tipo INTEGER PRIMARY KEY,
+    nombre TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS proveedor_categorias (
+    id_proveedor_categoria INTEGER PRIMARY KEY,
+    nombre TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS movimiento_tipo (
+    id_tipo_movimiento INTEGER PRIMARY KEY,
+    tipo_movimiento TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS telefonos (
+    id_telefono INTEGER PRIMARY KEY,
+    telefono TEXT,
+    descripcion TEXT,
+    fecha_ingreso DATETIME,
+    fk_telefonos_categoria INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS direccion (
+    id_direccion INTEGER PRIMARY KEY,
+    calle TEXT,
+    colonia TEXT,
+    ciudad TEXT,
+    estado TEXT,
+    codigo_postal TEXT,
+    fk_direccion_tipo INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS correos_electronicos (
+    id_correo_electronico INTEGER PRIMARY KEY,
+    correo_electronico TEXT,
+    fecha_ingreso DATETIME,
+    fk_correo_electronico_categoria INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS empleados (
+    id_empleados INTEGER PRIMARY KEY,
+    nombre TEXT NOT NULL,
+    apellido_1 TEXT,
+    apellido_2 TEXT,
+    rfc TEXT,
+    curp TEXT,
+    nss TEXT,
+    fk_telefonos INTEGER,
+    fk_correo_electronico INTEGER,
+    fk_direccion INTEGER,
+    fk_usuario INTEGER,
+    fk_estatus_general INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS usuarios (
+    id_usuarios INTEGER PRIMARY KEY,
+    fk_usuario_tipo INTEGER,
+    fk_usuarios_permisos INTEGER,
+    password_hash TEXT,
+    activo INTEGER DEFAULT 1,
+    fk_empleado INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS clientes (
+    id_clientes INTEGER PRIMARY KEY,
+    nombre TEXT NOT NULL,
+    fk_telefonos INTEGER,
+    fk_correo_electronico INTEGER,
+    rfc TEXT,
+    limite_credito DECIMAL(18, 2) DEFAULT 0,
+    saldo_actual DECIMAL(18, 2) DEFAULT 0,
+    fecha_registro DATETIME,
+    fk_direccion INTEGER,
+    fk_estatus_general INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS proveedores (
+    id_proveedores INTEGER PRIMARY KEY,
+    nombre TEXT NOT NULL,
+    rfc TEXT,
+    fecha_ingreso DATETIME,
+    fk_telefono INTEGER,
+    fk_correo_electronico INTEGER,
+    fk_direccion INTEGER,
+    fk_estatus_general INTEGER,
+    fk_proveedor_cateogoria INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS productos (
+    id_productos INTEGER PRIMARY KEY,
+    nombre TEXT NOT NULL,
+    codigo_barras TEXT,
+    precio_compra DECIMAL(18, 2) DEFAULT 0,
+    precio_venta DECIMAL(18, 2) DEFAULT 0,
+    stock_minimo INTEGER DEFAULT 0,
+    stock_maximo INTEGER DEFAULT 0,
+    descripcion TEXT,
+    fk_marcas INTEGER,
+    fk_categorias INTEGER,
+    fk_unidades_medida INTEGER,
+    fk_estatus_general INTEGER,
+    fk_productos_imagenes INTEGER
+);
+CREATE INDEX IF NOT EXISTS ix_productos_codigo_barras ON productos (codigo_barras);
+
+CREATE TABLE IF NOT EXISTS ventas (
+    id_ventas INTEGER PRIMARY KEY,
+    folio TEXT,
+    fecha_vencimiento_credito DATETIME,
+    saldo_pendiente DECIMAL(18, 2) DEFAULT 0,
+    enganche DECIMAL(18, 2) DEFAULT 0,
+    fecha_ventas DATETIME,
+    fecha_cancelacion DATETIME,
+    sub_total DECIMAL(18, 2) DEFAULT 0,
+    impuestos DECIMAL(18, 2) DEFAULT 0,
+    total_neto DECIMAL(18, 2) DEFAULT 0,
+    descuentos DECIMAL(18, 2) DEFAULT 0,
+    efectivo_recibido DECIMAL(18, 2) DEFAULT 0,
+    cambio DECIMAL(18, 2) DEFAULT 0,
+    fk_ventas_tipo INTEGER,
+    fk_cliente INTEGER,
+    fk_empleados INTEGER,
+    fk_metodo_pago INTEGER,
+    fk_estatus_general INTEGER
+);
+CREATE INDEX IF NOT EXISTS ix_ventas_fecha ON ventas (fecha_ventas);
+CREATE INDEX IF NOT EXISTS ix_ventas_folio ON ventas (folio);
+CREATE INDEX IF NOT EXISTS ix_ventas_empleado ON ventas (fk_empleados, fecha_ventas);
+CREATE INDEX IF NOT EXISTS ix_ventas_cliente ON ventas (fk_cliente, fecha_ventas);
+
+CREATE TABLE IF NOT EXISTS ventas_detalles (
+    id_detalles_ventas INTEGER PRIMARY KEY,
+    cantidad_productos INTEGER NOT NULL,
+    precio_unitario DECIMAL(18, 2) NOT NULL,
+    descuentos DECIMAL(18, 2) DEFAULT 0,
+    importe_total DECIMAL(18, 2) NOT NULL,
+    fk_productos INTEGER NOT NULL,
+    fk_ventas INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_ventas_detalles_venta ON ventas_detalles (fk_ventas);
+CREATE INDEX IF NOT EXISTS ix_ventas_detalles_producto ON ventas_detalles (fk_productos);
+
+CREATE TABLE IF NOT EXISTS movimiento (
+    id_movimiento INTEGER PRIMARY KEY,
+    fk_movimiento_tipo INTEGER NOT NULL,
+    fk_producto INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS movimiento_detalles (
+    id_movimiento_detalles INTEGER PRIMARY KEY,
+    fk_productos INTEGER NOT NULL,
+    fk_empleados INTEGER,
+    cantidad INTEGER NOT NULL,
+    existencia_anterior INTEGER,
+    existencia_nueva INTEGER,
+    fecha_movimiento DATETIME,
+    fk_movimiento INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_movimiento_detalles_producto ON movimiento_detalles (fk_productos, fecha_movimiento);
+
+CREATE TABLE IF NOT EXISTS cuentas_por_cobrar_pagar (
+    id_cuentas_por_cobrar_pagar INTEGER PRIMARY KEY,
+    fk_cuentas_tipo INTEGER,
+    fk_clientes INTEGER,
+    fk_proveedores INTEGER,
+    fk_ventas INTEGER,
+    monto DECIMAL(18, 2),
+    fecha_emision DATETIME,
+    fecha_vencimiento DATETIME,
+    fk_estatus_general INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS productos_existencias (
+    fk_productos INTEGER NOT NULL PRIMARY KEY,
+    existencia INTEGER NOT NULL DEFAULT 0,
+    fecha_actualizacion DATETIME NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+
+CREATE TABLE IF NOT EXISTS cambios_sync (
+    id_cambio INTEGER PRIMARY KEY,
+    entidad TEXT NOT NULL,
+    fk_registro INTEGER NOT NULL,
+    fecha_cambio DATETIME NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+
+INSERT OR IGNORE INTO estatus_general (id_estatus_general, nombre) VALUES (1, 'Activo'), (2, 'Inactivo');
+INSERT OR IGNORE INTO metodo_pago (id_metodo_pago, forma_pago) VALUES
+    (1, 'Efectivo'), (2, 'Tarjeta de débito'), (3, 'Tarjeta de crédito'), (4, 'Transferencia');
+INSERT OR IGNORE INTO ventas_tipo (id_ventas_tipo, tipo_ventas) VALUES (1, 'Contado'), (2, 'Crédito');
+INSERT OR IGNORE INTO movimiento_tipo (id_tipo_movimiento, tipo_movimiento) VALUES
+    (1, 'Entrada'), (2, 'Salida por venta'), (3, 'Ajuste');
+INSERT OR IGNORE INTO usuarios_tipos (id_usuario_tipo, nombre) VALUES (1, 'Administrador'), (2, 'Cajero');
+INSERT OR IGNORE INTO unidades_medida (id_unidades_medida, nombre_unidad_medida) VALUES (1, 'Pieza'), (2, 'Juego'), (3, 'Litro');
+INSERT OR IGNORE INTO proveedor_categorias (id_proveedor_categoria, nombre) VALUES (1, 'Refacciones'), (2, 'Lubricantes');
@@ -0,0 +1,115 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from app.database.db_connection import execute_query
+from config import Config
+
+class PaginacionInvalidaError(ValueError):
+    """Parámetros de paginación (limit o cursor) inválidos"""
+    pass
+
+def _serializar_valor(valor):
+    if isinstance(valor, datetime):
+        return {'dt': valor.isoformat()}
+    if isinstance(valor, date):
+        return {'d': valor.isoformat()}
+    if isinstance(valor, Decimal):
+        return {'dec': str(valor)}
+    return valor
+
+def _deserializar_valor(valor):
+    if isinstance(valor, dict):
+        if 'dt' in valor:
+            return datetime.fromisoformat(valor['dt'])
+        if 'd' in valor:
+            return date.fromisoformat(valor['d'])
+        if 'dec' in valor:
+            return Decimal(valor['dec'])
+    return valor
+
+def codificar_cursor(valores):
+    """Cursor opaco con los valores de orden del último renglón entregado"""
+    payload = json.dumps([_serializar_valor(v) for v in valores], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decodificar_cursor(cursor, num_columnas):
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno).decode('utf-8'))
+        if not isinstance(valores, list) or len(valores) != num_columnas:
+            raise ValueError('número de columnas incorrecto')
+        return [_deserializar_valor(v) for v in valores]
+    except Exception as e:
+        raise PaginacionInvalidaError(f'Cursor de paginación inválido: {e}')
+
+def obtener_parametros_paginacion(args):
+    """Leer limit, cursor e include_total de la query string (request.args)"""
+    try:
+        limite = int(args.get('limit', Config.PAGINACION_LIMITE_DEFAULT))
+    except ValueError:
+        raise PaginacionInvalidaError('El parámetro limit debe ser numérico')
+    
+    return {
+        'limite': max(1, min(limite, Config.PAGINACION_LIMITE_MAX)),
+        'cursor': args.get('cursor') or None,
+        'incluir_total': args.get('include_total', 'false').lower() in ('1', 'true', 'si')
+    }
+
+def _condicion_keyset(orden, valores, descendente):
+    """(a, b) > (x, y) expandido, SQL Server no soporta comparación de tuplas"""
+    operador = '<' if descendente else '>'
+    partes = []
+    params = []
+    for i, (expresion, _) in enumerate(orden):
+        iguales = [f"{orden[j][0]} = ?" for j in range(i)]
+        partes.append('(' + ' AND '.join(iguales + [f"{expresion} {operador} ?"]) + ')')
+        params.extend(valores[:i])
+        params.append(valores[i])
+    return '(' + ' OR '.join(partes) + ')', params
+
+def consulta_paginada(columnas, origen, condiciones, params, orden, limite,
+                      cursor=None, descendente=False, incluir_total=False):
+    """Ejecutar una consulta paginada por keyset.
+    
+    orden es una lista de (expresión SQL, llave en el renglón); la última
+    columna debe ser única (normalmente la llave primaria) para que el
+    cursor sea estable.
+    """
+    condiciones = list(condiciones)
+    params = list(params)
+    where_base = f" WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    
+    condiciones_pagina = list(condiciones)
+    params_pagina = list(params)
+    if cursor:
+        condicion, params_cursor = _condicion_keyset(
+            orden, decodificar_cursor(cursor, len(orden)), descendente
+        )
+        condiciones_pagina.append(condicion)
+        params_pagina.extend(params_cursor)
+    
+    direccion = ' DESC' if descendente else ''
+    where_pagina = f" WHERE {' AND '.join(condiciones_pagina)}" if condiciones_pagina else ""
+    query = (
+        f"SELECT {columnas} FROM {origen}{where_pagina} "
+        f"ORDER BY {', '.join(expresion + direccion for expresion, _ in orden)} "
+        f"OFFSET 0 ROWS FETCH NEXT ? ROWS ONLY"
+    )
+    # Un renglón extra indica si hay otra página
+    rows = execute_query(query, tuple(params_pagina + [limite + 1]), fetch_all=True) or []
+    hay_mas = len(rows) > limite
+    rows = rows[:limite]
+    
+    paginacion = {
+        'limit': limite,
+        'has_more': hay_mas,
+        'next_cursor': codificar_cursor([rows[-1][llave] for _, llave in orden]) if hay_mas else None
+    }
+    if incluir_total:
+        total = execute_query(
+            f"SELECT COUNT(*) as total FROM {origen}{where_base}", tuple(params), fetch=True
+        )
+        paginacion['total'] = total['total'] if total else 0
+    
+    return rows, paginacion
@@ -0,0 +1,258 @@
+"""Datos sintéticos para pruebas de carga: catálogos, productos, clientes,
+empleados, ventas con sus detalles y el ledger de movimientos.
+
+Las ventas se reparten en los últimos `dias` días con más movimiento en
+horario comercial y fines de semana; los productos siguen una distribución
+de popularidad sesgada (unos cuantos SKU concentran la mayoría de las
+ventas), como en una refaccionaria real. Por cada producto se registra una
+entrada inicial y, por día, una salida con lo vendido ese día, así el
+ledger cuadra con los saldos de productos_existencias.
+
+Los ids se leen de vuelta por rango (id > máximo previo), por lo que la
+semilla supone que nadie más escribe en la base mientras corre.
+"""
+import bisect
+import random
+import time
+from datetime import datetime, timedelta
+from app.database.db_connection import DatabaseManager, execute_query
+from config import Config
+
+MARCAS = ['Bosch', 'Gonher', 'LTH', 'Moog', 'Monroe', 'NGK', 'Fram', 'Castrol', 'Wagner', 'Dayco',
+          'Champion', 'ACDelco', 'Motorcraft', 'Denso', 'Valeo', 'Brembo']
+CATEGORIAS = ['Frenos', 'Suspensión', 'Filtros', 'Encendido', 'Lubricantes', 'Eléctrico',
+              'Enfriamiento', 'Transmisión', 'Motor', 'Carrocería', 'Iluminación', 'Bandas']
+PIEZAS = ['Balata', 'Disco', 'Amortiguador', 'Filtro de aceite', 'Filtro de aire', 'Bujía',
+          'Cable de bujía', 'Aceite 5W-30', 'Batería', 'Alternador', 'Termostato', 'Bomba de agua',
+          'Banda de distribución', 'Clutch', 'Foco', 'Rótula', 'Terminal', 'Horquilla', 'Radiador',
+          'Sensor de oxígeno', 'Bobina', 'Junta de cabeza', 'Manguera', 'Tensor']
+VEHICULOS = ['Tsuru', 'Jetta', 'Aveo', 'Versa', 'Sentra', 'Corolla', 'Civic', 'Pointer',
+             'Chevy', 'Spark', 'Vento', 'March', 'Ranger', 'F-150', 'Silverado', 'Tornado']
+NOMBRES = ['José', 'María', 'Juan', 'Guadalupe', 'Luis', 'Ana', 'Carlos', 'Rosa', 'Jorge',
+           'Laura', 'Miguel', 'Patricia', 'Pedro', 'Sofía', 'Ricardo', 'Elena', 'Fernando', 'Alejandra']
+APELLIDOS = ['Hernández', 'García', 'Martínez', 'López', 'González', 'Pérez', 'Rodríguez',
+             'Sánchez', 'Ramírez', 'Cruz', 'Flores', 'Gómez', 'Morales', 'Vázquez', 'Reyes', 'Jiménez']
+IVA = 0.16
+
+def _max_id(cursor, tabla, columna):
+    cursor.execute(f"SELECT MAX({columna}) FROM {tabla}")
+    return cursor.fetchone()[0] or 0
+
+def _ids_nuevos(cursor, tabla, columna, desde):
+    cursor.execute(f"SELECT {columna} FROM {tabla} WHERE {columna} > ? ORDER BY {columna}", (desde,))
+    return [row[0] for row in cursor.fetchall()]
+
+def _insertar(cursor, tabla, columna_id, columnas, renglones):
+    """Insertar en lote y regresar los ids generados en el mismo orden"""
+    previo = _max_id(cursor, tabla, columna_id)
+    cursor.executemany(
+        f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES ({', '.join('?' for _ in columnas)})",
+        renglones
+    )
+    return _ids_nuevos(cursor, tabla, columna_id, previo)
+
+def _catalogo(cursor, tabla, columna_id, columna_nombre, nombres):
+    """Ids de los nombres pedidos, creando los que falten"""
+    cursor.execute(f"SELECT {columna_id}, {columna_nombre} FROM {tabla}")
+    existentes = {row[1]: row[0] for row in cursor.fetchall()}
+    faltantes = [nombre for nombre in nombres if nombre not in existentes]
+    if faltantes:
+        ids = _insertar(cursor, tabla, columna_id, [columna_nombre, 'fk_estatus_general'],
+                        [(nombre, Config.ESTATUS_ACTIVO) for nombre in faltantes])
+        existentes.update(zip(faltantes, ids))
+    return [existentes[nombre] for nombre in nombres]
+
+def generar_productos(cursor, cantidad, rng):
+    marcas = _catalogo(cursor, 'marcas', 'id_marcas', 'nombre_marca', MARCAS)
+    categorias = _catalogo(cursor, 'categorias', 'id_categorias', 'nombre', CATEGORIAS)
+    renglones = []
+    for i in range(cantidad):
+        pieza = rng.choice(PIEZAS)
+        costo = round(rng.lognormvariate(5, 0.9), 2)
+        renglones.append((
+            f"{pieza} {rng.choice(VEHICULOS)} {rng.choice(MARCAS)} #{i + 1}",
+            f"75{rng.randrange(10 ** 10, 10 ** 11)}",
+            costo,
+            round(costo * rng.uniform(1.25, 1.8), 2),
+            rng.choice([2, 3, 5, 10]),
+            rng.choice([20, 50, 100]),
+            f"{pieza} para {rng.choice(VEHICULOS)}",
+            rng.choice(marcas),
+            categorias[PIEZAS.index(pieza) % len(categorias)],
+            1,
+            Config.ESTATUS_ACTIVO if rng.random() > 0.03 else Config.ESTATUS_INACTIVO
+        ))
+    columnas = ['nombre', 'codigo_barras', 'precio_compra', 'precio_venta', 'stock_minimo',
+                'stock_maximo', 'descripcion', 'fk_marcas', 'fk_categorias', 'fk_unidades_medida',
+                'fk_estatus_general']
+    ids = _insertar(cursor, 'productos', 'id_productos', columnas, renglones)
+    return [(producto_id, renglon[3]) for producto_id, renglon in zip(ids, renglones)]
+
+def _nombre_persona(rng):
+    return rng.choice(NOMBRES), rng.choice(APELLIDOS), rng.choice(APELLIDOS)
+
+def generar_empleados(cursor, cantidad, rng):
+    renglones = [
+        (*_nombre_persona(rng), f"RFC{i:09d}", f"CURP{i:014d}", f"NSS{i:08d}", Config.ESTATUS_ACTIVO)
+        for i in range(cantidad)
+    ]
+    return _insertar(cursor, 'empleados', 'id_empleados',
+                     ['nombre', 'apellido_1', 'apellido_2', 'rfc', 'curp', 'nss', 'fk_estatus_general'],
+                     renglones)
+
+def generar_clientes(cursor, cantidad, rng):
+    renglones = []
+    for i in range(cantidad):
+        nombre, apellido_1, apellido_2 = _nombre_persona(rng)
+        renglones.append((
+            f"{nombre} {apellido_1} {apellido_2}", f"CLI{i:010d}",
+            rng.choice([0, 5000, 10000, 20000]), 0, datetime.now(), Config.ESTATUS_ACTIVO
+        ))
+    return _insertar(cursor, 'clientes', 'id_clientes',
+                     ['nombre', 'rfc', 'limite_credito', 'saldo_actual', 'fecha_registro', 'fk_estatus_general'],
+                     renglones)
+
+def _momento_de_venta(dia, rng):
+    # Más ventas a media mañana y media tarde, de 9:00 a 20:00
+    hora = min(20, max(9, int(rng.gauss(14, 3))))
+    return dia + timedelta(hours=hora, minutes=rng.randrange(60), seconds=rng.randrange(60))
+
+def _registrar_movimientos(cursor, tipo, empleado_id, fecha, cantidades, existencias):
+    """Un movimiento por producto con su renglón de ledger, como ExistenciasService"""
+    productos = sorted(cantidades)
+    ids = _insertar(cursor, 'movimiento', 'id_movimiento', ['fk_movimiento_tipo', 'fk_producto'],
+                    [(tipo, producto_id) for producto_id in productos])
+    detalles = []
+    for movimiento_id, producto_id in zip(ids, productos):
+        anterior = existencias.get(producto_id, 0)
+        cantidad = cantidades[producto_id]
+        existencias[producto_id] = anterior + cantidad if tipo == 1 else anterior - cantidad
+        detalles.append((producto_id, empleado_id, cantidad, anterior, existencias[producto_id],
+                         fecha, movimiento_id))
+    cursor.executemany(
+        "INSERT INTO movimiento_detalles (fk_productos, fk_empleados, cantidad, existencia_anterior, "
+        "existencia_nueva, fecha_movimiento, fk_movimiento) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        detalles
+    )
+
+def generar_ventas(cursor, ventas, dias, productos, empleados, clientes, rng, progreso=None):
+    """Ventas de los últimos `dias` días; regresa (ventas, renglones de detalle)"""
+    hoy = datetime.combine(datetime.now().date(), datetime.min.time())
+    # Fines de semana con 40% más ventas que entre semana
+    pesos_dia = [1.4 if (hoy - timedelta(days=d)).weekday() >= 5 else 1.0 for d in range(dias, 0, -1)]
+    ventas_por_dia = [int(ventas * peso / sum(pesos_dia)) for peso in pesos_dia]
+    ventas_por_dia[-1] += ventas - sum(ventas_por_dia)
+    
+    # Popularidad sesgada: el producto en la posición k pesa 1 / (k + 1)
+    activos = list(productos)
+    rng.shuffle(activos)
+    acumulados = []
+    total = 0.0
+    for k in range(len(activos)):
+        total += 1.0 / (k + 1)
+        acumulados.append(total)
+    
+    # Entrada inicial: la demanda esperada de cada producto más un margen,
+    # para que ninguno quede en negativo (~2.6 renglones de ~1.8 piezas por venta)
+    existencias = {}
+    empleado_almacen = empleados[0]
+    unidades_esperadas = ventas * 2.6 * 1.8
+    _registrar_movimientos(cursor, 1, empleado_almacen, hoy - timedelta(days=dias + 1), {
+        producto_id: int(unidades_esperadas / (k + 1) / total * 1.5) + rng.randrange(5, 40)
+        for k, (producto_id, _) in enumerate(activos)
+    }, existencias)
+    
+    folio = 0
+    total_detalles = 0
+    for indice, cantidad_dia in enumerate(ventas_por_dia):
+        dia = hoy - timedelta(days=dias - indice)
+        momentos = sorted(_momento_de_venta(dia, rng) for _ in range(cantidad_dia))
+        encabezados = []
+        lineas_por_venta = []
+        vendidos_dia = {}
+        
+        for momento in momentos:
+            folio += 1
+            renglones = rng.choice([1, 1, 1, 2, 2, 3, 4, 6])
+            lineas = {}
+            for _ in range(renglones):
+                producto_id, precio = activos[min(len(activos) - 1, bisect.bisect_left(acumulados, rng.random() * total))]
+                lineas[producto_id] = (lineas.get(producto_id, (0, precio))[0] + rng.choice([1, 1, 1, 2, 4]), precio)
+            sub_total = round(sum(cantidad * precio for cantidad, precio in lineas.values()), 2)
+            impuestos = round(sub_total * IVA, 2)
+            credito = clientes and rng.random() < 0.12
+            total_neto = round(sub_total + impuestos, 2)
+            encabezados.append((
+                f"SEM-{folio:09d}", momento + timedelta(days=30) if credito else None,
+                total_neto if credito else 0, 0, momento, sub_total, impuestos, total_neto, 0,
+                0 if credito else total_neto, 0, 2 if credito else 1,
+                rng.choice(clientes) if credito or (clientes and rng.random() < 0.3) else None,
+                rng.choice(empleados), 1 if credito else rng.choice([1, 1, 2, 3, 4]),
+                Config.ESTATUS_ACTIVO
+            ))
+            lineas_por_venta.append(lineas)
+            for producto_id, (cantidad, _) in lineas.items():
+                vendidos_dia[producto_id] = vendidos_dia.get(producto_id, 0) + cantidad
+        
+        if not encabezados:
+            continue
+        venta_ids = _insertar(cursor, 'ventas', 'id_ventas', [
+            'folio', 'fecha_vencimiento_credito', 'saldo_pendiente', 'enganche', 'fecha_ventas',
+            'sub_total', 'impuestos', 'total_neto', 'descuentos', 'efectivo_recibido', 'cambio',
+            'fk_ventas_tipo', 'fk_cliente', 'fk_empleados', 'fk_metodo_pago', 'fk_estatus_general'
+        ], encabezados)
+        detalles = [
+            (cantidad, precio, 0, round(cantidad * precio, 2), producto_id, venta_id)
+            for venta_id, lineas in zip(venta_ids, lineas_por_venta)
+            for producto_id, (cantidad, precio) in lineas.items()
+        ]
+        cursor.executemany(
+            "INSERT INTO ventas_detalles (cantidad_productos, precio_unitario, descuentos, "
+            "importe_total, fk_productos, fk_ventas) VALUES (?, ?, ?, ?, ?, ?)",
+            detalles
+        )
+        _registrar_movimientos(cursor, 2, empleado_almacen, dia + timedelta(hours=21),
+                               vendidos_dia, existencias)
+        total_detalles += len(detalles)
+        if progreso:
+            progreso(folio, ventas)
+    
+    return folio, total_detalles, existencias
+
+def sembrar(productos=2000, clientes=500, empleados=20, ventas=100000, dias=90, semilla=None, progreso=None):
+    """Generar todo el conjunto de datos en una transacción; regresa un resumen"""
+    rng = random.Random(semilla)
+    inicio = time.perf_counter()
+    with DatabaseManager().transaction() as cursor:
+        lista_productos = generar_productos(cursor, productos, rng)
+        lista_empleados = generar_empleados(cursor, empleados, rng)
+        lista_clientes = generar_clientes(cursor, clientes, rng)
+        total_ventas, total_detalles, existencias = generar_ventas(
+            cursor, ventas, dias, lista_productos, lista_empleados, lista_clientes, rng, progreso
+        )
+        # Saldos materializados al día con el ledger recién generado
+        cursor.executemany(
+            "DELETE FROM productos_existencias WHERE fk_productos = ?",
+            [(producto_id,) for producto_id in existencias]
+        )
+        cursor.executemany(
+            "INSERT INTO productos_existencias (fk_productos, existencia, fecha_actualizacion) "
+            "VALUES (?, ?, GETDATE())",
+            sorted(existencias.items())
+        )
+    return {
+        'productos': len(lista_productos),
+        'empleados': len(lista_empleados),
+        'clientes': len(lista_clientes),
+        'ventas': total_ventas,
+        'ventas_detalles': total_detalles,
+        'segundos': round(time.perf_counter() - inicio, 2)
+    }
+
+def conteos():
+    """Renglones por tabla, para verificar la semilla"""
+    return {
+        tabla: execute_query(f"SELECT COUNT(*) as total FROM {tabla}", fetch=True)['total']
+        for tabla in ('productos', 'empleados', 'clientes', 'ventas', 'ventas_detalles',
+                      'movimiento', 'movimiento_detalles', 'productos_existencias')
+    }
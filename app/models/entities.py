@@ -19,6 +19,13 @@ class Producto:
         self.fk_estatus_general = fk_estatus_general
         self.fk_productos_imagenes = fk_productos_imagenes
     
+    @classmethod
+    def from_row(cls, row):
+        """Crear desde un renglón de la BD ignorando columnas extra de los joins"""
+        codigo = cls.__init__.__code__
+        campos = codigo.co_varnames[1:codigo.co_argcount]
+        return cls(**{campo: row[campo] for campo in campos if campo in row})
+    
     def to_dict(self):
         return {
             'id_productos': self.id_productos,
@@ -0,0 +1,74 @@
+import threading
+import time
+
+class ServidorDeteniendoseError(Exception):
+    """El servidor está drenando ventas para detenerse y no acepta nuevas"""
+
+class ControlApagado:
+    """Ventas en proceso y rechazo de ventas nuevas durante el apagado.
+    
+    Las peticiones de venta entran con venta(); al recibir SIGTERM el
+    servidor llama a iniciar() y espera con esperar() a que terminen las que
+    ya estaban adentro antes de cerrar el proceso.
+    """
+    
+    def __init__(self):
+        self._cond = threading.Condition()
+        self.en_curso = 0
+        self.drenando = False
+        self.rechazadas = 0
+    
+    def venta(self):
+        return _VentaEnCurso(self)
+    
+    def _entrar(self):
+        with self._cond:
+            if self.drenando:
+                self.rechazadas += 1
+                raise ServidorDeteniendoseError('El servidor se está deteniendo, intenta de nuevo en unos segundos')
+            self.en_curso += 1
+    
+    def _salir(self):
+        with self._cond:
+            self.en_curso -= 1
+            if self.en_curso == 0:
+                self._cond.notify_all()
+    
+    def iniciar(self):
+        """Dejar de aceptar ventas nuevas"""
+        with self._cond:
+            self.drenando = True
+    
+    def esperar(self, timeout):
+        """Esperar a que terminen las ventas en proceso; False si se agotó el tiempo"""
+        limite = time.monotonic() + timeout
+        with self._cond:
+            while self.en_curso:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    return False
+                self._cond.wait(restante)
+        return True
+    
+    def stats(self):
+        with self._cond:
+            return {
+                'drenando': self.drenando,
+                'en_curso': self.en_curso,
+                'rechazadas': self.rechazadas
+            }
+
+class _VentaEnCurso:
+    __slots__ = ('_control',)
+    
+    def __init__(self, control):
+        self._control = control
+    
+    def __enter__(self):
+        self._control._entrar()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self._control._salir()
+
+apagado = ControlApagado()
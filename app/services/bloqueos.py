@@ -0,0 +1,74 @@
+import threading
+import time
+from contextlib import contextmanager
+from config import Config
+
+class BloqueosPorProducto:
+    """Locks en franjas por id de producto para serializar ventas del mismo SKU.
+    
+    Dentro del proceso dos ventas del mismo producto esperan aquí en lugar
+    de hacerlo en la base con una conexión del pool ocupada. Las franjas se
+    toman siempre en orden ascendente, así dos tickets con productos
+    cruzados no pueden bloquearse mutuamente. Entre procesos la garantía la
+    da la lectura con UPDLOCK dentro de la transacción.
+    """
+    
+    def __init__(self, franjas):
+        self._locks = [threading.Lock() for _ in range(franjas)]
+        self._stats_lock = threading.Lock()
+        self.adquisiciones = 0
+        self.esperas = 0
+        self.tiempo_espera_total = 0.0
+    
+    def franjas(self, producto_ids):
+        # int(): el mismo producto puede llegar como '12' (JSON) o 12 (base) y debe caer en la misma franja
+        return sorted({int(producto_id) % len(self._locks) for producto_id in producto_ids})
+    
+    def adquirir(self, producto_ids):
+        """Tomar las franjas de los productos; regresa lo que hay que pasar a liberar()"""
+        indices = self.franjas(producto_ids)
+        espera = 0.0
+        esperas = 0
+        tomadas = []
+        try:
+            for indice in indices:
+                lock = self._locks[indice]
+                if not lock.acquire(blocking=False):
+                    inicio = time.perf_counter()
+                    lock.acquire()
+                    espera += time.perf_counter() - inicio
+                    esperas += 1
+                tomadas.append(indice)
+        except BaseException:
+            self.liberar(tomadas)
+            raise
+        
+        with self._stats_lock:
+            self.adquisiciones += 1
+            self.esperas += esperas
+            self.tiempo_espera_total += espera
+        return tomadas
+    
+    def liberar(self, indices):
+        for indice in reversed(indices):
+            self._locks[indice].release()
+    
+    @contextmanager
+    def bloquear(self, producto_ids):
+        indices = self.adquirir(producto_ids)
+        try:
+            yield
+        finally:
+            self.liberar(indices)
+    
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'franjas': len(self._locks),
+                'adquisiciones': self.adquisiciones,
+                'esperas': self.esperas,
+                'tiempo_espera_total': self.tiempo_espera_total,
+                'tiempo_espera_promedio': self.tiempo_espera_total / self.esperas if self.esperas else 0.0
+            }
+
+bloqueos_stock = BloqueosPorProducto(Config.STOCK_LOCK_FRANJAS)
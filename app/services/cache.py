@@ -0,0 +1,63 @@
+import threading
+import time
+
+class TTLCache:
+    """Caché en memoria con expiración por entrada y contadores de aciertos"""
+    
+    def __init__(self, ttl, nombre='cache'):
+        self.ttl = ttl
+        self.nombre = nombre
+        self._datos = {}  # llave -> (expira_en, valor)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalidaciones = 0
+    
+    def get(self, llave):
+        """Valor vigente o None"""
+        with self._lock:
+            entrada = self._datos.get(llave)
+            if entrada and (entrada[0] is None or entrada[0] > time.monotonic()):
+                self._hits += 1
+                return entrada[1]
+            if entrada:
+                del self._datos[llave]
+            self._misses += 1
+            return None
+    
+    def set(self, llave, valor, ttl=None):
+        """Guardar un valor; ttl=0 lo guarda sin expiración"""
+        ttl = self.ttl if ttl is None else ttl
+        expira_en = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._datos[llave] = (expira_en, valor)
+    
+    def get_or_load(self, llave, cargar, ttl=None):
+        """Leer de la caché o ejecutar cargar() y guardar su resultado"""
+        valor = self.get(llave)
+        if valor is None:
+            valor = cargar()
+            self.set(llave, valor, ttl)
+        return valor
+    
+    def invalidate(self, llave=None):
+        """Eliminar una llave o, sin argumento, toda la caché"""
+        with self._lock:
+            if llave is None:
+                self._invalidaciones += len(self._datos)
+                self._datos.clear()
+            elif self._datos.pop(llave, None) is not None:
+                self._invalidaciones += 1
+    
+    def stats(self):
+        with self._lock:
+            consultas = self._hits + self._misses
+            return {
+                'nombre': self.nombre,
+                'entradas': len(self._datos),
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': self._hits / consultas if consultas else 0.0,
+                'invalidaciones': self._invalidaciones,
+                'ttl': self.ttl
+            }
@@ -0,0 +1,83 @@
+from app.database.db_connection import execute_query
+from app.services.cache import TTLCache
+from config import Config
+
+# Catálogos pequeños y casi estáticos: tabla -> (llave primaria, columna de nombre)
+CATALOGOS = {
+    'metodo_pago': ('id_metodo_pago', 'forma_pago'),
+    'ventas_tipo': ('id_ventas_tipo', 'tipo_ventas'),
+    'estatus_general': ('id_estatus_general', 'nombre'),
+    'marcas': ('id_marcas', 'nombre_marca'),
+    'categorias': ('id_categorias', 'nombre'),
+    'unidades_medida': ('id_unidades_medida', 'nombre_unidad_medida'),
+    'usuarios_tipos': ('id_usuario_tipo', 'nombre'),
+    'proveedor_categorias': ('id_proveedor_categoria', 'nombre')
+}
+
+_cache = TTLCache(Config.CATALOGO_CACHE_TTL, nombre='catalogos')
+
+class CatalogoService:
+    """Caché de lectura para las tablas de catálogo.
+    
+    Las tablas se leen completas una vez por TTL y se indexan por llave
+    primaria, así los servicios resuelven nombres sin hacer JOIN.
+    """
+    
+    @staticmethod
+    def _cargar(catalogo):
+        if catalogo not in CATALOGOS:
+            raise KeyError(f"Catálogo desconocido: {catalogo}")
+        llave, _ = CATALOGOS[catalogo]
+        rows = execute_query(f"SELECT * FROM {catalogo}", fetch_all=True) or []
+        return {
+            'rows': rows,
+            'por_id': {row[llave]: row for row in rows}
+        }
+    
+    @staticmethod
+    def _obtener(catalogo):
+        return _cache.get_or_load(catalogo, lambda: CatalogoService._cargar(catalogo))
+    
+    @staticmethod
+    def obtener(catalogo, solo_activos=False):
+        """Renglones del catálogo, opcionalmente solo los de estatus activo"""
+        rows = CatalogoService._obtener(catalogo)['rows']
+        if solo_activos:
+            return [row for row in rows if row.get('fk_estatus_general') == Config.ESTATUS_ACTIVO]
+        return list(rows)
+    
+    @staticmethod
+    def por_id(catalogo, registro_id):
+        """Renglón del catálogo por llave primaria"""
+        if registro_id is None:
+            return None
+        return CatalogoService._obtener(catalogo)['por_id'].get(registro_id)
+    
+    @staticmethod
+    def nombre(catalogo, registro_id):
+        """Nombre legible de un registro del catálogo"""
+        row = CatalogoService.por_id(catalogo, registro_id)
+        return row.get(CATALOGOS[catalogo][1]) if row else None
+    
+    @staticmethod
+    def resolver_nombres(rows, columnas):
+        """Agregar nombres a cada renglón: columnas = {alias: (catálogo, columna fk)}"""
+        # Un solo acceso a la caché por catálogo, no por renglón
+        indices = {
+            alias: (CatalogoService._obtener(catalogo)['por_id'], fk, CATALOGOS[catalogo][1])
+            for alias, (catalogo, fk) in columnas.items()
+        }
+        for row in rows:
+            for alias, (por_id, fk, columna_nombre) in indices.items():
+                registro = por_id.get(row.get(fk))
+                row[alias] = registro.get(columna_nombre) if registro else None
+        return rows
+    
+    @staticmethod
+    def invalidar(catalogo=None):
+        """Forzar la recarga de un catálogo o de todos"""
+        _cache.invalidate(catalogo)
+    
+    @staticmethod
+    def estadisticas():
+        return _cache.stats()
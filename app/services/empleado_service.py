@@ -1,57 +1,74 @@
 from app.database.db_connection import execute_query
+from app.database.paginacion import consulta_paginada
+from app.services.catalogo_service import CatalogoService
 from config import Config
 
+# Columnas y joins comunes de los listados de empleados; los nombres de
+# catálogo (estatus, tipo de usuario) se resuelven desde la caché
+EMPLEADO_COLUMNAS = """
+e.*, 
+t.telefono,
+co.correo_electronico,
+d.calle, d.colonia, d.ciudad, d.estado, d.codigo_postal,
+u.id_usuarios,
+u.fk_usuario_tipo
+"""
+EMPLEADO_ORIGEN = """
+empleados e
+LEFT JOIN telefonos t ON e.fk_telefonos = t.id_telefono
+LEFT JOIN correos_electronicos co ON e.fk_correo_electronico = co.id_correo_electronico
+LEFT JOIN direccion d ON e.fk_direccion = d.id_direccion
+LEFT JOIN usuarios u ON e.fk_usuario = u.id_usuarios
+"""
+EMPLEADO_NOMBRES = {
+    'estatus_nombre': ('estatus_general', 'fk_estatus_general'),
+    'tipo_usuario': ('usuarios_tipos', 'fk_usuario_tipo')
+}
+VENTA_NOMBRES = {
+    'forma_pago': ('metodo_pago', 'fk_metodo_pago'),
+    'tipo_ventas': ('ventas_tipo', 'fk_ventas_tipo')
+}
+
 class EmpleadoService:
     
     @staticmethod
     def obtener_empleados_activos():
         """Obtener todos los empleados activos"""
         try:
-            query = """
-            SELECT e.*, 
-                   est.nombre as estatus_nombre,
-                   t.telefono,
-                   co.correo_electronico,
-                   d.calle, d.colonia, d.ciudad, d.estado, d.codigo_postal,
-                   u.id_usuarios,
-                   ut.nombre as tipo_usuario
-            FROM empleados e
-            LEFT JOIN estatus_general est ON e.fk_estatus_general = est.id_estatus_general
-            LEFT JOIN telefonos t ON e.fk_telefonos = t.id_telefono
-            LEFT JOIN correos_electronicos co ON e.fk_correo_electronico = co.id_correo_electronico
-            LEFT JOIN direccion d ON e.fk_direccion = d.id_direccion
-            LEFT JOIN usuarios u ON e.fk_usuario = u.id_usuarios
-            LEFT JOIN usuarios_tipos ut ON u.fk_usuario_tipo = ut.id_usuario_tipo
+            query = f"""
+            SELECT {EMPLEADO_COLUMNAS}
+            FROM {EMPLEADO_ORIGEN}
             WHERE e.fk_estatus_general = ?
             ORDER BY e.nombre, e.apellido_1
             """
-            return execute_query(query, (Config.ESTATUS_ACTIVO,), fetch_all=True)
+            empleados = execute_query(query, (Config.ESTATUS_ACTIVO,), fetch_all=True) or []
+            return CatalogoService.resolver_nombres(empleados, EMPLEADO_NOMBRES)
         except Exception as e:
             print(f"[EMPLEADO] Error obteniendo empleados: {e}")
             return []
     
+    @staticmethod
+    def listar_empleados_activos(limite, cursor=None, incluir_total=False):
+        """Página de empleados activos ordenados por nombre"""
+        empleados, pagina = consulta_paginada(
+            EMPLEADO_COLUMNAS, EMPLEADO_ORIGEN,
+            ['e.fk_estatus_general = ?'], [Config.ESTATUS_ACTIVO],
+            [('e.nombre', 'nombre'), ('e.apellido_1', 'apellido_1'), ('e.id_empleados', 'id_empleados')],
+            limite, cursor, incluir_total=incluir_total
+        )
+        return CatalogoService.resolver_nombres(empleados, EMPLEADO_NOMBRES), pagina
+    
     @staticmethod
     def obtener_empleado_por_id(empleado_id):
         """Obtener empleado por ID"""
         try:
-            query = """
-            SELECT e.*, 
-                   est.nombre as estatus_nombre,
-                   t.telefono,
-                   co.correo_electronico,
-                   d.calle, d.colonia, d.ciudad, d.estado, d.codigo_postal,
-                   u.id_usuarios,
-                   ut.nombre as tipo_usuario
-            FROM empleados e
-            LEFT JOIN estatus_general est ON e.fk_estatus_general = est.id_estatus_general
-            LEFT JOIN telefonos t ON e.fk_telefonos = t.id_telefono
-            LEFT JOIN correos_electronicos co ON e.fk_correo_electronico = co.id_correo_electronico
-            LEFT JOIN direccion d ON e.fk_direccion = d.id_direccion
-            LEFT JOIN usuarios u ON e.fk_usuario = u.id_usuarios
-            LEFT JOIN usuarios_tipos ut ON u.fk_usuario_tipo = ut.id_usuario_tipo
+            query = f"""
+            SELECT {EMPLEADO_COLUMNAS}
+            FROM {EMPLEADO_ORIGEN}
             WHERE e.id_empleados = ? AND e.fk_estatus_general = ?
             """
-            return execute_query(query, (empleado_id, Config.ESTATUS_ACTIVO), fetch=True)
+            empleado = execute_query(query, (empleado_id, Config.ESTATUS_ACTIVO), fetch=True)
+            return CatalogoService.resolver_nombres([empleado], EMPLEADO_NOMBRES)[0] if empleado else None
         except Exception as e:
             print(f"[EMPLEADO] Error obteniendo empleado: {e}")
             return None
@@ -128,13 +145,9 @@ class EmpleadoService:
         try:
             query = """
             SELECT v.*, 
-                   c.nombre as cliente_nombre,
-                   mp.forma_pago,
-                   vt.tipo_ventas
+                   c.nombre as cliente_nombre
             FROM ventas v
             LEFT JOIN clientes c ON v.fk_cliente = c.id_clientes
-            LEFT JOIN metodo_pago mp ON v.fk_metodo_pago = mp.id_metodo_pago
-            LEFT JOIN ventas_tipo vt ON v.fk_ventas_tipo = vt.id_ventas_tipo
             WHERE v.fk_empleados = ? AND v.fk_estatus_general = ?
             """
             params = [empleado_id, Config.ESTATUS_ACTIVO]
@@ -145,7 +158,28 @@ class EmpleadoService:
             
             query += " ORDER BY v.fecha_ventas DESC"
             
-            return execute_query(query, tuple(params), fetch_all=True)
+            ventas = execute_query(query, tuple(params), fetch_all=True) or []
+            return CatalogoService.resolver_nombres(ventas, VENTA_NOMBRES)
         except Exception as e:
             print(f"[EMPLEADO] Error obteniendo ventas: {e}")
-            return []
\ No newline at end of file
+            return []
+    
+    @staticmethod
+    def listar_ventas_empleado(empleado_id, limite, cursor=None, fecha_inicio=None,
+                               fecha_fin=None, incluir_total=False):
+        """Página de ventas de un empleado, más recientes primero"""
+        condiciones = ['v.fk_empleados = ?', 'v.fk_estatus_general = ?']
+        params = [empleado_id, Config.ESTATUS_ACTIVO]
+        
+        if fecha_inicio and fecha_fin:
+            condiciones.append('v.fecha_ventas BETWEEN ? AND ?')
+            params.extend([fecha_inicio, fecha_fin])
+        
+        ventas, pagina = consulta_paginada(
+            "v.*, c.nombre as cliente_nombre",
+            "ventas v LEFT JOIN clientes c ON v.fk_cliente = c.id_clientes",
+            condiciones, params,
+            [('v.fecha_ventas', 'fecha_ventas'), ('v.id_ventas', 'id_ventas')],
+            limite, cursor, descendente=True, incluir_total=incluir_total
+        )
+        return CatalogoService.resolver_nombres(ventas, VENTA_NOMBRES), pagina
\ No newline at end of file
@@ -0,0 +1,163 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from config import Config
+
+# Eventos que reparte NotificationServer; el nombre es el del evento de Socket.IO
+EVENTO_STOCK = 'stock_updated'
+EVENTO_VENTA = 'sale_processed'
+EVENTO_PRODUCTO = 'product_created'
+EVENTO_STOCK_BAJO = 'low_stock_warning'
+EVENTO_STOCK_RECUPERADO = 'low_stock_cleared'
+
+class BusEventos:
+    """Eventos de cambio publicados por los servicios, en el mismo proceso.
+    
+    Los servicios publican después del commit y NotificationServer los toma
+    en lotes cada `ventana` segundos. Dos eventos con la misma llave dentro
+    de una ventana se combinan en uno (los campos del último ganan): diez
+    ventas seguidas del mismo producto salen como un solo stock_updated con
+    la existencia final.
+    
+    Sin un consumidor conectado (manage.py, scripts) publicar no hace nada.
+    Si el consumidor se atrasa, los eventos más viejos se descartan al
+    llegar a `max_pendientes`.
+    """
+    
+    def __init__(self, ventana, max_pendientes):
+        self.ventana = ventana
+        self.max_pendientes = max_pendientes
+        self._pendientes = OrderedDict()  # (evento, llave) -> datos
+        self._cond = threading.Condition()
+        self.activo = False
+        self.publicados = 0
+        self.combinados = 0
+        self.entregados = 0
+        self.descartados = 0
+    
+    def iniciar(self):
+        """Marcar que hay un consumidor; antes de esto los eventos se ignoran"""
+        with self._cond:
+            self.activo = True
+    
+    def publicar(self, evento, llave, datos):
+        with self._cond:
+            if not self.activo:
+                return
+            self.publicados += 1
+            pendiente = self._pendientes.get((evento, llave))
+            if pendiente is not None:
+                pendiente.update(datos)
+                pendiente['coalesced'] += 1
+                self.combinados += 1
+                return
+            if len(self._pendientes) >= self.max_pendientes:
+                self._pendientes.popitem(last=False)
+                self.descartados += 1
+            self._pendientes[(evento, llave)] = dict(datos, coalesced=1)
+            self._cond.notify()
+    
+    def tomar(self, timeout=None):
+        """Esperar el primer evento, dejar pasar la ventana y regresar el lote.
+        
+        Regresa una lista de (evento, datos) en orden de llegada; vacía si se
+        agotó `timeout` sin eventos.
+        """
+        with self._cond:
+            if not self._pendientes and not self._cond.wait_for(lambda: self._pendientes, timeout):
+                return []
+        # Fuera del lock: los servicios siguen publicando y combinando
+        time.sleep(self.ventana)
+        with self._cond:
+            lote = [(evento, datos) for (evento, _), datos in self._pendientes.items()]
+            self._pendientes.clear()
+            self.entregados += len(lote)
+        return lote
+    
+    def stats(self):
+        with self._cond:
+            return {
+                'activo': self.activo,
+                'ventana_ms': round(self.ventana * 1000),
+                'pendientes': len(self._pendientes),
+                'publicados': self.publicados,
+                'combinados': self.combinados,
+                'entregados': self.entregados,
+                'descartados': self.descartados
+            }
+    
+    # Eventos de los servicios
+    
+    def stock(self, existencias, motivo=''):
+        """Existencia nueva de cada producto: {producto_id: existencia}"""
+        for producto_id, existencia in existencias.items():
+            self.publicar(EVENTO_STOCK, producto_id, {
+                'product_id': producto_id,
+                'new_stock': existencia,
+                'reason': motivo,
+                'timestamp': _ahora()
+            })
+    
+    def venta(self, venta_id, folio, total, terminal=None, cliente='N/A'):
+        self.publicar(EVENTO_VENTA, venta_id, {
+            'sale_id': venta_id,
+            'folio': folio,
+            'total': total,
+            'terminal': terminal,
+            'client_name': cliente,
+            'timestamp': _ahora(),
+            'message': f'Nueva venta procesada: ${total}'
+        })
+    
+    def ticket(self, ticket):
+        """Resultado de una venta asíncrona; se combina con el evento de la venta"""
+        resultado = ticket.get('resultado') or {}
+        data = resultado.get('data') or {}
+        total = (data.get('totales') or {}).get('total_neto')
+        # Las rechazadas no tienen venta: su llave es el ticket
+        llave = data.get('id_ventas') or f"ticket:{ticket['ticket']}"
+        self.publicar(EVENTO_VENTA, llave, {
+            'ticket': ticket['ticket'],
+            'estado': ticket['estado'],
+            'success': resultado.get('success', False),
+            'sale_id': data.get('id_ventas'),
+            'folio': data.get('folio'),
+            'total': total,
+            'error': resultado.get('error'),
+            'timestamp': _ahora(),
+            'message': f'Nueva venta procesada: ${total}' if resultado.get('success') else 'Venta rechazada'
+        })
+    
+    def producto(self, producto_id, nombre):
+        self.publicar(EVENTO_PRODUCTO, producto_id, {
+            'product_id': producto_id,
+            'product_name': nombre,
+            'timestamp': _ahora(),
+            'message': f'Nuevo producto: {nombre}'
+        })
+    
+    def stock_bajo(self, producto_id, nombre, existencia, minimo):
+        self.publicar(EVENTO_STOCK_BAJO, producto_id, {
+            'product_id': producto_id,
+            'product_name': nombre,
+            'current_stock': existencia,
+            'min_stock': minimo,
+            'timestamp': _ahora(),
+            'message': f'Stock bajo: {nombre} ({existencia} unidades)'
+        })
+    
+    def stock_recuperado(self, producto_id, nombre, existencia, minimo):
+        self.publicar(EVENTO_STOCK_RECUPERADO, producto_id, {
+            'product_id': producto_id,
+            'product_name': nombre,
+            'current_stock': existencia,
+            'min_stock': minimo,
+            'timestamp': _ahora(),
+            'message': f'Stock recuperado: {nombre}'
+        })
+
+def _ahora():
+    return datetime.now().isoformat()
+
+eventos = BusEventos(Config.EVENTOS_VENTANA_MS / 1000, Config.EVENTOS_MAX_PENDIENTES)
@@ -0,0 +1,322 @@
+import threading
+from app.database.db_connection import DatabaseManager, execute_query
+from config import Config
+
+# Tipos de movimiento (tabla movimiento_tipo)
+MOVIMIENTO_ENTRADA = 1
+MOVIMIENTO_SALIDA = 2
+MOVIMIENTO_AJUSTE = 3
+
+# Efecto con signo de un renglón de movimiento_detalles sobre la existencia.
+# Los ajustes guardan la cantidad en valor absoluto, el signo sale de la
+# diferencia entre existencia nueva y anterior.
+CANTIDAD_NETA_SQL = """
+    CASE m.fk_movimiento_tipo
+        WHEN 1 THEN md.cantidad
+        WHEN 2 THEN -md.cantidad
+        WHEN 3 THEN md.existencia_nueva - md.existencia_anterior
+        ELSE 0
+    END
+"""
+
+_tabla_lista = False
+_tabla_lock = threading.Lock()
+
+class ExistenciasService:
+    """Saldo materializado por producto (tabla productos_existencias).
+    
+    Cada inserción en movimiento_detalles actualiza el saldo en la misma
+    transacción, así las lecturas de stock son una búsqueda por llave en lugar
+    de sumar todo el historial de movimientos.
+    
+    La tabla se crea la primera vez que se usa y en ese momento se llena
+    desde el ledger para todos los productos sin renglón. Después de eso un
+    producto sin renglón no tiene movimientos (todo movimiento pasa por
+    leer_existencias), así las lecturas con LEFT JOIN pueden tomarlo como 0.
+    """
+    
+    CREAR_TABLA_QUERY = """
+    IF OBJECT_ID('dbo.productos_existencias', 'U') IS NULL
+    CREATE TABLE dbo.productos_existencias (
+        fk_productos INT NOT NULL PRIMARY KEY,
+        existencia INT NOT NULL DEFAULT 0,
+        fecha_actualizacion DATETIME NOT NULL DEFAULT GETDATE()
+    )
+    """
+    
+    @staticmethod
+    def asegurar_tabla():
+        """Crear la tabla si no existe y llenar los productos sin saldo; una vez por proceso"""
+        global _tabla_lista
+        if _tabla_lista:
+            return
+        with _tabla_lock:
+            if _tabla_lista:
+                return
+            for intento in range(2):
+                try:
+                    with DatabaseManager().transaction() as cursor:
+                        cursor.execute(ExistenciasService.CREAR_TABLA_QUERY)
+                        llenados = ExistenciasService._llenar_faltantes(cursor)
+                    break
+                except Exception:
+                    # Otro proceso insertó los mismos saldos al mismo tiempo: repetir
+                    if intento:
+                        raise
+            _tabla_lista = True
+        if llenados:
+            print(f"[EXISTENCIAS] Saldos calculados desde el ledger: {llenados} productos")
+    
+    @staticmethod
+    def _llenar_faltantes(cursor):
+        cursor.execute(
+            "SELECT p.id_productos FROM productos p "
+            "LEFT JOIN productos_existencias pe ON pe.fk_productos = p.id_productos "
+            "WHERE pe.fk_productos IS NULL"
+        )
+        faltantes = [row[0] for row in cursor.fetchall()]
+        for inicio in range(0, len(faltantes), 1000):
+            bloque = faltantes[inicio:inicio + 1000]
+            calculadas = ExistenciasService._calcular_desde_ledger(cursor, bloque)
+            cursor.executemany(
+                "INSERT INTO productos_existencias (fk_productos, existencia, fecha_actualizacion) "
+                "VALUES (?, ?, GETDATE())",
+                [(producto_id, calculadas.get(producto_id, 0)) for producto_id in bloque]
+            )
+        return len(faltantes)
+    
+    @staticmethod
+    def obtener_existencia(producto_id):
+        """Obtener la existencia actual de un producto"""
+        ExistenciasService.asegurar_tabla()
+        result = execute_query(
+            "SELECT existencia FROM productos_existencias WHERE fk_productos = ?",
+            (producto_id,), fetch=True
+        )
+        if result:
+            return result['existencia']
+        
+        # Producto sin saldo materializado todavía: calcularlo del ledger y guardarlo
+        with DatabaseManager().transaction() as cursor:
+            return ExistenciasService.leer_existencias(cursor, [producto_id])[producto_id]
+    
+    @staticmethod
+    def existencias_activas(producto_ids=None):
+        """Existencia de los productos activos: {producto_id: existencia}; todos sin producto_ids"""
+        ExistenciasService.asegurar_tabla()
+        query = """
+            SELECT p.id_productos, COALESCE(pe.existencia, 0) as existencia
+            FROM productos p
+            LEFT JOIN productos_existencias pe ON pe.fk_productos = p.id_productos
+            WHERE p.fk_estatus_general = ?
+        """
+        params = [Config.ESTATUS_ACTIVO]
+        if producto_ids is not None:
+            ids = sorted(set(producto_ids))
+            if not ids:
+                return {}
+            query += f" AND p.id_productos IN ({', '.join('?' for _ in ids)})"
+            params += ids
+        rows = execute_query(query, params, fetch_all=True) or []
+        return {row['id_productos']: row['existencia'] for row in rows}
+    
+    @staticmethod
+    def leer_existencias(cursor, producto_ids, bloquear=False):
+        """Leer saldos dentro de una transacción, creando los que falten.
+        
+        Con bloquear=True los renglones quedan con UPDLOCK hasta el commit:
+        otra transacción que quiera descontar los mismos productos espera a
+        que ésta termine y después lee el saldo ya actualizado. HOLDLOCK
+        cubre también los productos sin renglón, para que dos transacciones
+        no los creen a la vez.
+        """
+        ids = sorted(set(producto_ids))
+        if not ids:
+            return {}
+        # Normalmente ya se hizo al iniciar; en otra conexión, antes de tomar locks
+        ExistenciasService.asegurar_tabla()
+        
+        placeholders = ', '.join('?' for _ in ids)
+        hint = " WITH (UPDLOCK, HOLDLOCK)" if bloquear else ""
+        cursor.execute(
+            f"SELECT fk_productos, existencia FROM productos_existencias{hint} "
+            f"WHERE fk_productos IN ({placeholders}) "
+            f"ORDER BY fk_productos",
+            ids
+        )
+        existencias = {row[0]: row[1] for row in cursor.fetchall()}
+        
+        faltantes = [producto_id for producto_id in ids if producto_id not in existencias]
+        if faltantes:
+            calculadas = ExistenciasService._calcular_desde_ledger(cursor, faltantes)
+            cursor.executemany(
+                "INSERT INTO productos_existencias (fk_productos, existencia, fecha_actualizacion) "
+                "VALUES (?, ?, GETDATE())",
+                [(producto_id, calculadas.get(producto_id, 0)) for producto_id in faltantes]
+            )
+            for producto_id in faltantes:
+                existencias[producto_id] = calculadas.get(producto_id, 0)
+        
+        return existencias
+    
+    @staticmethod
+    def aplicar_movimientos(cursor, cambios):
+        """Sumar cantidades netas [(producto_id, cantidad_neta)] a los saldos"""
+        if not cambios:
+            return
+        cursor.executemany(
+            "UPDATE productos_existencias "
+            "SET existencia = existencia + ?, fecha_actualizacion = GETDATE() "
+            "WHERE fk_productos = ?",
+            [(cantidad_neta, producto_id) for producto_id, cantidad_neta in cambios]
+        )
+    
+    @staticmethod
+    def registrar_movimiento(cursor, producto_id, empleado_id, tipo_movimiento,
+                             cantidad, existencia_anterior, existencia_nueva):
+        """Insertar movimiento + detalle y actualizar el saldo en la misma transacción"""
+        return ExistenciasService.registrar_movimientos(
+            cursor, empleado_id, tipo_movimiento,
+            [(producto_id, existencia_nueva - existencia_anterior)],
+            {producto_id: existencia_anterior}
+        )[0]
+    
+    @staticmethod
+    def registrar_movimientos(cursor, empleado_id, tipo_movimiento, renglones, existencias):
+        """Registrar varios movimientos con un número fijo de viajes a la base de datos.
+        
+        renglones es una lista de (producto_id, cantidad_neta) y existencias el
+        saldo previo de cada producto, leído en la misma transacción. Devuelve
+        los id_movimiento en el orden de los renglones.
+        """
+        if not renglones:
+            return []
+        
+        movimiento_ids = ExistenciasService._insertar_movimientos(
+            cursor, tipo_movimiento, [producto_id for producto_id, _ in renglones]
+        )
+        
+        # Existencia anterior/nueva acumulada renglón por renglón
+        saldos = dict(existencias)
+        detalles = []
+        for (producto_id, cantidad_neta), movimiento_id in zip(renglones, movimiento_ids):
+            existencia_anterior = saldos[producto_id]
+            existencia_nueva = existencia_anterior + cantidad_neta
+            saldos[producto_id] = existencia_nueva
+            detalles.append((
+                producto_id, empleado_id, abs(cantidad_neta),
+                existencia_anterior, existencia_nueva, movimiento_id
+            ))
+        
+        cursor.executemany(
+            """
+            INSERT INTO movimiento_detalles (
+                fk_productos, fk_empleados, cantidad, existencia_anterior,
+                existencia_nueva, fecha_movimiento, fk_movimiento
+            )
+            VALUES (?, ?, ?, ?, ?, GETDATE(), ?)
+            """,
+            detalles
+        )
+        
+        ExistenciasService.aplicar_movimientos(cursor, [
+            (producto_id, saldos[producto_id] - existencias[producto_id])
+            for producto_id in sorted(saldos)
+            if saldos[producto_id] != existencias[producto_id]
+        ])
+        return movimiento_ids
+    
+    @staticmethod
+    def _insertar_movimientos(cursor, tipo_movimiento, producto_ids):
+        """INSERT multi-renglón en movimiento con OUTPUT de los ids generados"""
+        pendientes = {}
+        # Hasta 1000 renglones por VALUES (límite de SQL Server)
+        for inicio in range(0, len(producto_ids), 1000):
+            bloque = producto_ids[inicio:inicio + 1000]
+            params = []
+            for producto_id in bloque:
+                params.extend((tipo_movimiento, producto_id))
+            cursor.execute(
+                f"""
+                INSERT INTO movimiento (fk_movimiento_tipo, fk_producto)
+                OUTPUT INSERTED.id_movimiento, INSERTED.fk_producto
+                VALUES {', '.join('(?, ?)' for _ in bloque)}
+                """,
+                params
+            )
+            for movimiento_id, producto_id in sorted(cursor.fetchall()):
+                pendientes.setdefault(producto_id, []).append(movimiento_id)
+        
+        # OUTPUT no garantiza el orden de VALUES; se reparten por producto
+        for ids in pendientes.values():
+            ids.reverse()
+        return [pendientes[producto_id].pop() for producto_id in producto_ids]
+    
+    @staticmethod
+    def _calcular_desde_ledger(cursor, producto_ids=None):
+        """Recalcular saldos sumando movimiento_detalles en una sola pasada agrupada"""
+        query = f"""
+        SELECT md.fk_productos, SUM({CANTIDAD_NETA_SQL}) as existencia
+        FROM movimiento_detalles md
+        INNER JOIN movimiento m ON md.fk_movimiento = m.id_movimiento
+        """
+        params = []
+        if producto_ids is not None:
+            query += f" WHERE md.fk_productos IN ({', '.join('?' for _ in producto_ids)})"
+            params.extend(producto_ids)
+        query += " GROUP BY md.fk_productos"
+        
+        cursor.execute(query, params)
+        return {row[0]: row[1] or 0 for row in cursor.fetchall()}
+    
+    @staticmethod
+    def verificar(reparar=False):
+        """Comparar los saldos materializados contra el ledger y reportar diferencias.
+        
+        Con reparar=True los saldos se reescriben con el valor del ledger.
+        La tabla queda bloqueada (TABLOCKX) antes de leer el ledger: una venta
+        que confirme entre las dos lecturas reportaría una diferencia falsa y
+        la reparación la pisaría con el saldo viejo. Mientras tanto las ventas
+        y movimientos esperan.
+        """
+        ExistenciasService.asegurar_tabla()
+        with DatabaseManager().transaction() as cursor:
+            cursor.execute("SELECT fk_productos, existencia FROM productos_existencias WITH (TABLOCKX, HOLDLOCK)")
+            materializadas = {row[0]: row[1] for row in cursor.fetchall()}
+            ledger = ExistenciasService._calcular_desde_ledger(cursor)
+            
+            diferencias = []
+            for producto_id in sorted(set(ledger) | set(materializadas)):
+                esperado = ledger.get(producto_id, 0)
+                actual = materializadas.get(producto_id)
+                if actual != esperado:
+                    diferencias.append({
+                        'fk_productos': producto_id,
+                        'existencia_tabla': actual,
+                        'existencia_ledger': esperado,
+                        'diferencia': None if actual is None else actual - esperado
+                    })
+            
+            if reparar and diferencias:
+                faltantes = [d for d in diferencias if d['existencia_tabla'] is None]
+                desfasadas = [d for d in diferencias if d['existencia_tabla'] is not None]
+                if desfasadas:
+                    cursor.executemany(
+                        "UPDATE productos_existencias "
+                        "SET existencia = ?, fecha_actualizacion = GETDATE() "
+                        "WHERE fk_productos = ?",
+                        [(d['existencia_ledger'], d['fk_productos']) for d in desfasadas]
+                    )
+                if faltantes:
+                    cursor.executemany(
+                        "INSERT INTO productos_existencias (fk_productos, existencia, fecha_actualizacion) "
+                        "VALUES (?, ?, GETDATE())",
+                        [(d['fk_productos'], d['existencia_ledger']) for d in faltantes]
+                    )
+        
+        return {
+            'productos_revisados': len(set(ledger) | set(materializadas)),
+            'productos_con_diferencia': len(diferencias),
+            'reparado': bool(reparar and diferencias),
+            'diferencias': diferencias
+        }
@@ -0,0 +1,201 @@
+import re
+import threading
+from app.database.db_connection import DatabaseManager, execute_query
+from config import Config
+
+SERIE_PATRON = re.compile(r'^[A-Za-z0-9]{1,10}$')
+
+CREAR_TABLA_QUERY = """
+IF OBJECT_ID('dbo.folios_series', 'U') IS NULL
+CREATE TABLE dbo.folios_series (
+    serie VARCHAR(30) NOT NULL PRIMARY KEY,
+    siguiente BIGINT NOT NULL,
+    fecha_actualizacion DATETIME NOT NULL DEFAULT GETDATE()
+)
+"""
+
+_tabla_lista = False
+
+def reservar_bloque_bd(serie, cantidad):
+    """Apartar `cantidad` folios consecutivos de la serie; regresa el primero.
+    
+    El UPDATE incrementa el contador y devuelve el nuevo valor en un solo
+    viaje; la fila de la serie se crea la primera vez que se usa.
+    """
+    global _tabla_lista
+    for intento in range(2):
+        try:
+            with DatabaseManager().transaction() as cursor:
+                if not _tabla_lista:
+                    cursor.execute(CREAR_TABLA_QUERY)
+                cursor.execute("""
+                UPDATE folios_series
+                SET siguiente = siguiente + ?, fecha_actualizacion = GETDATE()
+                OUTPUT INSERTED.siguiente
+                WHERE serie = ?
+                """, (cantidad, serie))
+                row = cursor.fetchone()
+                if row is None:
+                    cursor.execute(
+                        "INSERT INTO folios_series (serie, siguiente, fecha_actualizacion) VALUES (?, ?, GETDATE())",
+                        (serie, 1 + cantidad)
+                    )
+                    inicio = 1
+                else:
+                    inicio = row[0] - cantidad
+            _tabla_lista = True
+            return inicio
+        except DatabaseManager().backend.error_integridad:
+            # Otro proceso creó la serie al mismo tiempo (llave duplicada): repetir
+            # el UPDATE. Cualquier otro error (timeout, conexión) sale sin reintento
+            if intento:
+                raise
+
+class _SerieFolios:
+    """Bloque vigente y contadores de una serie"""
+    __slots__ = ('lock', 'siguiente', 'fin', 'bloques', 'reservados', 'entregados', 'descartados', 'devueltos')
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.siguiente = 1
+        self.fin = 0  # sin bloque: siguiente > fin
+        self.bloques = 0
+        self.reservados = 0
+        self.entregados = 0
+        self.descartados = 0
+        self.devueltos = 0
+
+class FolioAllocator:
+    """Folios monótonos por sucursal y terminal: VTA-<sucursal>-<terminal>-<número>.
+    
+    Cada serie aparta bloques de `tamano_bloque` números en folios_series y
+    los entrega desde memoria, así solo una venta de cada bloque hace un
+    viaje extra a la base. Los números apartados que no llegan a usarse
+    (ventas revertidas, reinicio del proceso) quedan como huecos; los
+    contadores permiten medirlos.
+    """
+    
+    def __init__(self, sucursal, tamano_bloque, reservar=None):
+        self.sucursal = sucursal
+        self.tamano_bloque = tamano_bloque
+        self._reservar = reservar or reservar_bloque_bd
+        self._series = {}
+        self._lock = threading.Lock()
+    
+    def serie(self, terminal=None):
+        terminal = str(terminal or Config.FOLIO_TERMINAL)
+        if not SERIE_PATRON.match(terminal):
+            raise ValueError(f"Terminal inválida para folio: {terminal}")
+        return f"VTA-{self.sucursal}-{terminal}"
+    
+    def _estado(self, serie):
+        estado = self._series.get(serie)
+        if estado is None:
+            with self._lock:
+                estado = self._series.setdefault(serie, _SerieFolios())
+        return estado
+    
+    def siguiente(self, terminal=None):
+        """Siguiente folio de la terminal"""
+        serie = self.serie(terminal)
+        estado = self._estado(serie)
+        with estado.lock:
+            if estado.siguiente > estado.fin:
+                inicio = self._reservar(serie, self.tamano_bloque)
+                estado.siguiente = inicio
+                estado.fin = inicio + self.tamano_bloque - 1
+                estado.bloques += 1
+                estado.reservados += self.tamano_bloque
+            numero = estado.siguiente
+            estado.siguiente += 1
+            estado.entregados += 1
+        return f"{serie}-{numero:06d}"
+    
+    def descartar(self, folio):
+        """Contar un folio entregado cuya venta no se guardó"""
+        serie = folio.rsplit('-', 1)[0]
+        estado = self._series.get(serie)
+        if estado is not None:
+            with estado.lock:
+                estado.descartados += 1
+    
+    def devolver_sobrantes(self):
+        """Regresar a la base el resto de cada bloque si nadie reservó después.
+        
+        Se llama al detener el servidor para no dejar huecos en un reinicio
+        normal; si otro proceso ya apartó un bloque posterior, el resto se
+        pierde y se cuenta como hueco.
+        """
+        devueltos = 0
+        for serie, estado in list(self._series.items()):
+            with estado.lock:
+                sobrantes = estado.fin - estado.siguiente + 1
+                if sobrantes <= 0:
+                    continue
+                try:
+                    actualizados = execute_query(
+                        "UPDATE folios_series SET siguiente = ? WHERE serie = ? AND siguiente = ?",
+                        (estado.siguiente, serie, estado.fin + 1)
+                    )
+                except Exception as e:
+                    print(f"[FOLIOS] No se pudieron devolver folios de {serie}: {e}")
+                    continue
+                if actualizados:
+                    estado.devueltos += sobrantes
+                    devueltos += sobrantes
+                    estado.fin = estado.siguiente - 1
+        return devueltos
+    
+    def stats(self):
+        series = {}
+        for serie, estado in list(self._series.items()):
+            with estado.lock:
+                series[serie] = {
+                    'bloques': estado.bloques,
+                    'reservados': estado.reservados,
+                    'entregados': estado.entregados,
+                    'descartados': estado.descartados,
+                    'devueltos': estado.devueltos,
+                    'disponibles_en_bloque': max(0, estado.fin - estado.siguiente + 1)
+                }
+        return {
+            'sucursal': self.sucursal,
+            'tamano_bloque': self.tamano_bloque,
+            'series': series
+        }
+    
+    @staticmethod
+    def auditar(serie):
+        """Huecos de numeración de una serie según los folios guardados en ventas"""
+        prefijo = f"{serie}-"
+        result = execute_query("""
+        SELECT COUNT(*) as ventas,
+               MIN(CAST(SUBSTRING(folio, ?, 20) AS BIGINT)) as primero,
+               MAX(CAST(SUBSTRING(folio, ?, 20) AS BIGINT)) as ultimo
+        FROM ventas
+        WHERE folio LIKE ?
+        """, (len(prefijo) + 1, len(prefijo) + 1, prefijo + '%'), fetch=True)
+        serie_bd = execute_query(
+            "SELECT siguiente FROM folios_series WHERE serie = ?", (serie,), fetch=True
+        )
+        
+        ventas = result['ventas'] if result else 0
+        primero = result['primero'] if ventas else 0
+        ultimo = result['ultimo'] if ventas else 0
+        apartados = serie_bd['siguiente'] - 1 if serie_bd else 0
+        return {
+            'serie': serie,
+            'ventas': ventas,
+            'primero': primero or None,
+            'ultimo': ultimo or None,
+            # La serie puede no empezar en 1 (folios borrados, series importadas)
+            'huecos': (ultimo - primero + 1 - ventas) if ventas else 0,
+            'apartados_sin_usar': max(0, apartados - ultimo)
+        }
+    
+    @staticmethod
+    def series_registradas():
+        rows = execute_query("SELECT serie FROM folios_series ORDER BY serie", fetch_all=True) or []
+        return [row['serie'] for row in rows]
+
+folio_allocator = FolioAllocator(Config.FOLIO_SUCURSAL, Config.FOLIO_BLOQUE)
@@ -0,0 +1,96 @@
+import hashlib
+import json
+import threading
+import time
+from config import Config
+
+ESTADO_EN_PROCESO = 'en_proceso'
+ESTADO_COMPLETADO = 'completado'
+
+class IdempotenciaConflictoError(ValueError):
+    """La llave ya se usó con un cuerpo distinto"""
+
+def huella_peticion(data):
+    """Hash estable del cuerpo JSON, independiente del orden de las llaves"""
+    canonico = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonico.encode('utf-8')).hexdigest()
+
+class IdempotenciaStore:
+    """Registro en memoria de llaves Idempotency-Key ya recibidas.
+    
+    Una llave se reserva antes de procesar la venta y guarda la respuesta
+    al terminar; un reintento con la misma llave recibe esa respuesta en
+    lugar de registrar otra venta. Si el procesamiento falla la llave se
+    libera para que el reintento pueda volver a intentarlo.
+    """
+    
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._entradas = {}
+        self._lock = threading.Lock()
+        self._proxima_purga = 0
+        self.repeticiones = 0
+    
+    def reservar(self, llave, huella):
+        """Regresa (True, entrada) si la llave es nueva o (False, entrada) si ya existe"""
+        ahora = time.monotonic()
+        with self._lock:
+            self._purgar(ahora)
+            entrada = self._entradas.get(llave)
+            if entrada is not None and entrada['expira_en'] > ahora:
+                if entrada['huella'] != huella:
+                    raise IdempotenciaConflictoError(
+                        'La llave de idempotencia ya se usó con una venta distinta'
+                    )
+                self.repeticiones += 1
+                return False, dict(entrada)
+            
+            entrada = {
+                'huella': huella,
+                'estado': ESTADO_EN_PROCESO,
+                'ticket': None,
+                'status': None,
+                'respuesta': None,
+                'expira_en': ahora + self.ttl
+            }
+            self._entradas[llave] = entrada
+            return True, dict(entrada)
+    
+    def asociar_ticket(self, llave, ticket):
+        with self._lock:
+            if llave in self._entradas:
+                self._entradas[llave]['ticket'] = ticket
+    
+    def completar(self, llave, status, respuesta):
+        """Guardar la respuesta que se repetirá a los reintentos"""
+        with self._lock:
+            entrada = self._entradas.get(llave)
+            if entrada is not None:
+                entrada['estado'] = ESTADO_COMPLETADO
+                entrada['status'] = status
+                entrada['respuesta'] = respuesta
+    
+    def liberar(self, llave):
+        with self._lock:
+            self._entradas.pop(llave, None)
+    
+    def _purgar(self, ahora):
+        # Recorrer todas las llaves a lo más una vez por minuto
+        if ahora < self._proxima_purga:
+            return
+        self._proxima_purga = ahora + 60
+        vencidas = [llave for llave, entrada in self._entradas.items() if entrada['expira_en'] <= ahora]
+        for llave in vencidas:
+            del self._entradas[llave]
+    
+    def stats(self):
+        with self._lock:
+            en_proceso = sum(1 for entrada in self._entradas.values() if entrada['estado'] == ESTADO_EN_PROCESO)
+            return {
+                'llaves': len(self._entradas),
+                'en_proceso': en_proceso,
+                'repeticiones': self.repeticiones,
+                'ttl': self.ttl
+            }
+
+idempotencia_ventas = IdempotenciaStore(Config.IDEMPOTENCIA_TTL)
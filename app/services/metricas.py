@@ -0,0 +1,278 @@
+import hashlib
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from functools import lru_cache
+from config import Config
+
+# Límites de los buckets en segundos, los mismos para peticiones y consultas
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Consultas que ya no caben en METRICAS_MAX_CONSULTAS se acumulan aquí
+HUELLA_OTRAS = 'otras'
+
+_COMENTARIO_RE = re.compile(r'--[^\n]*')
+_CADENA_RE = re.compile(r"N?'(?:[^']|'')*'")
+_NUMERO_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_LISTA_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_RENGLONES_RE = re.compile(r'(\(\?, \.\.\.\))(?:\s*,\s*\(\?, \.\.\.\))+')
+_ESPACIOS_RE = re.compile(r'\s+')
+
+@lru_cache(maxsize=2048)
+def huella_consulta(sql):
+    """Forma normalizada de la consulta y un id corto para usarlo como etiqueta.
+    
+    Quita comentarios y literales y colapsa listas de parámetros, así
+    `IN (?, ?, ?)` y `IN (?, ?)` cuentan como la misma consulta.
+    """
+    normalizada = _COMENTARIO_RE.sub(' ', sql)
+    normalizada = _CADENA_RE.sub('?', normalizada)
+    normalizada = _NUMERO_RE.sub('?', normalizada)
+    normalizada = _ESPACIOS_RE.sub(' ', normalizada).strip()
+    normalizada = _LISTA_RE.sub('(?, ...)', normalizada)
+    normalizada = _RENGLONES_RE.sub(r'\1, ...', normalizada)
+    return hashlib.sha1(normalizada.encode('utf-8')).hexdigest()[:12], normalizada
+
+class _Histograma:
+    """Conteos por bucket (no acumulados), suma y total de observaciones"""
+    
+    __slots__ = ('conteos', 'suma', 'total')
+    
+    def __init__(self):
+        self.conteos = [0] * (len(BUCKETS) + 1)
+        self.suma = 0.0
+        self.total = 0
+    
+    def observar(self, segundos):
+        self.conteos[bisect_left(BUCKETS, segundos)] += 1
+        self.suma += segundos
+        self.total += 1
+    
+    def percentil(self, p):
+        """Límite superior del bucket donde cae el percentil p"""
+        if not self.total:
+            return None
+        objetivo = self.total * p / 100
+        acumulado = 0
+        for indice, conteo in enumerate(self.conteos):
+            acumulado += conteo
+            if acumulado >= objetivo:
+                return BUCKETS[indice] if indice < len(BUCKETS) else float('inf')
+        return float('inf')
+
+class _Consulta:
+    __slots__ = ('sql', 'histograma', 'renglones', 'errores')
+    
+    def __init__(self, sql):
+        self.sql = sql
+        self.histograma = _Histograma()
+        self.renglones = 0
+        self.errores = 0
+
+def _etiquetas(**valores):
+    partes = []
+    for nombre, valor in valores.items():
+        valor = str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        partes.append(f'{nombre}="{valor}"')
+    return ','.join(partes)
+
+def _lineas_histograma(nombre, etiquetas, histograma):
+    separador = ',' if etiquetas else ''
+    acumulado = 0
+    for limite, conteo in zip(BUCKETS, histograma.conteos):
+        acumulado += conteo
+        yield f'{nombre}_bucket{{{etiquetas}{separador}le="{limite}"}} {acumulado}'
+    yield f'{nombre}_bucket{{{etiquetas}{separador}le="+Inf"}} {histograma.total}'
+    sufijo = f'{{{etiquetas}}}' if etiquetas else ''
+    yield f'{nombre}_sum{sufijo} {histograma.suma}'
+    yield f'{nombre}_count{sufijo} {histograma.total}'
+
+class Metricas:
+    """Latencias por ruta HTTP y por consulta SQL, en histogramas de buckets fijos.
+    
+    Las consultas se agrupan por huella (SQL sin literales) hasta
+    `max_consultas` huellas distintas; las que pasan de `umbral_lento_ms` se
+    imprimen con el prefijo [SLOW QUERY] y se guardan en un historial corto.
+    La exportación es en formato de texto de Prometheus.
+    """
+    
+    def __init__(self, max_consultas, umbral_lento_ms, umbral_peticion_lenta_ms, historial_lentas):
+        self.max_consultas = max_consultas
+        self.umbral_lento = umbral_lento_ms / 1000
+        self.umbral_peticion_lenta = umbral_peticion_lenta_ms / 1000
+        self._lock = threading.Lock()
+        self._peticiones = {}  # (metodo, ruta, status) -> _Histograma
+        self._consultas = {}  # huella -> _Consulta
+        self._adquisicion = _Histograma()
+        self._lentas = deque(maxlen=historial_lentas)
+        self.consultas_lentas_total = 0
+        self.peticiones_lentas_total = 0
+        self.inicio = time.time()
+    
+    def observar_peticion(self, metodo, ruta, status, segundos):
+        llave = (metodo, ruta, str(status))
+        with self._lock:
+            histograma = self._peticiones.get(llave)
+            if histograma is None:
+                histograma = self._peticiones[llave] = _Histograma()
+            histograma.observar(segundos)
+            lenta = self.umbral_peticion_lenta and segundos >= self.umbral_peticion_lenta
+            if lenta:
+                self.peticiones_lentas_total += 1
+        if lenta:
+            print(f"[SLOW REQUEST] {segundos * 1000:.1f} ms {metodo} {ruta} -> {status}")
+    
+    def observar_adquisicion(self, segundos):
+        """Tiempo para obtener una conexión del pool"""
+        with self._lock:
+            self._adquisicion.observar(segundos)
+    
+    def observar_consulta(self, sql, segundos, renglones=None, espera=None, error=False):
+        huella, normalizada = huella_consulta(sql)
+        with self._lock:
+            consulta = self._consultas.get(huella)
+            if consulta is None:
+                if len(self._consultas) >= self.max_consultas:
+                    huella = HUELLA_OTRAS
+                    consulta = self._consultas.get(HUELLA_OTRAS)
+                if consulta is None:
+                    consulta = self._consultas[huella] = _Consulta(
+                        normalizada if huella != HUELLA_OTRAS else '(consultas fuera del límite)'
+                    )
+            consulta.histograma.observar(segundos)
+            if renglones and renglones > 0:
+                consulta.renglones += renglones
+            if error:
+                consulta.errores += 1
+            lenta = self.umbral_lento and segundos >= self.umbral_lento
+            if lenta:
+                self.consultas_lentas_total += 1
+                self._lentas.append({
+                    'fecha': time.strftime('%Y-%m-%d %H:%M:%S'),
+                    'huella': huella,
+                    'ms': round(segundos * 1000, 2),
+                    'renglones': renglones,
+                    'espera_conexion_ms': round(espera * 1000, 2) if espera is not None else None,
+                    'error': error,
+                    'sql': normalizada
+                })
+        if lenta:
+            espera_texto = f", conexión {espera * 1000:.1f} ms" if espera is not None else ''
+            print(f"[SLOW QUERY] {segundos * 1000:.1f} ms ({renglones} renglones{espera_texto}) "
+                  f"{huella}: {normalizada[:500]}")
+    
+    def consultas_lentas(self):
+        """Historial de consultas lentas, la más reciente primero"""
+        with self._lock:
+            return list(reversed(self._lentas))
+    
+    def resumen_consultas(self, limite=20):
+        """Huellas con más tiempo acumulado"""
+        with self._lock:
+            filas = [
+                {
+                    'huella': huella,
+                    'ejecuciones': consulta.histograma.total,
+                    'tiempo_total_ms': round(consulta.histograma.suma * 1000, 2),
+                    'promedio_ms': round(consulta.histograma.suma * 1000 / consulta.histograma.total, 3),
+                    'p95_ms': (consulta.histograma.percentil(95) or 0) * 1000,  # límite del bucket
+                    'renglones': consulta.renglones,
+                    'errores': consulta.errores,
+                    'sql': consulta.sql
+                }
+                for huella, consulta in self._consultas.items() if consulta.histograma.total
+            ]
+        filas.sort(key=lambda fila: fila['tiempo_total_ms'], reverse=True)
+        return filas[:limite]
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'rutas': len({(metodo, ruta) for metodo, ruta, _ in self._peticiones}),
+                'peticiones': sum(h.total for h in self._peticiones.values()),
+                'huellas_consulta': len(self._consultas),
+                'max_consultas': self.max_consultas,
+                'consultas': sum(c.histograma.total for c in self._consultas.values()),
+                'consultas_lentas': self.consultas_lentas_total,
+                'peticiones_lentas': self.peticiones_lentas_total,
+                'umbral_lento_ms': self.umbral_lento * 1000,
+                'umbral_peticion_lenta_ms': self.umbral_peticion_lenta * 1000
+            }
+    
+    def reiniciar(self):
+        with self._lock:
+            self._peticiones.clear()
+            self._consultas.clear()
+            self._adquisicion = _Histograma()
+            self._lentas.clear()
+            self.consultas_lentas_total = 0
+            self.peticiones_lentas_total = 0
+    
+    def prometheus(self, medidores=None):
+        """Texto para GET /api/system/metrics.
+        
+        `medidores` agrega valores instantáneos (gauges) de otros módulos:
+        {nombre: (descripción, valor)}.
+        """
+        lineas = []
+        
+        def encabezado(nombre, tipo, descripcion):
+            lineas.append(f'# HELP {nombre} {descripcion}')
+            lineas.append(f'# TYPE {nombre} {tipo}')
+        
+        with self._lock:
+            peticiones = sorted(self._peticiones.items())
+            consultas = sorted(self._consultas.items())
+            
+            encabezado('pos_http_request_duration_seconds', 'histogram',
+                       'Duración de las peticiones HTTP por método, ruta y status')
+            for (metodo, ruta, status), histograma in peticiones:
+                lineas.extend(_lineas_histograma(
+                    'pos_http_request_duration_seconds',
+                    _etiquetas(method=metodo, route=ruta, status=status), histograma
+                ))
+            
+            encabezado('pos_db_query_duration_seconds', 'histogram',
+                       'Duración de las consultas por huella, sin contar la espera de conexión')
+            for huella, consulta in consultas:
+                lineas.extend(_lineas_histograma(
+                    'pos_db_query_duration_seconds', _etiquetas(huella=huella), consulta.histograma
+                ))
+            
+            encabezado('pos_db_query_rows_total', 'counter', 'Renglones leídos o afectados por huella')
+            for huella, consulta in consultas:
+                lineas.append(f'pos_db_query_rows_total{{{_etiquetas(huella=huella)}}} {consulta.renglones}')
+            
+            encabezado('pos_db_query_errors_total', 'counter', 'Consultas que terminaron en error por huella')
+            for huella, consulta in consultas:
+                lineas.append(f'pos_db_query_errors_total{{{_etiquetas(huella=huella)}}} {consulta.errores}')
+            
+            encabezado('pos_db_query_info', 'gauge', 'SQL normalizado de cada huella')
+            for huella, consulta in consultas:
+                lineas.append(f'pos_db_query_info{{{_etiquetas(huella=huella, sql=consulta.sql[:300])}}} 1')
+            
+            encabezado('pos_db_connection_acquire_seconds', 'histogram',
+                       'Tiempo para obtener una conexión del pool')
+            lineas.extend(_lineas_histograma('pos_db_connection_acquire_seconds', '', self._adquisicion))
+            
+            encabezado('pos_db_slow_queries_total', 'counter', 'Consultas por encima de SLOW_QUERY_MS')
+            lineas.append(f'pos_db_slow_queries_total {self.consultas_lentas_total}')
+            encabezado('pos_http_slow_requests_total', 'counter', 'Peticiones por encima de SLOW_REQUEST_MS')
+            lineas.append(f'pos_http_slow_requests_total {self.peticiones_lentas_total}')
+        
+        encabezado('pos_process_start_time_seconds', 'gauge', 'Inicio del proceso en segundos desde epoch')
+        lineas.append(f'pos_process_start_time_seconds {self.inicio}')
+        for nombre, (descripcion, valor) in (medidores or {}).items():
+            encabezado(nombre, 'gauge', descripcion)
+            lineas.append(f'{nombre} {valor}')
+        
+        return '\n'.join(lineas) + '\n'
+
+metricas = Metricas(
+    Config.METRICAS_MAX_CONSULTAS,
+    Config.SLOW_QUERY_MS,
+    Config.SLOW_REQUEST_MS,
+    Config.CONSULTAS_LENTAS_HISTORIAL
+)
@@ -0,0 +1,214 @@
+import threading
+import time
+from app.database.db_connection import execute_query
+from app.services.catalogo_service import CatalogoService
+from app.services.product_search import ProductSearchIndex
+from config import Config
+
+PRODUCT_FIELDS = (
+    'id_productos', 'nombre', 'codigo_barras', 'precio_compra', 'precio_venta',
+    'stock_minimo', 'stock_maximo', 'descripcion', 'fk_marcas', 'fk_categorias',
+    'fk_unidades_medida', 'fk_estatus_general', 'fk_productos_imagenes'
+)
+# Nombres de catálogo que acompañan a cada producto
+PRODUCTO_NOMBRES = {
+    'nombre_marca': ('marcas', 'fk_marcas'),
+    'categoria_nombre': ('categorias', 'fk_categorias'),
+    'nombre_unidad_medida': ('unidades_medida', 'fk_unidades_medida'),
+    'estatus_nombre': ('estatus_general', 'fk_estatus_general')
+}
+
+def normalize_barcode(codigo_barras):
+    """Código de barras tal como lo envía el lector, sin espacios"""
+    if codigo_barras is None:
+        return None
+    codigo_barras = str(codigo_barras).strip()
+    return codigo_barras or None
+
+class ProductRecord:
+    """Producto activo en memoria; __slots__ evita un dict por instancia"""
+    __slots__ = PRODUCT_FIELDS + tuple(PRODUCTO_NOMBRES)
+    
+    @classmethod
+    def from_row(cls, row):
+        record = cls()
+        for field in cls.__slots__:
+            setattr(record, field, row.get(field))
+        # Los precios se guardan ya convertidos para no hacerlo en cada escaneo
+        record.precio_compra = float(record.precio_compra or 0)
+        record.precio_venta = float(record.precio_venta or 0)
+        return record
+    
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+class ProductCatalog:
+    """Catálogo de productos activos indexado por id y por código de barras.
+    
+    Las lecturas no toman el lock: cada índice es un dict que se reemplaza
+    completo al recargar y se modifica con asignaciones simples al
+    actualizar un producto, ambas atómicas en CPython.
+    
+    Los cambios de este proceso se aplican al momento; los de otros procesos
+    o hechos directo en la base se ven con la recarga completa cada
+    `recarga` segundos (0 la desactiva). La recarga la hace un solo hilo;
+    los demás siguen leyendo el catálogo anterior mientras tanto.
+    """
+    
+    def __init__(self, recarga=0):
+        self.recarga = recarga
+        self._by_id = {}
+        self._by_barcode = {}
+        self._search_index = ProductSearchIndex()
+        self._lock = threading.Lock()
+        self._recarga_lock = threading.Lock()
+        self._tocados = None  # ids modificados mientras corre load()
+        self.loaded = False
+        self.loaded_at = None
+        self._cargado_en = None
+        self.recargas = 0
+        self.hits = 0
+        self.misses = 0
+    
+    def load(self):
+        """Leer todos los productos activos y reconstruir los índices"""
+        with self._lock:
+            self._tocados = set()
+        try:
+            rows = execute_query(
+                "SELECT p.* FROM productos p WHERE p.fk_estatus_general = ?",
+                (Config.ESTATUS_ACTIVO,), fetch_all=True
+            ) or []
+            CatalogoService.resolver_nombres(rows, PRODUCTO_NOMBRES)
+        except Exception:
+            with self._lock:
+                self._tocados = None
+            raise
+        
+        by_id = {}
+        by_barcode = {}
+        search_index = ProductSearchIndex()
+        for row in rows:
+            record = ProductRecord.from_row(row)
+            by_id[record.id_productos] = record
+            search_index.add(record)
+            codigo = normalize_barcode(record.codigo_barras)
+            if codigo:
+                if codigo in by_barcode:
+                    print(f"[CATALOGO] Código de barras duplicado {codigo}: "
+                          f"productos {by_barcode[codigo].id_productos} y {record.id_productos}")
+                by_barcode[codigo] = record
+        
+        with self._lock:
+            self._by_id = by_id
+            self._by_barcode = by_barcode
+            self._search_index = search_index
+            tocados, self._tocados = self._tocados or set(), None
+            self.loaded = True
+            self.loaded_at = time.time()
+            self._cargado_en = time.monotonic()
+            self.recargas += 1
+        # Creados o modificados aquí después de la lectura: la foto los trae viejos
+        for product_id in tocados:
+            self.refresh_product(product_id)
+        print(f"[CATALOGO] {len(by_id)} productos cargados en memoria")
+        return len(by_id)
+    
+    def ensure_loaded(self):
+        """Carga perezosa si el arranque no pudo leer la base, y recarga cada `recarga` segundos"""
+        if not self.loaded:
+            self.load()
+        elif self.recarga and time.monotonic() - self._cargado_en > self.recarga:
+            if not self._recarga_lock.acquire(blocking=False):
+                return  # otro hilo ya está recargando
+            try:
+                if time.monotonic() - self._cargado_en > self.recarga:
+                    self.load()
+            except Exception as e:
+                # Se sigue con el catálogo anterior y se reintenta en `recarga` segundos
+                self._cargado_en = time.monotonic()
+                print(f"[CATALOGO] Error recargando productos: {e}")
+            finally:
+                self._recarga_lock.release()
+    
+    def get(self, product_id):
+        self.ensure_loaded()
+        return self._by_id.get(product_id)
+    
+    def get_by_barcode(self, codigo_barras):
+        self.ensure_loaded()
+        record = self._by_barcode.get(normalize_barcode(codigo_barras))
+        if record is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return record
+    
+    def search(self, query, limit):
+        """Productos que coinciden con la búsqueda, los más relevantes primero"""
+        self.ensure_loaded()
+        # El índice se modifica bajo el lock; la búsqueda lo toma solo para
+        # leerlo, no mientras difflib recorre el vocabulario
+        with self._lock:
+            by_id, index = self._by_id, self._search_index
+        ranked = index.search(query, limit, self._lock)
+        return [(by_id[product_id], score) for product_id, score in ranked if product_id in by_id]
+    
+    def refresh_product(self, product_id):
+        """Releer un producto tras crearlo o modificarlo"""
+        row = execute_query(
+            "SELECT p.* FROM productos p WHERE p.id_productos = ?",
+            (product_id,), fetch=True
+        )
+        if row is None or row['fk_estatus_general'] != Config.ESTATUS_ACTIVO:
+            self.remove(product_id)
+            return None
+        
+        CatalogoService.resolver_nombres([row], PRODUCTO_NOMBRES)
+        return self.upsert(ProductRecord.from_row(row))
+    
+    def upsert(self, record):
+        with self._lock:
+            if self._tocados is not None:
+                self._tocados.add(record.id_productos)
+            previous = self._by_id.get(record.id_productos)
+            if previous is not None:
+                self._drop_barcode(previous)
+            self._by_id[record.id_productos] = record
+            codigo = normalize_barcode(record.codigo_barras)
+            if codigo:
+                self._by_barcode[codigo] = record
+            self._search_index.add(record)
+        return record
+    
+    def remove(self, product_id):
+        with self._lock:
+            if self._tocados is not None:
+                self._tocados.add(product_id)
+            previous = self._by_id.pop(product_id, None)
+            if previous is not None:
+                self._drop_barcode(previous)
+            self._search_index.remove(product_id)
+    
+    def _drop_barcode(self, record):
+        codigo = normalize_barcode(record.codigo_barras)
+        # Solo si el índice todavía apunta a este producto
+        if codigo and self._by_barcode.get(codigo) is record:
+            del self._by_barcode[codigo]
+    
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'loaded': self.loaded,
+            'loaded_at': self.loaded_at,
+            'reload_seconds': self.recarga,
+            'reloads': self.recargas,
+            'products': len(self._by_id),
+            'barcodes': len(self._by_barcode),
+            'indexed': len(self._search_index),
+            'barcode_hits': self.hits,
+            'barcode_misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0
+        }
+
+product_catalog = ProductCatalog(Config.PRODUCTOS_RECARGA)
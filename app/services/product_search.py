@@ -0,0 +1,121 @@
+import bisect
+import difflib
+import heapq
+import re
+import unicodedata
+from contextlib import nullcontext
+
+# Peso de cada campo al calificar una coincidencia
+SEARCH_FIELDS = (
+    ('nombre', 3),
+    ('nombre_marca', 2),
+    ('categoria_nombre', 2),
+    ('descripcion', 1)
+)
+EXACT_BONUS = 2
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+def normalize_text(text):
+    """Minúsculas y sin acentos: 'Cámara Ñandú' -> 'camara nandu'"""
+    if not text:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(normalize_text(text))
+
+class ProductSearchIndex:
+    """Índice invertido token -> {id_productos: peso} con búsqueda por prefijo.
+    
+    Los tokens se guardan además en una lista ordenada, así un prefijo se
+    resuelve con bisect en lugar de recorrer todo el vocabulario.
+    
+    search() recibe el lock con el que el dueño protege al índice y solo lo
+    toma para leer; la búsqueda aproximada (difflib recorre todo el
+    vocabulario) corre sobre una copia, sin él.
+    """
+    
+    def __init__(self):
+        self._postings = {}
+        self._tokens = []
+        self._vocabulario = None  # copia inmutable de _tokens para difflib
+        self._by_product = {}
+    
+    def __len__(self):
+        return len(self._by_product)
+    
+    def add(self, record):
+        """Indexar (o reindexar) un ProductRecord"""
+        self.remove(record.id_productos)
+        
+        weights = {}
+        for field, weight in SEARCH_FIELDS:
+            for token in tokenize(getattr(record, field, None)):
+                if weights.get(token, 0) < weight:
+                    weights[token] = weight
+        
+        for token, weight in weights.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                bisect.insort(self._tokens, token)
+                self._vocabulario = None
+            postings[record.id_productos] = weight
+        self._by_product[record.id_productos] = tuple(weights)
+    
+    def remove(self, product_id):
+        for token in self._by_product.pop(product_id, ()):
+            postings = self._postings[token]
+            postings.pop(product_id, None)
+            if not postings:
+                del self._postings[token]
+                del self._tokens[bisect.bisect_left(self._tokens, token)]
+                self._vocabulario = None
+    
+    def _prefix(self, term):
+        """Tokens del índice que empiezan con term"""
+        start = bisect.bisect_left(self._tokens, term)
+        end = bisect.bisect_left(self._tokens, term + '\uffff', start)
+        return self._tokens[start:end]
+    
+    def search(self, query, limit, lock=None):
+        """Pares (id_productos, puntaje) por relevancia; todos los términos deben coincidir"""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        lock = lock or nullcontext()
+        
+        scores = None
+        for term in dict.fromkeys(terms):
+            term_scores = {}
+            with lock:
+                tokens = self._prefix(term)
+                if not tokens and self._vocabulario is None:
+                    self._vocabulario = tuple(self._tokens)
+                vocabulario = self._vocabulario
+            fuzzy = not tokens
+            if fuzzy:
+                # Tolerancia a errores de captura ("cadna" -> "cadena")
+                tokens = difflib.get_close_matches(term, vocabulario, n=3, cutoff=0.8)
+            with lock:
+                for token in tokens:
+                    bonus = EXACT_BONUS if token == term and not fuzzy else 0
+                    # El token pudo desaparecer mientras difflib corría sin el lock
+                    for product_id, weight in self._postings.get(token, {}).items():
+                        score = weight + bonus
+                        if term_scores.get(product_id, 0) < score:
+                            term_scores[product_id] = score
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {
+                    product_id: score + term_scores[product_id]
+                    for product_id, score in scores.items()
+                    if product_id in term_scores
+                }
+            if not scores:
+                return []
+        
+        # Solo los mejores `limit`, sin ordenar todas las coincidencias
+        return heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
@@ -1,60 +1,74 @@
-from app.database.db_connection import execute_query
+from app.database.db_connection import DatabaseManager, execute_query
+from app.database.paginacion import consulta_paginada
 from app.models.entities import Producto
+from app.services.catalogo_service import CatalogoService
+from app.services.eventos import eventos
+from app.services.existencias_service import ExistenciasService
+from app.services.product_catalog import PRODUCTO_NOMBRES, product_catalog
+from app.services.stock_bajo import stock_bajo
+from app.services.sync_service import ENTIDAD_PRODUCTO, SyncService
 from config import Config
 
+# Columnas y origen comunes; los nombres de catálogo se resuelven en memoria
+PRODUCTO_COLUMNAS = "p.*"
+PRODUCTO_ORIGEN = "productos p"
+PRODUCTO_CAMPOS_EDITABLES = (
+    'nombre', 'codigo_barras', 'precio_compra', 'precio_venta', 'stock_minimo',
+    'stock_maximo', 'descripcion', 'fk_marcas', 'fk_categorias', 'fk_unidades_medida'
+)
+
 class ProductService:
+    @staticmethod
+    def to_dict(row):
+        """Producto del renglón más los nombres de sus catálogos"""
+        data = Producto.from_row(row).to_dict()
+        for nombre in PRODUCTO_NOMBRES:
+            if nombre in row:
+                data[nombre] = row[nombre]
+        return data
+    
+    @staticmethod
+    def to_dicts(rows):
+        """Convertir renglones resolviendo los nombres desde la caché de catálogos"""
+        CatalogoService.resolver_nombres(rows, PRODUCTO_NOMBRES)
+        return [ProductService.to_dict(row) for row in rows]
+    
     @staticmethod
     def get_all_products():
-        query = """
-        SELECT p.*, 
-               m.nombre_marca, 
-               c.nombre as categoria_nombre,
-               um.nombre_unidad_medida,
-               e.nombre as estatus_nombre
-        FROM productos p 
-        LEFT JOIN marcas m ON p.fk_marcas = m.id_marcas
-        LEFT JOIN categorias c ON p.fk_categorias = c.id_categorias
-        LEFT JOIN unidades_medida um ON p.fk_unidades_medida = um.id_unidades_medida
-        LEFT JOIN estatus_general e ON p.fk_estatus_general = e.id_estatus_general
+        query = f"""
+        SELECT {PRODUCTO_COLUMNAS}
+        FROM {PRODUCTO_ORIGEN}
         WHERE p.fk_estatus_general = ?
         ORDER BY p.nombre
         """
         results = execute_query(query, (Config.ESTATUS_ACTIVO,), fetch_all=True)
-        return [Producto(**row).to_dict() for row in results] if results else []
+        return ProductService.to_dicts(results) if results else []
+    
+    @staticmethod
+    def get_products_page(limit, cursor=None, include_total=False):
+        """Página de productos activos ordenados por nombre"""
+        results, pagina = consulta_paginada(
+            PRODUCTO_COLUMNAS, PRODUCTO_ORIGEN,
+            ['p.fk_estatus_general = ?'], [Config.ESTATUS_ACTIVO],
+            [('p.nombre', 'nombre'), ('p.id_productos', 'id_productos')],
+            limit, cursor, incluir_total=include_total
+        )
+        return ProductService.to_dicts(results), pagina
     
     @staticmethod
     def get_product_by_id(product_id):
-        query = """
-        SELECT p.*, 
-               m.nombre_marca, 
-               c.nombre as categoria_nombre,
-               um.nombre_unidad_medida,
-               e.nombre as estatus_nombre
-        FROM productos p 
-        LEFT JOIN marcas m ON p.fk_marcas = m.id_marcas
-        LEFT JOIN categorias c ON p.fk_categorias = c.id_categorias
-        LEFT JOIN unidades_medida um ON p.fk_unidades_medida = um.id_unidades_medida
-        LEFT JOIN estatus_general e ON p.fk_estatus_general = e.id_estatus_general
+        query = f"""
+        SELECT {PRODUCTO_COLUMNAS}
+        FROM {PRODUCTO_ORIGEN}
         WHERE p.id_productos = ? AND p.fk_estatus_general = ?
         """
         result = execute_query(query, (product_id, Config.ESTATUS_ACTIVO), fetch=True)
-        return Producto(**result).to_dict() if result else None
+        return ProductService.to_dicts([result])[0] if result else None
     
     @staticmethod
     def get_product_stock(product_id):
         """Obtener stock actual del producto"""
-        # En tu BD, necesitaríamos una vista o función para calcular stock
-        # Por ahora, asumimos que hay una columna stock (aunque no la veo en tu estructura)
-        query = """
-        SELECT COALESCE((
-            SELECT SUM(cantidad) FROM movimiento_detalles 
-            WHERE fk_productos = ? AND fk_movimiento IN (
-                SELECT id_movimiento FROM movimiento WHERE fk_movimiento_tipo = 1
-            )
-        ), 0) as stock_actual
-        """
-        result = execute_query(query, (product_id,), fetch=True)
-        return result['stock_actual'] if result else 0
+        return ExistenciasService.obtener_existencia(product_id)
     
     @staticmethod
     def create_product(product_data):
@@ -81,8 +95,98 @@ class ProductService:
         )
         
         new_id = execute_query(query, params)
+        ProductService._refresh_catalog(new_id)
+        SyncService.registrar(ENTIDAD_PRODUCTO, [new_id])
+        eventos.producto(new_id, product_data['nombre'])
         return new_id
     
+    @staticmethod
+    def update_product(product_id, product_data):
+        """Actualizar los campos enviados; regresa False si el producto no existe"""
+        campos = [campo for campo in PRODUCTO_CAMPOS_EDITABLES if campo in product_data]
+        if not campos:
+            return product_catalog.get(product_id) is not None
+        
+        query = f"""
+        UPDATE productos
+        SET {', '.join(f'{campo} = ?' for campo in campos)}
+        WHERE id_productos = ? AND fk_estatus_general = ?
+        """
+        params = [product_data[campo] for campo in campos]
+        params.extend([product_id, Config.ESTATUS_ACTIVO])
+        
+        actualizados = execute_query(query, tuple(params))
+        ProductService._refresh_catalog(product_id)
+        if actualizados:
+            SyncService.registrar(ENTIDAD_PRODUCTO, [product_id])
+        if actualizados and ('stock_minimo' in campos or 'stock_maximo' in campos):
+            # Con el mínimo nuevo el producto puede entrar o salir del stock bajo
+            stock_bajo.evaluar({product_id: ExistenciasService.obtener_existencia(product_id)})
+        return actualizados > 0
+    
+    @staticmethod
+    def search_products(query, limit):
+        """Búsqueda por prefijo sobre nombre, descripción, marca y categoría"""
+        results = []
+        for record, score in product_catalog.search(query, limit):
+            data = record.to_dict()
+            data['relevancia'] = score
+            results.append(data)
+        return results
+    
+    @staticmethod
+    def _refresh_catalog(product_id):
+        """El cambio ya está confirmado; un fallo aquí no debe convertirse en error"""
+        try:
+            product_catalog.refresh_product(product_id)
+        except Exception as e:
+            print(f"[CATALOGO] Error refrescando producto {product_id}: {e}")
+            product_catalog.remove(product_id)
+    
+    @staticmethod
+    def get_product_by_barcode(codigo_barras):
+        """Producto activo por código de barras, resuelto en memoria"""
+        record = product_catalog.get_by_barcode(codigo_barras)
+        return record.to_dict() if record else None
+    
+    @staticmethod
+    def get_stock_bulk(product_ids):
+        """Obtener nombre y stock de varios productos en una sola consulta"""
+        ids = sorted(set(product_ids))
+        resultado = {}
+        sin_saldo = []
+        ExistenciasService.asegurar_tabla()
+        
+        # SQL Server admite hasta 2100 parámetros por consulta
+        for inicio in range(0, len(ids), 1000):
+            bloque = ids[inicio:inicio + 1000]
+            query = f"""
+            SELECT p.id_productos, p.nombre,
+                   pe.fk_productos as fk_existencia,
+                   COALESCE(pe.existencia, 0) as stock_actual
+            FROM productos p
+            LEFT JOIN productos_existencias pe ON pe.fk_productos = p.id_productos
+            WHERE p.id_productos IN ({', '.join('?' for _ in bloque)})
+            AND p.fk_estatus_general = ?
+            """
+            rows = execute_query(query, (*bloque, Config.ESTATUS_ACTIVO), fetch_all=True) or []
+            for row in rows:
+                if row['fk_existencia'] is None:
+                    sin_saldo.append(row['id_productos'])
+                resultado[row['id_productos']] = {
+                    'nombre': row['nombre'],
+                    'stock_actual': row['stock_actual']
+                }
+        
+        if sin_saldo:
+            # Productos que aún no tienen saldo materializado
+            with DatabaseManager().transaction() as cursor:
+                existencias = ExistenciasService.leer_existencias(cursor, sin_saldo)
+            for product_id, existencia in existencias.items():
+                resultado[product_id]['stock_actual'] = existencia
+        
+        return resultado
+    
     @staticmethod
     def check_stock_sufficient(product_id, requested_quantity):
         """Verificar si hay stock suficiente"""
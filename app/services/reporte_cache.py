@@ -0,0 +1,135 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from app.services.resumen_ventas_service import rango_fechas, ultimo_dia_cerrado
+from config import Config
+
+class _Vuelo:
+    """Carga en curso de un reporte; las peticiones idénticas esperan su resultado"""
+    
+    __slots__ = ('listo', 'valor', 'error', 'obsoleto')
+    
+    def __init__(self):
+        self.listo = threading.Event()
+        self.valor = None
+        self.error = None
+        self.obsoleto = False
+
+class ReporteCache:
+    """Caché de resultados de reportes por (reporte, inicio, fin, límite).
+    
+    Los rangos que terminan en días ya cerrados (ver ultimo_dia_cerrado) no
+    cambian con ventas nuevas y se guardan sin expiración; los demás (hoy, y
+    ayer durante los primeros minutos del día) expiran a los `ttl` segundos
+    y además se invalidan en cuanto se confirma una venta con fecha dentro
+    del rango. El TTL cubre las ventas registradas por otros
+    procesos, que no pasan por invalidar_fecha() de este.
+    
+    Peticiones idénticas concurrentes comparten una sola ejecución SQL.
+    """
+    
+    def __init__(self, ttl, max_entradas):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self._datos = OrderedDict()  # llave -> (expira_en, valor, inicio, fin)
+        self._vuelos = {}  # llave -> (_Vuelo, inicio, fin)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.compartidas = 0
+        self.invalidaciones = 0
+    
+    def obtener(self, reporte, fecha_inicio, fecha_fin, cargar, limite=None):
+        """Resultado del reporte desde la caché o ejecutando cargar() una sola vez"""
+        inicio, fin = rango_fechas(fecha_inicio, fecha_fin)
+        llave = (reporte, inicio, fin, limite)
+        
+        with self._lock:
+            entrada = self._datos.get(llave)
+            if entrada and (entrada[0] is None or entrada[0] > time.monotonic()):
+                self._datos.move_to_end(llave)
+                self.hits += 1
+                return entrada[1]
+            if entrada:
+                del self._datos[llave]
+            
+            en_curso = self._vuelos.get(llave)
+            if en_curso:
+                vuelo = en_curso[0]
+                self.compartidas += 1
+                propio = False
+            else:
+                vuelo = _Vuelo()
+                self._vuelos[llave] = (vuelo, inicio, fin)
+                self.misses += 1
+                propio = True
+        
+        if not propio:
+            vuelo.listo.wait()
+            if vuelo.error is not None:
+                raise vuelo.error
+            return vuelo.valor
+        
+        try:
+            vuelo.valor = cargar()
+        except Exception as e:
+            vuelo.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._vuelos[llave]
+                # Una venta confirmada durante la carga pudo quedar fuera del resultado
+                if vuelo.error is None and not vuelo.obsoleto:
+                    self._guardar(llave, vuelo.valor, inicio, fin)
+            vuelo.listo.set()
+        return vuelo.valor
+    
+    def _guardar(self, llave, valor, inicio, fin):
+        historico = fin <= datetime.combine(ultimo_dia_cerrado() + timedelta(days=1), datetime.min.time())
+        expira_en = None if historico else time.monotonic() + self.ttl
+        self._datos[llave] = (expira_en, valor, inicio, fin)
+        self._datos.move_to_end(llave)
+        while len(self._datos) > self.max_entradas:
+            self._datos.popitem(last=False)
+    
+    def invalidar_fecha(self, fecha=None):
+        """Descartar los reportes cuyo rango incluye `fecha` (por defecto ahora)"""
+        fecha = fecha or datetime.now()
+        with self._lock:
+            afectadas = [
+                llave for llave, (_, _, inicio, fin) in self._datos.items()
+                if inicio <= fecha < fin
+            ]
+            for llave in afectadas:
+                del self._datos[llave]
+            for vuelo, inicio, fin in self._vuelos.values():
+                if inicio <= fecha < fin:
+                    vuelo.obsoleto = True
+            self.invalidaciones += len(afectadas)
+    
+    def invalidar(self):
+        """Vaciar la caché, p. ej. tras reconstruir resúmenes"""
+        with self._lock:
+            self.invalidaciones += len(self._datos)
+            self._datos.clear()
+            for vuelo, _, _ in self._vuelos.values():
+                vuelo.obsoleto = True
+    
+    def stats(self):
+        with self._lock:
+            consultas = self.hits + self.misses + self.compartidas
+            return {
+                'entradas': len(self._datos),
+                'historicas': sum(1 for entrada in self._datos.values() if entrada[0] is None),
+                'en_curso': len(self._vuelos),
+                'hits': self.hits,
+                'misses': self.misses,
+                'compartidas': self.compartidas,
+                'hit_ratio': (self.hits + self.compartidas) / consultas if consultas else 0.0,
+                'invalidaciones': self.invalidaciones,
+                'ttl': self.ttl,
+                'max_entradas': self.max_entradas
+            }
+
+reporte_cache = ReporteCache(Config.REPORTES_CACHE_TTL, Config.REPORTES_CACHE_MAX)
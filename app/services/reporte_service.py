@@ -1,18 +1,114 @@
 from app.database.db_connection import execute_query
+from app.services.catalogo_service import CatalogoService
+from app.services.existencias_service import CANTIDAD_NETA_SQL, ExistenciasService
+from app.services.reporte_cache import reporte_cache
+from app.services.resumen_ventas_service import ResumenVentasService, dividir_rango
 from config import Config
-from datetime import datetime, timedelta
+
+# Columnas del reporte por periodo que se suman entre resúmenes y ventas
+REPORTE_PERIODO_SUMAS = (
+    'total_ventas', 'total_ingresos', 'total_impuestos', 'total_descuentos',
+    'ventas_contado', 'ventas_credito', 'ingresos_contado', 'ingresos_credito'
+)
+
+# Existencia neta por producto: saldo materializado o una pasada sobre el ledger
+ESTADISTICAS_ORIGENES = {
+    'existencias': "productos_existencias",
+    'ledger': f"""(
+        SELECT md.fk_productos, SUM({CANTIDAD_NETA_SQL}) as existencia
+        FROM movimiento_detalles md
+        INNER JOIN movimiento m ON md.fk_movimiento = m.id_movimiento
+        GROUP BY md.fk_productos
+    )"""
+}
+
+# Los productos inactivos solo cuentan en total_productos; la existencia
+# negativa no resta valor al inventario
+ESTADISTICAS_INVENTARIO_QUERY = """
+SELECT 
+    p.fk_categorias,
+    COUNT(*) as total_productos,
+    SUM(CASE WHEN p.fk_estatus_general = ? THEN 1 ELSE 0 END) as productos_activos,
+    SUM(CASE WHEN p.fk_estatus_general = ? AND COALESCE(s.existencia, 0) <= p.stock_minimo
+        THEN 1 ELSE 0 END) as productos_stock_bajo,
+    SUM(CASE WHEN p.fk_estatus_general = ? AND COALESCE(s.existencia, 0) <= 0
+        THEN 1 ELSE 0 END) as productos_sin_existencia,
+    SUM(CASE WHEN p.fk_estatus_general = ? AND s.existencia > 0
+        THEN s.existencia ELSE 0 END) as unidades_en_existencia,
+    SUM(CASE WHEN p.fk_estatus_general = ? AND s.existencia > 0
+        THEN s.existencia * p.precio_compra ELSE 0 END) as valor_inventario_costo,
+    SUM(CASE WHEN p.fk_estatus_general = ? AND s.existencia > 0
+        THEN s.existencia * p.precio_venta ELSE 0 END) as valor_inventario_venta
+FROM productos p
+LEFT JOIN {origen} s ON s.fk_productos = p.id_productos
+GROUP BY p.fk_categorias
+"""
+
+ESTADISTICAS_SUMAS = (
+    'total_productos', 'productos_activos', 'productos_stock_bajo', 'productos_sin_existencia',
+    'unidades_en_existencia', 'valor_inventario_costo', 'valor_inventario_venta'
+)
+
+def _combinar(parciales, llave, sumas):
+    """Sumar por `llave` los renglones de varias fuentes (resúmenes + tramos de ventas)"""
+    combinados = {}
+    for filas in parciales:
+        for fila in filas or []:
+            actual = combinados.get(fila[llave])
+            if actual is None:
+                combinados[fila[llave]] = dict(fila)
+            else:
+                for columna in sumas:
+                    actual[columna] = (actual[columna] or 0) + (fila[columna] or 0)
+    return list(combinados.values())
 
 class ReporteService:
     
+    @staticmethod
+    def _fuentes(fecha_inicio, fecha_fin):
+        """Días cerrados a leer de los resúmenes y tramos a leer de ventas"""
+        dias, tramos = dividir_rango(fecha_inicio, fecha_fin)
+        if dias:
+            ResumenVentasService.asegurar_consolidado()
+        return dias, tramos
+    
     @staticmethod
     def obtener_ventas_por_periodo(fecha_inicio, fecha_fin):
         """Obtener reporte de ventas por periodo"""
         try:
-            query = """
+            return reporte_cache.obtener(
+                'ventas_periodo', fecha_inicio, fecha_fin,
+                lambda: ReporteService._ventas_por_periodo(fecha_inicio, fecha_fin)
+            )
+        except Exception as e:
+            print(f"[REPORTE] Error obteniendo ventas por periodo: {e}")
+            return {}
+    
+    @staticmethod
+    def _ventas_por_periodo(fecha_inicio, fecha_fin):
+        dias, tramos = ReporteService._fuentes(fecha_inicio, fecha_fin)
+        parciales = []
+        
+        if dias:
+            parciales.append(execute_query("""
+            SELECT 
+                SUM(r.total_ventas) as total_ventas,
+                SUM(r.total_ingresos) as total_ingresos,
+                SUM(r.total_impuestos) as total_impuestos,
+                SUM(r.total_descuentos) as total_descuentos,
+                SUM(CASE WHEN r.fk_ventas_tipo = 1 THEN r.total_ventas ELSE 0 END) as ventas_contado,
+                SUM(CASE WHEN r.fk_ventas_tipo = 2 THEN r.total_ventas ELSE 0 END) as ventas_credito,
+                SUM(CASE WHEN r.fk_ventas_tipo = 1 THEN r.total_ingresos ELSE 0 END) as ingresos_contado,
+                SUM(CASE WHEN r.fk_ventas_tipo = 2 THEN r.total_ingresos ELSE 0 END) as ingresos_credito
+            FROM ventas_resumen_diario r
+            WHERE r.fecha BETWEEN ? AND ?
+            """, dias, fetch=True))
+        
+        for desde, hasta in tramos:
+            parciales.append(execute_query("""
             SELECT 
                 COUNT(*) as total_ventas,
                 SUM(v.total_neto) as total_ingresos,
-                AVG(v.total_neto) as promedio_venta,
                 SUM(v.impuestos) as total_impuestos,
                 SUM(v.descuentos) as total_descuentos,
                 COUNT(CASE WHEN v.fk_ventas_tipo = 1 THEN 1 END) as ventas_contado,
@@ -20,20 +116,62 @@ class ReporteService:
                 SUM(CASE WHEN v.fk_ventas_tipo = 1 THEN v.total_neto ELSE 0 END) as ingresos_contado,
                 SUM(CASE WHEN v.fk_ventas_tipo = 2 THEN v.total_neto ELSE 0 END) as ingresos_credito
             FROM ventas v
-            WHERE v.fecha_ventas BETWEEN ? AND ?
+            WHERE v.fecha_ventas >= ? AND v.fecha_ventas < ?
             AND v.fk_estatus_general = ?
-            """
-            return execute_query(query, (fecha_inicio, fecha_fin, Config.ESTATUS_ACTIVO), fetch=True)
-        except Exception as e:
-            print(f"[REPORTE] Error obteniendo ventas por periodo: {e}")
-            return {}
+            """, (desde, hasta, Config.ESTATUS_ACTIVO), fetch=True))
+        
+        reporte = {columna: 0 for columna in REPORTE_PERIODO_SUMAS}
+        for parcial in parciales:
+            for columna in REPORTE_PERIODO_SUMAS:
+                reporte[columna] += (parcial or {}).get(columna) or 0
+        reporte['promedio_venta'] = (
+            reporte['total_ingresos'] / reporte['total_ventas'] if reporte['total_ventas'] else None
+        )
+        return reporte
     
     @staticmethod
     def obtener_productos_mas_vendidos(fecha_inicio, fecha_fin, limite=10):
         """Obtener productos más vendidos"""
         try:
-            query = """
-            SELECT 
+            return reporte_cache.obtener(
+                'productos_mas_vendidos', fecha_inicio, fecha_fin,
+                lambda: ReporteService._productos_mas_vendidos(fecha_inicio, fecha_fin, limite),
+                limite=limite
+            )
+        except Exception as e:
+            print(f"[REPORTE] Error obteniendo productos más vendidos: {e}")
+            return []
+    
+    @staticmethod
+    def _productos_mas_vendidos(fecha_inicio, fecha_fin, limite):
+        dias, tramos = ReporteService._fuentes(fecha_inicio, fecha_fin)
+        # Con una sola fuente el TOP se resuelve en SQL; con varias hay
+        # que sumar todas antes de cortar
+        una_fuente = (1 if dias else 0) + len(tramos) == 1
+        top = "TOP (?)" if una_fuente else ""
+        parciales = []
+        
+        if dias:
+            params = (limite, *dias) if una_fuente else dias
+            parciales.append(execute_query(f"""
+            SELECT {top}
+                p.id_productos,
+                p.nombre,
+                p.codigo_barras,
+                SUM(r.total_vendido) as total_vendido,
+                SUM(r.total_ingresos) as total_ingresos,
+                SUM(r.veces_vendido) as veces_vendido
+            FROM ventas_productos_diario r
+            INNER JOIN productos p ON r.fk_productos = p.id_productos
+            WHERE r.fecha BETWEEN ? AND ?
+            GROUP BY p.id_productos, p.nombre, p.codigo_barras
+            ORDER BY total_vendido DESC
+            """, params, fetch_all=True))
+        
+        for desde, hasta in tramos:
+            params = (desde, hasta, Config.ESTATUS_ACTIVO)
+            parciales.append(execute_query(f"""
+            SELECT {top}
                 p.id_productos,
                 p.nombre,
                 p.codigo_barras,
@@ -43,100 +181,152 @@ class ReporteService:
             FROM ventas_detalles vd
             INNER JOIN productos p ON vd.fk_productos = p.id_productos
             INNER JOIN ventas v ON vd.fk_ventas = v.id_ventas
-            WHERE v.fecha_ventas BETWEEN ? AND ?
+            WHERE v.fecha_ventas >= ? AND v.fecha_ventas < ?
             AND v.fk_estatus_general = ?
             GROUP BY p.id_productos, p.nombre, p.codigo_barras
             ORDER BY total_vendido DESC
-            LIMIT ?
-            """
-            return execute_query(query, (fecha_inicio, fecha_fin, Config.ESTATUS_ACTIVO, limite), fetch_all=True)
-        except Exception as e:
-            print(f"[REPORTE] Error obteniendo productos más vendidos: {e}")
-            return []
+            """, (limite, *params) if una_fuente else params, fetch_all=True))
+        
+        productos = _combinar(parciales, 'id_productos', ('total_vendido', 'total_ingresos', 'veces_vendido'))
+        productos.sort(key=lambda fila: fila['total_vendido'], reverse=True)
+        return productos[:limite]
     
     @staticmethod
     def obtener_ventas_por_empleado(fecha_inicio, fecha_fin):
         """Obtener ventas por empleado"""
         try:
-            query = """
+            return reporte_cache.obtener(
+                'ventas_empleados', fecha_inicio, fecha_fin,
+                lambda: ReporteService._ventas_por_empleado(fecha_inicio, fecha_fin)
+            )
+        except Exception as e:
+            print(f"[REPORTE] Error obteniendo ventas por empleado: {e}")
+            return []
+    
+    @staticmethod
+    def _ventas_por_empleado(fecha_inicio, fecha_fin):
+        dias, tramos = ReporteService._fuentes(fecha_inicio, fecha_fin)
+        parciales = []
+        
+        if dias:
+            parciales.append(execute_query("""
+            SELECT 
+                e.id_empleados,
+                e.nombre + ' ' + e.apellido_1 as empleado_nombre,
+                SUM(r.total_ventas) as total_ventas,
+                SUM(r.total_ingresos) as total_ingresos
+            FROM ventas_resumen_diario r
+            INNER JOIN empleados e ON r.fk_empleados = e.id_empleados
+            WHERE r.fecha BETWEEN ? AND ?
+            GROUP BY e.id_empleados, e.nombre, e.apellido_1
+            """, dias, fetch_all=True))
+        
+        for desde, hasta in tramos:
+            parciales.append(execute_query("""
             SELECT 
                 e.id_empleados,
                 e.nombre + ' ' + e.apellido_1 as empleado_nombre,
                 COUNT(v.id_ventas) as total_ventas,
-                SUM(v.total_neto) as total_ingresos,
-                AVG(v.total_neto) as promedio_venta
+                SUM(v.total_neto) as total_ingresos
             FROM ventas v
             INNER JOIN empleados e ON v.fk_empleados = e.id_empleados
-            WHERE v.fecha_ventas BETWEEN ? AND ?
+            WHERE v.fecha_ventas >= ? AND v.fecha_ventas < ?
             AND v.fk_estatus_general = ?
             GROUP BY e.id_empleados, e.nombre, e.apellido_1
-            ORDER BY total_ingresos DESC
-            """
-            return execute_query(query, (fecha_inicio, fecha_fin, Config.ESTATUS_ACTIVO), fetch_all=True)
-        except Exception as e:
-            print(f"[REPORTE] Error obteniendo ventas por empleado: {e}")
-            return []
+            """, (desde, hasta, Config.ESTATUS_ACTIVO), fetch_all=True))
+        
+        empleados = _combinar(parciales, 'id_empleados', ('total_ventas', 'total_ingresos'))
+        for empleado in empleados:
+            empleado['promedio_venta'] = empleado['total_ingresos'] / empleado['total_ventas']
+        empleados.sort(key=lambda fila: fila['total_ingresos'], reverse=True)
+        return empleados
     
     @staticmethod
     def obtener_ventas_por_metodo_pago(fecha_inicio, fecha_fin):
         """Obtener ventas por método de pago"""
         try:
-            query = """
+            return reporte_cache.obtener(
+                'ventas_metodos_pago', fecha_inicio, fecha_fin,
+                lambda: ReporteService._ventas_por_metodo_pago(fecha_inicio, fecha_fin)
+            )
+        except Exception as e:
+            print(f"[REPORTE] Error obteniendo ventas por método pago: {e}")
+            return []
+    
+    @staticmethod
+    def _ventas_por_metodo_pago(fecha_inicio, fecha_fin):
+        dias, tramos = ReporteService._fuentes(fecha_inicio, fecha_fin)
+        parciales = []
+        
+        if dias:
+            parciales.append(execute_query("""
             SELECT 
-                mp.id_metodo_pago,
-                mp.forma_pago,
+                r.fk_metodo_pago as id_metodo_pago,
+                SUM(r.total_ventas) as total_ventas,
+                SUM(r.total_ingresos) as total_ingresos
+            FROM ventas_resumen_diario r
+            WHERE r.fecha BETWEEN ? AND ?
+            GROUP BY r.fk_metodo_pago
+            """, dias, fetch_all=True))
+        
+        for desde, hasta in tramos:
+            parciales.append(execute_query("""
+            SELECT 
+                v.fk_metodo_pago as id_metodo_pago,
                 COUNT(v.id_ventas) as total_ventas,
                 SUM(v.total_neto) as total_ingresos
             FROM ventas v
-            INNER JOIN metodo_pago mp ON v.fk_metodo_pago = mp.id_metodo_pago
-            WHERE v.fecha_ventas BETWEEN ? AND ?
+            WHERE v.fecha_ventas >= ? AND v.fecha_ventas < ?
             AND v.fk_estatus_general = ?
-            GROUP BY mp.id_metodo_pago, mp.forma_pago
-            ORDER BY total_ingresos DESC
-            """
-            return execute_query(query, (fecha_inicio, fecha_fin, Config.ESTATUS_ACTIVO), fetch_all=True)
-        except Exception as e:
-            print(f"[REPORTE] Error obteniendo ventas por método pago: {e}")
-            return []
+            GROUP BY v.fk_metodo_pago
+            """, (desde, hasta, Config.ESTATUS_ACTIVO), fetch_all=True))
+        
+        metodos = []
+        for metodo in _combinar(parciales, 'id_metodo_pago', ('total_ventas', 'total_ingresos')):
+            # Solo métodos registrados en el catálogo, como hacía el INNER JOIN
+            forma_pago = CatalogoService.nombre('metodo_pago', metodo['id_metodo_pago'])
+            if forma_pago is not None:
+                metodo['forma_pago'] = forma_pago
+                metodos.append(metodo)
+        metodos.sort(key=lambda fila: fila['total_ingresos'], reverse=True)
+        return metodos
     
     @staticmethod
-    def obtener_estadisticas_inventario():
-        """Obtener estadísticas de inventario"""
+    def obtener_estadisticas_inventario(fuente='existencias'):
+        """Obtener estadísticas de inventario, totales y por categoría.
+        
+        Una sola pasada agrupada por categoría sobre productos y su existencia
+        neta; los totales se suman en Python a partir de las categorías.
+        fuente='ledger' calcula la existencia con un GROUP BY sobre
+        movimiento_detalles en lugar de leer productos_existencias.
+        """
         try:
-            query = """
-            SELECT 
-                COUNT(*) as total_productos,
-                COUNT(CASE WHEN p.fk_estatus_general = ? THEN 1 END) as productos_activos,
-                SUM(CASE 
-                    WHEN (
-                        SELECT COALESCE(SUM(md.cantidad), 0) 
-                        FROM movimiento_detalles md
-                        INNER JOIN movimiento m ON md.fk_movimiento = m.id_movimiento
-                        WHERE md.fk_productos = p.id_productos AND m.fk_movimiento_tipo = 1
-                    ) - 
-                    COALESCE((
-                        SELECT SUM(md.cantidad) 
-                        FROM movimiento_detalles md
-                        INNER JOIN movimiento m ON md.fk_movimiento = m.id_movimiento
-                        WHERE md.fk_productos = p.id_productos AND m.fk_movimiento_tipo = 2
-                    ), 0) <= p.stock_minimo THEN 1 ELSE 0 
-                END) as productos_stock_bajo,
-                SUM(p.precio_venta * (
-                    SELECT COALESCE(SUM(md.cantidad), 0) 
-                    FROM movimiento_detalles md
-                    INNER JOIN movimiento m ON md.fk_movimiento = m.id_movimiento
-                    WHERE md.fk_productos = p.id_productos AND m.fk_movimiento_tipo = 1
-                ) - 
-                COALESCE((
-                    SELECT SUM(md.cantidad) 
-                    FROM movimiento_detalles md
-                    INNER JOIN movimiento m ON md.fk_movimiento = m.id_movimiento
-                    WHERE md.fk_productos = p.id_productos AND m.fk_movimiento_tipo = 2
-                ), 0)) as valor_inventario_estimado
-            FROM productos p
-            WHERE p.fk_estatus_general = ?
-            """
-            return execute_query(query, (Config.ESTATUS_ACTIVO, Config.ESTATUS_ACTIVO), fetch=True)
+            origen = ESTADISTICAS_ORIGENES[fuente]
+            if fuente == 'existencias':
+                ExistenciasService.asegurar_tabla()
+            activo = Config.ESTATUS_ACTIVO
+            categorias = execute_query(
+                ESTADISTICAS_INVENTARIO_QUERY.format(origen=origen),
+                (activo, activo, activo, activo, activo, activo),
+                fetch_all=True
+            ) or []
+            
+            totales = {columna: 0 for columna in ESTADISTICAS_SUMAS}
+            for categoria in categorias:
+                for columna in ESTADISTICAS_SUMAS:
+                    categoria[columna] = categoria[columna] or 0
+                    totales[columna] += categoria[columna]
+            
+            CatalogoService.resolver_nombres(categorias, {'categoria_nombre': ('categorias', 'fk_categorias')})
+            categorias.sort(key=lambda fila: fila['valor_inventario_costo'], reverse=True)
+            
+            return {
+                **totales,
+                'valor_inventario_estimado': totales['valor_inventario_venta'],
+                'margen_potencial': totales['valor_inventario_venta'] - totales['valor_inventario_costo'],
+                'fuente': fuente,
+                'por_categoria': categorias
+            }
         except Exception as e:
             print(f"[REPORTE] Error obteniendo estadísticas inventario: {e}")
-            return {}
\ No newline at end of file
+            return {}
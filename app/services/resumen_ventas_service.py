@@ -0,0 +1,230 @@
+import threading
+from datetime import date, datetime, time, timedelta
+from app.database.db_connection import DatabaseManager, execute_query
+from config import Config
+
+CREAR_TABLAS_QUERY = """
+IF OBJECT_ID('dbo.ventas_resumen_diario', 'U') IS NULL
+CREATE TABLE dbo.ventas_resumen_diario (
+    fecha DATE NOT NULL,
+    fk_empleados INT NOT NULL,
+    fk_metodo_pago INT NOT NULL,
+    fk_ventas_tipo INT NOT NULL,
+    total_ventas INT NOT NULL,
+    total_ingresos DECIMAL(18, 2) NOT NULL,
+    total_impuestos DECIMAL(18, 2) NOT NULL,
+    total_descuentos DECIMAL(18, 2) NOT NULL,
+    PRIMARY KEY (fecha, fk_empleados, fk_metodo_pago, fk_ventas_tipo)
+);
+IF OBJECT_ID('dbo.ventas_productos_diario', 'U') IS NULL
+CREATE TABLE dbo.ventas_productos_diario (
+    fecha DATE NOT NULL,
+    fk_productos INT NOT NULL,
+    total_vendido INT NOT NULL,
+    total_ingresos DECIMAL(18, 2) NOT NULL,
+    veces_vendido INT NOT NULL,
+    PRIMARY KEY (fecha, fk_productos)
+);
+IF OBJECT_ID('dbo.ventas_resumen_control', 'U') IS NULL
+CREATE TABLE dbo.ventas_resumen_control (
+    id INT NOT NULL PRIMARY KEY,
+    consolidado_hasta DATE NULL,
+    fecha_actualizacion DATETIME NOT NULL DEFAULT GETDATE()
+);
+"""
+
+_lock = threading.Lock()
+_tablas_listas = False
+_consolidado_hasta = None  # copia en memoria de la marca de agua
+
+def _a_datetime(valor, fin=False):
+    """'YYYY-MM-DD' o ISO con hora -> datetime; una fecha final sin hora incluye todo el día"""
+    if isinstance(valor, datetime):
+        return valor
+    if isinstance(valor, date):
+        dia = datetime.combine(valor, time.min)
+        return dia + timedelta(days=1) if fin else dia
+    texto = str(valor).strip()
+    resultado = datetime.fromisoformat(texto)
+    if fin and len(texto) <= 10:
+        resultado += timedelta(days=1)
+    return resultado
+
+def ultimo_dia_cerrado(ahora=None):
+    """Último día que ya no puede recibir ventas.
+    
+    Un día cierra RESUMENES_VENTANA_SEGUNDOS después de la medianoche: una
+    venta fechada a las 23:59 puede confirmar unos segundos más tarde.
+    """
+    ahora = ahora or datetime.now()
+    return (ahora - timedelta(seconds=Config.RESUMENES_VENTANA_SEGUNDOS)).date() - timedelta(days=1)
+
+def rango_fechas(fecha_inicio, fecha_fin):
+    """Rango [inicio, fin) como datetimes"""
+    return _a_datetime(fecha_inicio), _a_datetime(fecha_fin, fin=True)
+
+def dividir_rango(fecha_inicio, fecha_fin, hoy=None):
+    """Separar [inicio, fin] en días cerrados completos y tramos a leer de ventas.
+    
+    Regresa ((primer_dia, ultimo_dia) o None, [(desde, hasta_exclusivo), ...]).
+    Los días completos ya cerrados (ver ultimo_dia_cerrado) salen de los
+    resúmenes; las orillas con hora parcial y los días abiertos se leen de
+    las tablas de ventas.
+    """
+    cerrado = hoy - timedelta(days=1) if hoy else ultimo_dia_cerrado()
+    inicio, fin = rango_fechas(fecha_inicio, fecha_fin)
+    if fin <= inicio:
+        return None, []
+    
+    primer_dia = inicio.date() if inicio.time() == time.min else inicio.date() + timedelta(days=1)
+    # Último día completo del rango, sin pasar del último día cerrado
+    ultimo_dia = min(fin.date() - timedelta(days=1), cerrado)
+    
+    if primer_dia > ultimo_dia:
+        return None, [(inicio, fin)]
+    
+    tramos = []
+    desde_dias = datetime.combine(primer_dia, time.min)
+    hasta_dias = datetime.combine(ultimo_dia + timedelta(days=1), time.min)
+    if inicio < desde_dias:
+        tramos.append((inicio, desde_dias))
+    if hasta_dias < fin:
+        tramos.append((hasta_dias, fin))
+    return (primer_dia, ultimo_dia), tramos
+
+class ResumenVentasService:
+    """Resúmenes diarios de ventas para los reportes.
+    
+    ventas_resumen_diario agrega por día × empleado × método de pago × tipo
+    de venta y ventas_productos_diario por día × producto. Cada día se
+    consolida una sola vez, cuando ya cerró (RESUMENES_VENTANA_SEGUNDOS después
+    de la medianoche): la primera consulta posterior (o `python manage.py
+    resumenes`) agrega los días pendientes y avanza la marca de agua. Los
+    días abiertos siempre se leen de ventas.
+    """
+    
+    @staticmethod
+    def asegurar_consolidado(hoy=None):
+        """Consolidar todos los días cerrados que falten; regresa el último consolidado"""
+        global _consolidado_hasta
+        ayer = hoy - timedelta(days=1) if hoy else ultimo_dia_cerrado()
+        if _consolidado_hasta is not None and _consolidado_hasta >= ayer:
+            return _consolidado_hasta
+        
+        with _lock:
+            if _consolidado_hasta is None or _consolidado_hasta < ayer:
+                _consolidado_hasta = ResumenVentasService.consolidar(hasta=ayer)
+        return _consolidado_hasta
+    
+    @staticmethod
+    def consolidar(hasta, desde=None):
+        """Recalcular desde ventas los días [desde, hasta] y avanzar la marca de agua.
+        
+        Sin `desde` se continúa a partir de la marca de agua (o de la primera
+        venta registrada). Todo ocurre en una transacción y con la fila de
+        control bloqueada, así dos procesos no consolidan el mismo día a la vez.
+        """
+        global _tablas_listas
+        with DatabaseManager().transaction() as cursor:
+            if not _tablas_listas:
+                cursor.execute(CREAR_TABLAS_QUERY)
+            
+            cursor.execute(
+                "SELECT consolidado_hasta FROM ventas_resumen_control WITH (UPDLOCK, HOLDLOCK) WHERE id = 1"
+            )
+            row = cursor.fetchone()
+            marca = row[0] if row else None
+            if row is None:
+                cursor.execute("INSERT INTO ventas_resumen_control (id, consolidado_hasta) VALUES (1, NULL)")
+            marca = _a_fecha(marca)
+            
+            if desde is None:
+                if marca is not None:
+                    desde = marca + timedelta(days=1)
+                else:
+                    cursor.execute("SELECT MIN(fecha_ventas) FROM ventas")
+                    primera = cursor.fetchone()[0]
+                    desde = _a_fecha(primera) if primera else hasta + timedelta(days=1)
+            
+            if desde <= hasta:
+                inicio = datetime.combine(desde, time.min)
+                fin = datetime.combine(hasta + timedelta(days=1), time.min)
+                ResumenVentasService._reconstruir(cursor, desde, hasta, inicio, fin)
+                print(f"[RESUMENES] Días consolidados: {desde} a {hasta}")
+            
+            nueva_marca = max(marca, hasta) if marca else hasta
+            cursor.execute(
+                "UPDATE ventas_resumen_control SET consolidado_hasta = ?, fecha_actualizacion = GETDATE() WHERE id = 1",
+                (nueva_marca,)
+            )
+        # Solo tras el commit: si la transacción se revierte, la creación también
+        _tablas_listas = True
+        return nueva_marca
+    
+    @staticmethod
+    def _reconstruir(cursor, desde, hasta, inicio, fin):
+        cursor.execute("DELETE FROM ventas_resumen_diario WHERE fecha BETWEEN ? AND ?", (desde, hasta))
+        cursor.execute("""
+        INSERT INTO ventas_resumen_diario (
+            fecha, fk_empleados, fk_metodo_pago, fk_ventas_tipo,
+            total_ventas, total_ingresos, total_impuestos, total_descuentos
+        )
+        SELECT CAST(v.fecha_ventas AS DATE),
+               COALESCE(v.fk_empleados, 0),
+               COALESCE(v.fk_metodo_pago, 0),
+               COALESCE(v.fk_ventas_tipo, 0),
+               COUNT(*),
+               COALESCE(SUM(v.total_neto), 0),
+               COALESCE(SUM(v.impuestos), 0),
+               COALESCE(SUM(v.descuentos), 0)
+        FROM ventas v
+        WHERE v.fecha_ventas >= ? AND v.fecha_ventas < ?
+        AND v.fk_estatus_general = ?
+        GROUP BY CAST(v.fecha_ventas AS DATE), COALESCE(v.fk_empleados, 0),
+                 COALESCE(v.fk_metodo_pago, 0), COALESCE(v.fk_ventas_tipo, 0)
+        """, (inicio, fin, Config.ESTATUS_ACTIVO))
+        
+        cursor.execute("DELETE FROM ventas_productos_diario WHERE fecha BETWEEN ? AND ?", (desde, hasta))
+        cursor.execute("""
+        INSERT INTO ventas_productos_diario (
+            fecha, fk_productos, total_vendido, total_ingresos, veces_vendido
+        )
+        SELECT CAST(v.fecha_ventas AS DATE),
+               vd.fk_productos,
+               SUM(vd.cantidad_productos),
+               COALESCE(SUM(vd.importe_total), 0),
+               COUNT(DISTINCT vd.fk_ventas)
+        FROM ventas_detalles vd
+        INNER JOIN ventas v ON vd.fk_ventas = v.id_ventas
+        WHERE v.fecha_ventas >= ? AND v.fecha_ventas < ?
+        AND v.fk_estatus_general = ?
+        GROUP BY CAST(v.fecha_ventas AS DATE), vd.fk_productos
+        """, (inicio, fin, Config.ESTATUS_ACTIVO))
+    
+    @staticmethod
+    def reconstruir(desde, hasta):
+        """Volver a consolidar días ya cerrados (p. ej. tras corregir ventas a mano)"""
+        global _consolidado_hasta
+        hasta = min(hasta, ultimo_dia_cerrado())
+        with _lock:
+            _consolidado_hasta = ResumenVentasService.consolidar(hasta=hasta, desde=desde)
+        return _consolidado_hasta
+    
+    @staticmethod
+    def estado():
+        row = execute_query(
+            "SELECT consolidado_hasta, fecha_actualizacion FROM ventas_resumen_control WHERE id = 1",
+            fetch=True
+        )
+        return {
+            'consolidado_hasta': _a_fecha(row['consolidado_hasta']) if row else None,
+            'fecha_actualizacion': row['fecha_actualizacion'] if row else None
+        }
+
+def _a_fecha(valor):
+    """DATE de pyodbc puede llegar como date o como texto según el driver"""
+    if valor is None or isinstance(valor, date) and not isinstance(valor, datetime):
+        return valor
+    if isinstance(valor, datetime):
+        return valor.date()
+    return date.fromisoformat(str(valor)[:10])
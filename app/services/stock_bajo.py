@@ -0,0 +1,144 @@
+import math
+import threading
+import time
+from app.database.db_connection import execute_query
+from app.services.eventos import eventos
+from app.services.existencias_service import ExistenciasService
+from app.services.product_catalog import product_catalog
+from config import Config
+
+class MotorStockBajo:
+    """Productos activos con existencia baja, evaluados movimiento por movimiento.
+    
+    Se carga una vez con una consulta al catálogo completo y después solo se
+    revisan los productos que cambian: cada servicio que registra un
+    movimiento llama a evaluar() con la existencia nueva.
+    
+    Con histéresis: un producto entra al llegar a stock_minimo y sale hasta
+    superar stock_minimo + margen (`histeresis` del mínimo, al menos una
+    unidad y sin pasar de stock_maximo). Así una venta y una devolución
+    alrededor del mínimo no generan una alerta tras otra. Solo los cruces
+    se publican: low_stock_warning al entrar y low_stock_cleared al salir.
+    
+    Los movimientos de otros procesos no pasan por aquí; el conjunto se
+    recarga completo al consultarlo si tiene más de `recarga` segundos.
+    """
+    
+    def __init__(self, histeresis, recarga):
+        self.histeresis = histeresis
+        self.recarga = recarga
+        self._bajos = {}  # producto_id -> existencia
+        self._lock = threading.Lock()
+        self.cargado_en = None
+        self.alertas = 0
+        self.recuperados = 0
+        self.recargas = 0
+    
+    def margen(self, record):
+        minimo = record.stock_minimo or 0
+        margen = max(1, math.ceil(minimo * self.histeresis))
+        maximo = record.stock_maximo or 0
+        if maximo > minimo:
+            margen = min(margen, maximo - minimo)
+        return margen
+    
+    def cargar(self, publicar=False):
+        """Recalcular el conjunto desde la base; con publicar, avisar los cruces"""
+        ExistenciasService.asegurar_tabla()
+        # Candidatos: hasta stock_minimo + margen, que nunca pasa de minimo * (1 + histeresis) + 1
+        rows = execute_query(
+            """
+            SELECT p.id_productos, COALESCE(pe.existencia, 0) as stock_actual
+            FROM productos p
+            LEFT JOIN productos_existencias pe ON pe.fk_productos = p.id_productos
+            WHERE p.fk_estatus_general = ?
+            AND COALESCE(pe.existencia, 0) <= p.stock_minimo * ? + 1
+            """,
+            (Config.ESTATUS_ACTIVO, 1 + self.histeresis), fetch_all=True
+        ) or []
+        existencias = {row['id_productos']: row['stock_actual'] for row in rows}
+        
+        with self._lock:
+            cargado = self.cargado_en is not None
+            anteriores = self._bajos if cargado else {}
+            # Los que ya estaban bajos y no aparecen subieron por encima del margen
+            for producto_id in anteriores.keys() - existencias.keys():
+                existencias[producto_id] = None
+            self._bajos = dict(anteriores)
+            cruces = self._evaluar(existencias)
+            self.cargado_en = time.monotonic()
+            self.recargas += 1
+        
+        if publicar and cargado:
+            self._publicar(cruces)
+        return len(self._bajos)
+    
+    def evaluar(self, existencias):
+        """Existencia nueva de los productos que se movieron: {producto_id: existencia}"""
+        with self._lock:
+            if self.cargado_en is None:
+                return  # la primera carga ya verá la existencia nueva
+            cruces = self._evaluar(existencias)
+        self._publicar(cruces)
+    
+    def _evaluar(self, existencias):
+        cruces = []
+        for producto_id, existencia in existencias.items():
+            record = product_catalog.get(producto_id)
+            bajo = producto_id in self._bajos
+            if record is None:
+                # Producto dado de baja
+                self._bajos.pop(producto_id, None)
+                continue
+            minimo = record.stock_minimo or 0
+            if existencia is None:
+                # No salió en la consulta: está por encima de cualquier margen
+                if bajo:
+                    del self._bajos[producto_id]
+                    cruces.append((False, record, None))
+            elif not bajo and existencia <= minimo:
+                self._bajos[producto_id] = existencia
+                cruces.append((True, record, existencia))
+            elif bajo and existencia > minimo + self.margen(record):
+                del self._bajos[producto_id]
+                cruces.append((False, record, existencia))
+            elif bajo:
+                self._bajos[producto_id] = existencia
+        return cruces
+    
+    def _publicar(self, cruces):
+        for entra, record, existencia in cruces:
+            if entra:
+                self.alertas += 1
+                eventos.stock_bajo(record.id_productos, record.nombre, existencia, record.stock_minimo)
+            else:
+                self.recuperados += 1
+                eventos.stock_recuperado(record.id_productos, record.nombre, existencia, record.stock_minimo)
+    
+    def productos(self):
+        """Productos en el conjunto con sus datos de catálogo y stock_actual"""
+        if self.cargado_en is None or time.monotonic() - self.cargado_en > self.recarga:
+            self.cargar(publicar=True)
+        with self._lock:
+            bajos = sorted(self._bajos.items())
+        productos = []
+        for producto_id, existencia in bajos:
+            record = product_catalog.get(producto_id)
+            if record is not None:
+                producto = record.to_dict()
+                producto['stock_actual'] = existencia
+                productos.append(producto)
+        return productos
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'cargado': self.cargado_en is not None,
+                'productos': len(self._bajos),
+                'histeresis': self.histeresis,
+                'alertas': self.alertas,
+                'recuperados': self.recuperados,
+                'recargas': self.recargas
+            }
+
+stock_bajo = MotorStockBajo(Config.STOCK_BAJO_HISTERESIS, Config.STOCK_BAJO_RECARGA)
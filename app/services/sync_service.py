@@ -0,0 +1,245 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+from app.database.db_connection import DatabaseManager, execute_query
+from app.database.paginacion import codificar_cursor, decodificar_cursor
+from app.services.catalogo_service import CATALOGOS, CatalogoService
+from config import Config
+
+CREAR_TABLA_QUERY = """
+IF OBJECT_ID('dbo.cambios_sync', 'U') IS NULL
+CREATE TABLE dbo.cambios_sync (
+    id_cambio BIGINT IDENTITY(1,1) NOT NULL PRIMARY KEY,
+    entidad VARCHAR(30) NOT NULL,
+    fk_registro INT NOT NULL,
+    fecha_cambio DATETIME NOT NULL DEFAULT GETDATE()
+)
+"""
+
+ENTIDAD_PRODUCTO = 'productos'
+ENTIDAD_CLIENTE = 'clientes'
+
+# Lo que guarda una terminal de cada entidad: columnas, origen y llave
+ENTIDADES = {
+    ENTIDAD_PRODUCTO: {
+        'columnas': (
+            'id_productos', 'nombre', 'codigo_barras', 'precio_venta', 'stock_minimo', 'stock_maximo',
+            'descripcion', 'fk_marcas', 'fk_categorias', 'fk_unidades_medida'
+        ),
+        'select': "p.*",
+        'origen': "productos p",
+        'llave': "p.id_productos",
+        'estatus': "p.fk_estatus_general"
+    },
+    ENTIDAD_CLIENTE: {
+        'columnas': (
+            'id_clientes', 'nombre', 'rfc', 'limite_credito', 'saldo_actual', 'telefono', 'correo_electronico'
+        ),
+        'select': "c.*, t.telefono, co.correo_electronico",
+        'origen': """
+        clientes c
+        LEFT JOIN telefonos t ON c.fk_telefonos = t.id_telefono
+        LEFT JOIN correos_electronicos co ON c.fk_correo_electronico = co.id_correo_electronico
+        """,
+        'llave': "c.id_clientes",
+        'estatus': "c.fk_estatus_general"
+    }
+}
+
+# Máximo de parámetros por IN (SQL Server admite 2100 por consulta)
+BLOQUE_IN = 1000
+
+class TokenSyncInvalidoError(ValueError):
+    """El token no es uno emitido por /api/sync/changes"""
+
+_tabla_lista = False
+
+class SyncService:
+    """Cambios de productos, clientes y catálogos para terminales con copia local.
+    
+    Cada escritura de la API anota en cambios_sync la entidad y el registro
+    que cambió. Una terminal pide GET /api/sync/changes?since=<token> y
+    recibe el estado actual de los registros que cambiaron desde ese token
+    (varias ediciones del mismo registro salen una vez) más los que se
+    dieron de baja. Sin token recibe todo lo activo.
+    
+    Los catálogos no tienen rutas de escritura: el token lleva una huella
+    de su contenido y, si cambió, se mandan completos (son pocos renglones).
+    Las filas van como listas en el orden de `columnas` para no repetir
+    los nombres de campo en cada renglón.
+    
+    Los id_cambio se asignan al insertar pero se ven al confirmar: una
+    venta a crédito larga puede confirmar un id menor al último que ya se
+    entregó. Por eso el token guarda además el último id anterior a
+    SYNC_VENTANA_SEGUNDOS (`piso`) y cada delta vuelve a leer lo que hay
+    entre ese piso y el último entregado; repetir un registro es inofensivo
+    porque se manda su estado actual.
+    
+    Los cambios hechos directo en la base (semilla, scripts) no pasan por
+    aquí; después de uno de esos las terminales deben pedir sin token.
+    """
+    
+    @staticmethod
+    def registrar(entidad, registro_ids, cursor=None):
+        """Anotar que cambiaron los registros; con cursor, dentro de esa transacción.
+        
+        Con cursor un fallo se propaga para que la transacción se revierta.
+        Sin cursor la escritura ya está confirmada: un fallo aquí solo se
+        reporta en el log para no convertir el cambio en un error.
+        """
+        filas = [(entidad, registro_id) for registro_id in registro_ids if registro_id is not None]
+        if not filas:
+            return
+        query = "INSERT INTO cambios_sync (entidad, fk_registro, fecha_cambio) VALUES (?, ?, GETDATE())"
+        if cursor is not None:
+            if not _tabla_lista:
+                # Normalmente ya la creó asegurar_tabla() al iniciar. Otra
+                # conexión esperaría el lock del llamador (SQLite), así que se
+                # crea en su transacción; la bandera no se marca porque la
+                # creación se revierte con ella si la transacción falla
+                cursor.execute(CREAR_TABLA_QUERY)
+            cursor.executemany(query, filas)
+            return
+        try:
+            SyncService.asegurar_tabla()
+            with DatabaseManager().transaction() as cursor:
+                cursor.executemany(query, filas)
+        except Exception as e:
+            print(f"[SYNC] Error registrando cambio de {entidad} {registro_ids}: {e}")
+    
+    @staticmethod
+    def cambios(token=None, limite=None):
+        """Cambios desde el token, o todo lo activo sin token"""
+        limite = limite or Config.SYNC_LIMITE_CAMBIOS
+        piso, ultimo, huella = SyncService._leer_token(token) if token else (None, None, None)
+        catalogos, huella_actual = SyncService._catalogos()
+        
+        # Las marcas se toman antes de leer: lo que cambie mientras tanto
+        # vuelve a salir en la siguiente sincronización
+        confirmado = SyncService._confirmado()
+        if ultimo is None:
+            ultimo_nuevo = SyncService._ultimo_cambio()
+            datos = {
+                entidad: SyncService._filas(entidad) for entidad in ENTIDADES
+            }
+            hay_mas = False
+        else:
+            rows = execute_query(
+                "SELECT TOP (?) id_cambio, entidad, fk_registro FROM cambios_sync "
+                "WHERE id_cambio > ? ORDER BY id_cambio",
+                (limite, ultimo), fetch_all=True
+            ) or []
+            # Ventana: entre el piso y lo ya entregado pudo confirmar algo tarde
+            repetidos = []
+            if piso < ultimo:
+                repetidos = execute_query(
+                    "SELECT DISTINCT entidad, fk_registro FROM cambios_sync "
+                    "WHERE id_cambio > ? AND id_cambio <= ?",
+                    (piso, ultimo), fetch_all=True
+                ) or []
+            cambiados = {entidad: set() for entidad in ENTIDADES}
+            for row in rows + repetidos:
+                if row['entidad'] in cambiados:
+                    cambiados[row['entidad']].add(row['fk_registro'])
+            datos = {
+                entidad: SyncService._filas(entidad, sorted(ids))
+                for entidad, ids in cambiados.items()
+            }
+            ultimo_nuevo = rows[-1]['id_cambio'] if rows else ultimo
+            hay_mas = len(rows) == limite
+        
+        piso_nuevo = ultimo_nuevo if confirmado is None else min(confirmado, ultimo_nuevo)
+        datos['catalogos'] = catalogos if huella != huella_actual else None
+        datos['completo'] = ultimo is None
+        datos['has_more'] = hay_mas
+        datos['token'] = codificar_cursor([piso_nuevo, ultimo_nuevo, huella_actual])
+        return datos
+    
+    @staticmethod
+    def _leer_token(token):
+        try:
+            piso, ultimo, huella = decodificar_cursor(token, 3)
+            piso, ultimo = int(piso), int(ultimo)
+        except Exception:
+            raise TokenSyncInvalidoError('Token de sincronización inválido')
+        if not 0 <= piso <= ultimo:
+            raise TokenSyncInvalidoError('Token de sincronización inválido')
+        return piso, ultimo, huella
+    
+    @staticmethod
+    def asegurar_tabla():
+        """Crear cambios_sync si no existe, en su propia transacción"""
+        global _tabla_lista
+        if not _tabla_lista:
+            with DatabaseManager().transaction() as cursor:
+                cursor.execute(CREAR_TABLA_QUERY)
+            _tabla_lista = True
+    
+    @staticmethod
+    def _ultimo_cambio():
+        SyncService.asegurar_tabla()
+        row = execute_query("SELECT MAX(id_cambio) as ultimo FROM cambios_sync", fetch=True)
+        return (row or {}).get('ultimo') or 0
+    
+    @staticmethod
+    def _confirmado():
+        """Último id anotado antes de la ventana; None si la ventana está desactivada.
+        
+        Supone que ninguna transacción que anota cambios dura más que
+        SYNC_VENTANA_SEGUNDOS (ni que el reloj de la base y el de la API
+        difieren en más que eso).
+        """
+        if Config.SYNC_VENTANA_SEGUNDOS <= 0:
+            return None
+        SyncService.asegurar_tabla()
+        limite = (datetime.now() - timedelta(seconds=Config.SYNC_VENTANA_SEGUNDOS)).replace(microsecond=0)
+        row = execute_query(
+            "SELECT TOP 1 id_cambio FROM cambios_sync WHERE fecha_cambio < ? ORDER BY id_cambio DESC",
+            (limite,), fetch=True
+        )
+        return (row or {}).get('id_cambio') or 0
+    
+    @staticmethod
+    def _filas(entidad, ids=None):
+        """Renglones actuales como listas; con ids, también los que ya no están activos"""
+        definicion = ENTIDADES[entidad]
+        columnas = definicion['columnas']
+        base = f"SELECT {definicion['select']} FROM {definicion['origen']}"
+        if ids is None:
+            rows = execute_query(
+                f"{base} WHERE {definicion['estatus']} = ? ORDER BY {definicion['llave']}",
+                (Config.ESTATUS_ACTIVO,), fetch_all=True
+            ) or []
+            bajas = []
+        else:
+            rows = []
+            for inicio in range(0, len(ids), BLOQUE_IN):
+                bloque = ids[inicio:inicio + BLOQUE_IN]
+                rows += execute_query(
+                    f"{base} WHERE {definicion['llave']} IN ({', '.join('?' for _ in bloque)}) "
+                    f"ORDER BY {definicion['llave']}",
+                    tuple(bloque), fetch_all=True
+                ) or []
+            activos = [row for row in rows if row['fk_estatus_general'] == Config.ESTATUS_ACTIVO]
+            vigentes = {row[columnas[0]] for row in activos}
+            bajas = [registro_id for registro_id in ids if registro_id not in vigentes]
+            rows = activos
+        return {
+            'columnas': columnas,
+            'filas': [[row.get(columna) for columna in columnas] for row in rows],
+            'bajas': bajas
+        }
+    
+    @staticmethod
+    def _catalogos():
+        """Catálogos completos desde la caché y una huella corta de su contenido"""
+        catalogos = {}
+        for catalogo in CATALOGOS:
+            rows = CatalogoService.obtener(catalogo)
+            columnas = sorted(rows[0]) if rows else []
+            catalogos[catalogo] = {
+                'columnas': columnas,
+                'filas': [[row.get(columna) for columna in columnas] for row in rows]
+            }
+        contenido = json.dumps(catalogos, sort_keys=True, default=str).encode('utf-8')
+        return catalogos, hashlib.sha1(contenido).hexdigest()[:12]
@@ -0,0 +1,149 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from app.services.apagado import ServidorDeteniendoseError, apagado
+from app.services.eventos import eventos
+from app.services.idempotencia import idempotencia_ventas
+from app.services.venta_service import VentaService
+from config import Config
+
+TICKET_PENDIENTE = 'pendiente'
+TICKET_PROCESANDO = 'procesando'
+TICKET_COMPLETADO = 'completado'
+TICKET_RECHAZADO = 'rechazado'
+
+class ColaLlenaError(Exception):
+    """Hay demasiadas ventas esperando a un worker"""
+
+class ColaVentas:
+    """Procesa ventas en un pool de workers fuera del hilo de la petición.
+    
+    Cada venta encolada recibe un ticket; el cliente consulta su estado o
+    espera el evento sale_processed del NotificationServer.
+    """
+    
+    def __init__(self, workers, max_pendientes, ticket_ttl):
+        self.workers = workers
+        self.max_pendientes = max_pendientes
+        self.ticket_ttl = ticket_ttl
+        self._executor = None
+        self._tickets = {}
+        self._pendientes = 0
+        self._lock = threading.Lock()
+        self._vacia = threading.Condition(self._lock)
+        self.procesadas = 0
+        self.rechazadas = 0
+    
+    def _obtener_executor(self):
+        # Los hilos se crean hasta la primera venta asíncrona
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='venta')
+        return self._executor
+    
+    def encolar(self, venta_data, llave=None):
+        """Registrar el ticket y mandar la venta al pool; regresa el ticket"""
+        with self._lock:
+            if apagado.drenando:
+                raise ServidorDeteniendoseError('El servidor se está deteniendo, intenta de nuevo en unos segundos')
+            if self._pendientes >= self.max_pendientes:
+                raise ColaLlenaError(f'Hay {self._pendientes} ventas en espera, intenta de nuevo')
+            self._purgar()
+            ticket = {
+                'ticket': uuid.uuid4().hex,
+                'estado': TICKET_PENDIENTE,
+                'resultado': None,
+                'creado': datetime.now().isoformat(),
+                'actualizado': None,
+                '_expira_en': time.monotonic() + self.ticket_ttl
+            }
+            self._tickets[ticket['ticket']] = ticket
+            self._pendientes += 1
+            publico = self._publico(ticket)
+            executor = self._obtener_executor()
+        
+        executor.submit(self._procesar, ticket['ticket'], venta_data, llave)
+        return publico
+    
+    def obtener(self, ticket_id):
+        with self._lock:
+            ticket = self._tickets.get(ticket_id)
+            return self._publico(ticket) if ticket else None
+    
+    def _procesar(self, ticket_id, venta_data, llave):
+        self._actualizar(ticket_id, TICKET_PROCESANDO)
+        try:
+            resultado = VentaService.procesar_venta(venta_data)
+        except Exception as e:
+            resultado = {'success': False, 'error': f'Error procesando venta: {str(e)}'}
+        
+        if llave:
+            if resultado['success']:
+                idempotencia_ventas.completar(llave, 200, {'success': True, 'data': resultado['data']})
+            else:
+                idempotencia_ventas.liberar(llave)
+        
+        estado = TICKET_COMPLETADO if resultado['success'] else TICKET_RECHAZADO
+        ticket = self._actualizar(ticket_id, estado, resultado)
+        if ticket:
+            eventos.ticket(ticket)
+    
+    def _actualizar(self, ticket_id, estado, resultado=None):
+        with self._lock:
+            ticket = self._tickets.get(ticket_id)
+            if ticket is None:
+                return None
+            ticket['estado'] = estado
+            ticket['actualizado'] = datetime.now().isoformat()
+            if estado in (TICKET_COMPLETADO, TICKET_RECHAZADO):
+                ticket['resultado'] = resultado
+                self._pendientes -= 1
+                if self._pendientes == 0:
+                    self._vacia.notify_all()
+                if estado == TICKET_COMPLETADO:
+                    self.procesadas += 1
+                else:
+                    self.rechazadas += 1
+            return self._publico(ticket)
+    
+    def esperar_vacia(self, timeout):
+        """Esperar a que no queden ventas pendientes; False si se agotó el tiempo"""
+        limite = time.monotonic() + timeout
+        with self._vacia:
+            while self._pendientes:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    return False
+                self._vacia.wait(restante)
+        return True
+    
+    def _purgar(self):
+        ahora = time.monotonic()
+        vencidos = [
+            ticket_id for ticket_id, ticket in self._tickets.items()
+            if ticket['_expira_en'] <= ahora and ticket['estado'] in (TICKET_COMPLETADO, TICKET_RECHAZADO)
+        ]
+        for ticket_id in vencidos:
+            del self._tickets[ticket_id]
+    
+    @staticmethod
+    def _publico(ticket):
+        return {llave: valor for llave, valor in ticket.items() if not llave.startswith('_')}
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'pendientes': self._pendientes,
+                'max_pendientes': self.max_pendientes,
+                'tickets': len(self._tickets),
+                'procesadas': self.procesadas,
+                'rechazadas': self.rechazadas
+            }
+
+cola_ventas = ColaVentas(
+    Config.VENTAS_ASYNC_WORKERS,
+    Config.VENTAS_ASYNC_MAX_PENDIENTES,
+    Config.VENTAS_TICKET_TTL
+)
@@ -1,32 +1,103 @@
-from app.database.db_connection import execute_query
+from app.database.db_connection import execute_query, execute_query_stream
 from app.services.product_service import ProductService
+from app.services.existencias_service import ExistenciasService, MOVIMIENTO_SALIDA
+from app.services.bloqueos import bloqueos_stock
+from app.services.eventos import eventos
+from app.services.folio_service import folio_allocator
+from app.services.product_catalog import product_catalog
+from app.services.reporte_cache import reporte_cache
+from app.services.stock_bajo import stock_bajo
+from app.services.sync_service import ENTIDAD_CLIENTE, SyncService
 from config import Config
-import random
-import string
 from datetime import datetime, timedelta
 
+def _entero_positivo(valor):
+    """int > 0 a partir de 5, '5' o 5.0; None para cualquier otra cosa"""
+    if isinstance(valor, bool):
+        return None
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    elif isinstance(valor, str) and valor.strip().isdigit():
+        valor = int(valor)
+    return valor if isinstance(valor, int) and valor > 0 else None
+
 class VentaService:
     
     @staticmethod
-    def generar_folio():
-        """Generar folio único para la venta"""
-        letters = string.ascii_uppercase
-        random_str = ''.join(random.choice(letters) for i in range(3))
-        random_num = ''.join(random.choice(string.digits) for i in range(4))
-        return f"VTA-{random_str}-{random_num}"
+    def validar_items(items):
+        """Renglones con fk_productos y cantidad_productos como enteros positivos.
+        
+        Regresa (items, None) con copias normalizadas o (None, mensaje) con el
+        primer error. Los productos deben estar activos; si no están en el
+        catálogo en memoria se relee de la base (lo pudo crear otro proceso).
+        """
+        if not isinstance(items, list) or not items:
+            return None, 'La venta debe incluir al menos un producto en items'
+        normalizados = []
+        for indice, item in enumerate(items):
+            if not isinstance(item, dict):
+                return None, f'items[{indice}] debe ser un objeto'
+            producto_id = _entero_positivo(item.get('fk_productos'))
+            if producto_id is None:
+                return None, f'items[{indice}]: fk_productos debe ser un entero positivo'
+            if product_catalog.get(producto_id) is None and product_catalog.refresh_product(producto_id) is None:
+                return None, f'items[{indice}]: el producto {producto_id} no existe o no está activo'
+            cantidad = _entero_positivo(item.get('cantidad_productos'))
+            if cantidad is None:
+                return None, f'items[{indice}]: cantidad_productos debe ser un entero positivo'
+            normalizados.append(dict(item, fk_productos=producto_id, cantidad_productos=cantidad))
+        return normalizados, None
+    
+    @staticmethod
+    def generar_folio(terminal=None):
+        """Generar folio único para la venta (consecutivo por sucursal y terminal)"""
+        return folio_allocator.siguiente(terminal)
+    
+    @staticmethod
+    def verificar_stock_items(items):
+        """Obtener los faltantes de stock por renglón con una sola consulta"""
+        productos = ProductService.get_stock_bulk([item['fk_productos'] for item in items])
+        return VentaService._calcular_faltantes(items, productos)
+    
+    @staticmethod
+    def _calcular_faltantes(items, productos):
+        """Faltantes por renglón contra productos = {id: {'nombre', 'stock_actual'}}"""
+        faltantes = []
+        acumulado = {}
+        for linea, item in enumerate(items):
+            producto_id = item['fk_productos']
+            # Un producto puede repetirse en varios renglones del ticket
+            acumulado[producto_id] = acumulado.get(producto_id, 0) + item['cantidad_productos']
+            
+            producto = productos.get(producto_id)
+            disponible = producto['stock_actual'] if producto else 0
+            if acumulado[producto_id] > disponible:
+                faltantes.append({
+                    'linea': linea,
+                    'fk_productos': producto_id,
+                    'nombre': producto['nombre'] if producto else None,
+                    'solicitado': item['cantidad_productos'],
+                    'disponible': disponible,
+                    'faltante': min(item['cantidad_productos'], acumulado[producto_id] - disponible)
+                })
+        
+        return faltantes
     
     @staticmethod
     def validar_stock_venta(items):
         """Validar que haya stock suficiente para todos los productos"""
-        errores = []
-        for item in items:
-            if not ProductService.check_stock_sufficient(item['fk_productos'], item['cantidad_productos']):
-                producto = ProductService.get_product_by_id(item['fk_productos'])
-                nombre_producto = producto['nombre'] if producto else f"ID {item['fk_productos']}"
-                errores.append(f"Stock insuficiente para {nombre_producto}")
-        
+        faltantes = VentaService.verificar_stock_items(items)
+        errores = VentaService._mensajes_faltantes(faltantes)
         return len(errores) == 0, errores
     
+    @staticmethod
+    def _mensajes_faltantes(faltantes):
+        errores = []
+        for faltante in faltantes:
+            nombre_producto = faltante['nombre'] or f"ID {faltante['fk_productos']}"
+            errores.append(f"Stock insuficiente para {nombre_producto}")
+        return errores
+    
     @staticmethod
     def calcular_totales_venta(items, descuentos_generales=0):
         """Calcular subtotal, impuestos y total de la venta"""
@@ -57,7 +128,24 @@ class VentaService:
     def procesar_venta(venta_data):
         """Procesar una venta completa"""
         connection = None
+        folio = None
+        franjas = None
         try:
+            # Rechazo rápido sin bloquear nada; la validación que cuenta es la
+            # que se repite dentro de la transacción
+            faltantes = VentaService.verificar_stock_items(venta_data['items'])
+            if faltantes:
+                return VentaService._rechazo_por_faltantes(faltantes)
+            
+            # Folio antes de bloquear existencias: cuando toca apartar un bloque
+            # nuevo se escribe en folios_series con otra conexión, y con SQLite
+            # (un solo escritor) esa escritura esperaría a la propia venta
+            folio = VentaService.generar_folio(venta_data.get('terminal'))
+            
+            # Ventas del mismo producto en este proceso esperan aquí, antes de
+            # ocupar una conexión del pool
+            franjas = bloqueos_stock.adquirir([item['fk_productos'] for item in venta_data['items']])
+            
             from app.database.db_connection import DatabaseManager
             db = DatabaseManager()
             connection = db.get_connection()
@@ -65,10 +153,18 @@ class VentaService:
             
             cursor = connection.cursor()
             
-            # Validar stock
-            stock_valido, errores_stock = VentaService.validar_stock_venta(venta_data['items'])
-            if not stock_valido:
-                return {'success': False, 'error': '; '.join(errores_stock)}
+            # Existencias bloqueadas (UPDLOCK) hasta el commit de la venta
+            existencias = ExistenciasService.leer_existencias(
+                cursor, [item['fk_productos'] for item in venta_data['items']], bloquear=True
+            )
+            faltantes = VentaService._calcular_faltantes(venta_data['items'], {
+                producto_id: {'nombre': VentaService._nombre_producto(producto_id), 'stock_actual': existencia}
+                for producto_id, existencia in existencias.items()
+            })
+            if faltantes:
+                connection.rollback()
+                folio_allocator.descartar(folio)
+                return VentaService._rechazo_por_faltantes(faltantes)
             
             # Calcular totales
             totales = VentaService.calcular_totales_venta(
@@ -76,9 +172,6 @@ class VentaService:
                 venta_data.get('descuentos', 0)
             )
             
-            # Generar folio
-            folio = VentaService.generar_folio()
-            
             # Determinar fecha de vencimiento si es crédito
             fecha_vencimiento = None
             saldo_pendiente = 0
@@ -122,22 +215,20 @@ class VentaService:
             
             venta_id = cursor.fetchone()[0]
             
+            items = venta_data['items']
+            
+            # Enviar cada executemany como un solo lote de parámetros
+            cursor.fast_executemany = True
+            
             # Insertar detalles de venta
-            for item in venta_data['items']:
+            detalles = []
+            for item in items:
                 descuento_item = item.get('descuentos', 0)
                 importe_bruto = item['precio_unitario'] * item['cantidad_productos']
                 importe_descuento = importe_bruto * (descuento_item / 100) if descuento_item > 0 else 0
                 importe_total = importe_bruto - importe_descuento
                 
-                detalle_query = """
-                INSERT INTO ventas_detalles (
-                    cantidad_productos, precio_unitario, descuentos, importe_total,
-                    fk_productos, fk_ventas
-                )
-                VALUES (?, ?, ?, ?, ?, ?)
-                """
-                
-                cursor.execute(detalle_query, (
+                detalles.append((
                     item['cantidad_productos'],
                     item['precio_unitario'],
                     descuento_item,
@@ -145,36 +236,24 @@ class VentaService:
                     item['fk_productos'],
                     venta_id
                 ))
-                
-                # Registrar movimiento de inventario
-                movimiento_query = """
-                INSERT INTO movimiento (fk_movimiento_tipo, fk_producto)
-                OUTPUT INSERTED.id_movimiento
-                VALUES (2, ?)  -- 2 = Salida por venta
-                """
-                cursor.execute(movimiento_query, (item['fk_productos'],))
-                movimiento_id = cursor.fetchone()[0]
-                
-                # Obtener existencia anterior (necesitarías una función para esto)
-                existencia_anterior = ProductService.get_product_stock(item['fk_productos'])
-                existencia_nueva = existencia_anterior - item['cantidad_productos']
-                
-                # Insertar detalle de movimiento
-                movimiento_detalle_query = """
-                INSERT INTO movimiento_detalles (
-                    fk_productos, fk_empleados, cantidad, existencia_anterior,
-                    existencia_nueva, fecha_movimiento, fk_movimiento
-                )
-                VALUES (?, ?, ?, ?, ?, GETDATE(), ?)
-                """
-                cursor.execute(movimiento_detalle_query, (
-                    item['fk_productos'],
-                    venta_data['fk_empleados'],
-                    item['cantidad_productos'],
-                    existencia_anterior,
-                    existencia_nueva,
-                    movimiento_id
-                ))
+            
+            detalle_query = """
+            INSERT INTO ventas_detalles (
+                cantidad_productos, precio_unitario, descuentos, importe_total,
+                fk_productos, fk_ventas
+            )
+            VALUES (?, ?, ?, ?, ?, ?)
+            """
+            cursor.executemany(detalle_query, detalles)
+            
+            # Registrar movimientos de inventario (2 = Salida por venta)
+            ExistenciasService.registrar_movimientos(
+                cursor,
+                venta_data['fk_empleados'],
+                MOVIMIENTO_SALIDA,
+                [(item['fk_productos'], -item['cantidad_productos']) for item in items],
+                existencias
+            )
             
             # Si es venta a crédito, actualizar saldo del cliente
             if venta_data.get('fk_ventas_tipo') == 2 and venta_data.get('fk_cliente'):
@@ -202,6 +281,16 @@ class VentaService:
                 ))
             
             connection.commit()
+            # Los reportes cuyo rango incluye la venta ya no son vigentes
+            reporte_cache.invalidar_fecha()
+            
+            # Las terminales reciben la existencia nueva y la venta sin consultar
+            nuevas = dict(existencias)
+            for item in items:
+                nuevas[item['fk_productos']] -= item['cantidad_productos']
+            eventos.stock(nuevas, 'venta')
+            stock_bajo.evaluar(nuevas)
+            eventos.venta(venta_id, folio, totales['total_neto'], venta_data.get('terminal'))
             
             return {
                 'success': True,
@@ -216,10 +305,27 @@ class VentaService:
         except Exception as e:
             if connection:
                 connection.rollback()
+            if folio:
+                folio_allocator.descartar(folio)
             return {'success': False, 'error': f'Error procesando venta: {str(e)}'}
         finally:
             if connection:
                 connection.close()
+            if franjas is not None:
+                bloqueos_stock.liberar(franjas)
+    
+    @staticmethod
+    def _rechazo_por_faltantes(faltantes):
+        return {
+            'success': False,
+            'error': '; '.join(VentaService._mensajes_faltantes(faltantes)),
+            'faltantes': faltantes
+        }
+    
+    @staticmethod
+    def _nombre_producto(producto_id):
+        record = product_catalog.get(producto_id)
+        return record.nombre if record else None
     
     @staticmethod
     def actualizar_saldo_cliente(cliente_id, monto_venta, cursor=None):
@@ -230,10 +336,13 @@ class VentaService:
                 cursor.execute(query, (monto_venta, cliente_id))
             else:
                 execute_query(query, (monto_venta, cliente_id))
-            return True
         except Exception as e:
             print(f"[VENTA SERVICE] Error actualizando saldo cliente: {e}")
             return False
+        # Fuera del try: dentro de la venta, un fallo al anotar el cambio la
+        # revierte en lugar de dejar a las terminales con el saldo viejo
+        SyncService.registrar(ENTIDAD_CLIENTE, [cliente_id], cursor)
+        return True
     
     @staticmethod
     def obtener_venta_completa(venta_id):
@@ -279,10 +388,8 @@ class VentaService:
             return None
     
     @staticmethod
-    def obtener_ventas_por_fecha(fecha_inicio, fecha_fin):
-        """Obtener ventas en un rango de fechas"""
-        try:
-            query = """
+    def _query_ventas_por_fecha():
+        return """
             SELECT v.*, 
                    c.nombre as cliente_nombre,
                    e.nombre + ' ' + e.apellido_1 as empleado_nombre,
@@ -294,7 +401,19 @@ class VentaService:
             WHERE v.fecha_ventas BETWEEN ? AND ?
             ORDER BY v.fecha_ventas DESC
             """
+    
+    @staticmethod
+    def obtener_ventas_por_fecha(fecha_inicio, fecha_fin):
+        """Obtener ventas en un rango de fechas"""
+        try:
+            query = VentaService._query_ventas_por_fecha()
             return execute_query(query, (fecha_inicio, fecha_fin), fetch_all=True)
         except Exception as e:
             print(f"[VENTA SERVICE] Error obteniendo ventas por fecha: {e}")
-            return []
\ No newline at end of file
+            return []
+    
+    @staticmethod
+    def stream_ventas_por_fecha(fecha_inicio, fecha_fin):
+        """Generador de ventas en un rango de fechas para exportaciones"""
+        query = VentaService._query_ventas_por_fecha()
+        return execute_query_stream(query, (fecha_inicio, fecha_fin))
@@ -0,0 +1,90 @@
+import signal
+import sys
+import time
+from config import Config
+
+MODOS = ('threading', 'eventlet', 'gevent')
+
+def parchar_biblioteca_estandar():
+    """Parchar sockets, hilos y locks para eventlet/gevent.
+    
+    Debe llamarse antes de importar Flask, pyodbc o cualquier módulo que cree
+    locks o sockets; en modo threading no hace nada.
+    """
+    if Config.SERVER_MODE == 'eventlet':
+        import eventlet
+        eventlet.monkey_patch()
+    elif Config.SERVER_MODE == 'gevent':
+        from gevent import monkey
+        monkey.patch_all()
+
+def opciones_socketio():
+    """Argumentos de SocketIO() según el modo y la cola de mensajes configurados"""
+    opciones = {
+        'async_mode': Config.SERVER_MODE,
+        'ping_interval': Config.SOCKETIO_PING_INTERVAL,
+        'ping_timeout': Config.SOCKETIO_PING_TIMEOUT
+    }
+    cola = Config.SOCKETIO_MESSAGE_QUEUE
+    if cola.startswith('pos://'):
+        from app.sockets.broker_local import BrokerLocalManager
+        opciones['client_manager'] = BrokerLocalManager(cola)
+    elif cola:
+        opciones['message_queue'] = cola
+    return opciones
+
+def opciones_run():
+    """Argumentos de socketio.run(): servidor de desarrollo o servidor asíncrono"""
+    if Config.SERVER_MODE == 'threading':
+        # Servidor de desarrollo de Werkzeug, un hilo por conexión
+        return {'debug': Config.DEBUG, 'allow_unsafe_werkzeug': True}
+    
+    opciones = {'debug': False, 'use_reloader': False, 'log_output': Config.DEBUG}
+    if Config.SERVER_MODE == 'eventlet':
+        # keepalive: segundos que una conexión HTTP ociosa sigue abierta
+        opciones['keepalive'] = Config.SERVER_KEEPALIVE
+        opciones['max_size'] = Config.SERVER_MAX_CONEXIONES
+    else:
+        from gevent.pool import Pool
+        opciones['spawn'] = Pool(Config.SERVER_MAX_CONEXIONES)
+    return opciones
+
+def drenar(timeout=None):
+    """Rechazar ventas nuevas y esperar a que terminen las que están en proceso.
+    
+    Cubre las ventas síncronas dentro de una petición y las encoladas con
+    ?modo=async. Regresa True si todas terminaron dentro de `timeout`.
+    """
+    from app.services.apagado import apagado
+    from app.services.venta_cola import cola_ventas
+    
+    timeout = Config.APAGADO_TIMEOUT if timeout is None else timeout
+    limite = time.monotonic() + timeout
+    apagado.iniciar()
+    pendientes = apagado.stats()['en_curso'] + cola_ventas.stats()['pendientes']
+    print(f"[SERVER] Drenando {pendientes} ventas en proceso (máximo {timeout}s)")
+    
+    completas = apagado.esperar(max(0.0, limite - time.monotonic()))
+    completas = cola_ventas.esperar_vacia(max(0.0, limite - time.monotonic())) and completas
+    if completas:
+        print("[SERVER] Ventas en proceso terminadas")
+    else:
+        print(f"[SERVER] Tiempo agotado: {apagado.stats()['en_curso']} síncronas y "
+              f"{cola_ventas.stats()['pendientes']} asíncronas sin terminar")
+    return completas
+
+def instalar_senales():
+    """SIGTERM (y Ctrl+C) drenan las ventas antes de salir; un segundo aviso sale de inmediato"""
+    recibidas = []
+    
+    def detener(signum, frame):
+        if recibidas:
+            print("[SERVER] Segunda señal, saliendo sin esperar")
+            sys.exit(1)
+        recibidas.append(signum)
+        print(f"[SERVER] Señal {signal.Signals(signum).name} recibida, deteniendo servidor")
+        drenar()
+        sys.exit(0)
+    
+    signal.signal(signal.SIGTERM, detener)
+    signal.signal(signal.SIGINT, detener)
@@ -0,0 +1,108 @@
+import json
+import socket
+import socketserver
+import threading
+import time
+from urllib.parse import urlparse
+from socketio import PubSubManager
+
+def direccion(url):
+    partes = urlparse(url)
+    return partes.hostname or '127.0.0.1', partes.port or 5555
+
+class _Conexion(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.envio = threading.Lock()
+        with self.server.lock:
+            self.server.conexiones.add(self)
+    
+    def handle(self):
+        for linea in self.rfile:
+            self.server.difundir(linea)
+    
+    def finish(self):
+        with self.server.lock:
+            self.server.conexiones.discard(self)
+        super().finish()
+    
+    def enviar(self, linea):
+        with self.envio:
+            self.wfile.write(linea)
+            self.wfile.flush()
+
+class BrokerLocal(socketserver.ThreadingTCPServer):
+    """Broker mínimo para compartir eventos de Socket.IO entre procesos.
+    
+    Sustituto local de Redis para desarrollo y pruebas de carga: reenvía
+    cada línea que recibe a todas las conexiones abiertas. Los servidores lo
+    usan con SOCKETIO_MESSAGE_QUEUE=pos://127.0.0.1:5555 y se levanta con
+    `python manage.py broker`. No persiste mensajes ni autentica; en
+    producción se usa redis:// o cualquier URL que acepte Flask-SocketIO.
+    """
+    
+    daemon_threads = True
+    allow_reuse_address = True
+    
+    def __init__(self, host='127.0.0.1', puerto=5555):
+        super().__init__((host, puerto), _Conexion)
+        self.lock = threading.Lock()
+        self.conexiones = set()
+        self.mensajes = 0
+    
+    def difundir(self, linea):
+        with self.lock:
+            destinos = list(self.conexiones)
+            self.mensajes += 1
+        for conexion in destinos:
+            try:
+                conexion.enviar(linea)
+            except OSError:
+                pass  # la conexión se cerró; finish() la quita del conjunto
+
+class BrokerLocalManager(PubSubManager):
+    """Client manager de python-socketio sobre BrokerLocal (URL pos://host:puerto)"""
+    
+    name = 'pos'
+    
+    def __init__(self, url='pos://127.0.0.1:5555', channel='socketio', write_only=False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.direccion = direccion(url)
+        self._publicador = None
+        self._lock_publicar = threading.Lock()
+    
+    def _conectar(self):
+        conexion = socket.create_connection(self.direccion)
+        conexion.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return conexion
+    
+    def _publish(self, data):
+        linea = (json.dumps({'canal': self.channel, 'mensaje': data}) + '\n').encode('utf-8')
+        with self._lock_publicar:
+            for intento in range(2):
+                try:
+                    if self._publicador is None:
+                        self._publicador = self._conectar()
+                    self._publicador.sendall(linea)
+                    return
+                except OSError:
+                    self._publicador = None
+                    if intento:
+                        raise
+    
+    def _listen(self):
+        espera = 1
+        while True:
+            try:
+                conexion = self._conectar()
+                espera = 1
+                with conexion, conexion.makefile('rb') as lector:
+                    for linea in lector:
+                        sobre = json.loads(linea)
+                        if sobre.get('canal') == self.channel:
+                            yield sobre['mensaje']
+            except OSError as e:
+                self._get_logger().error(f'Broker local no disponible ({e}), reintentando en {espera}s')
+            time.sleep(espera)
+            espera = min(espera * 2, 30)
@@ -0,0 +1,149 @@
+import json
+import os
+import socket
+import threading
+import time
+from collections import deque
+
+# Salas de los clientes en modo lote: el prefijo indica el formato del frame
+PREFIJO_JSON = 'lote:'
+PREFIJO_MSGPACK = 'lotemp:'
+FORMATOS = {'json': PREFIJO_JSON, 'msgpack': PREFIJO_MSGPACK}
+
+# Campos que el frame ya lleva de otra forma o que el cliente puede armar
+CAMPOS_OMITIDOS = ('timestamp', 'message', 'src')
+
+def msgpack_disponible():
+    try:
+        import msgpack  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def sala_lote(sala, formato):
+    return FORMATOS[formato] + sala
+
+class LotesSalas:
+    """Eventos de salida acumulados por sala y enviados como un solo frame.
+    
+    Cada sala junta sus eventos hasta tener `max_eventos` o hasta que el más
+    viejo cumple `intervalo` segundos; entonces se cierra un frame:
+        
+        {'room': 'productos', 'src': 'pos1:4242', 'seq': 17, 't': 1700000000000,
+         'e': [['stock_updated', 0, {'product_id': 5, 'new_stock': 12}], ...]}
+    
+    `t` es la hora del primer evento en milisegundos y cada evento lleva su
+    desfase respecto a ella en lugar del timestamp ISO. `seq` es consecutivo
+    por sala y por proceso (`src`). Se guardan los últimos `historial`
+    frames de cada sala para repetirlos a un cliente que perdió alguno;
+    los que ya confirmaron todos los clientes de la sala se sueltan antes.
+    """
+    
+    def __init__(self, max_eventos, intervalo, historial):
+        self.max_eventos = max_eventos
+        self.intervalo = intervalo
+        self.historial = historial
+        self.origen = f'{socket.gethostname()}:{os.getpid()}'
+        self._pendientes = {}  # sala -> (inicio, [eventos])
+        self._seq = {}
+        self._frames = {}  # sala -> deque de frames enviados
+        self._lock = threading.Lock()
+        self.eventos = 0
+        self.frames = 0
+        self.repeticiones = 0
+        self.recortados = 0
+    
+    def agregar(self, evento, datos, salas):
+        """Encolar el evento en cada sala; regresa las salas que ya llenaron su frame"""
+        ahora = time.time()
+        compacto = {
+            campo: valor for campo, valor in datos.items()
+            if campo not in CAMPOS_OMITIDOS and valor is not None
+            and not (campo == 'coalesced' and valor == 1)
+        }
+        llenas = []
+        with self._lock:
+            for sala in salas:
+                inicio, eventos = self._pendientes.setdefault(sala, (ahora, []))
+                eventos.append([evento, int((ahora - inicio) * 1000), compacto])
+                self.eventos += 1
+                if len(eventos) >= self.max_eventos:
+                    llenas.append(sala)
+        return llenas
+    
+    def vencidas(self):
+        limite = time.time() - self.intervalo
+        with self._lock:
+            return [sala for sala, (inicio, _) in self._pendientes.items() if inicio <= limite]
+    
+    def cerrar(self, sala):
+        """Frame con los eventos pendientes de la sala, o None si no hay"""
+        with self._lock:
+            pendiente = self._pendientes.pop(sala, None)
+            if pendiente is None:
+                return None
+            inicio, eventos = pendiente
+            seq = self._seq.get(sala, 0) + 1
+            self._seq[sala] = seq
+            frame = {'room': sala, 'src': self.origen, 'seq': seq, 't': int(inicio * 1000), 'e': eventos}
+            self._frames.setdefault(sala, deque(maxlen=self.historial)).append(frame)
+            self.frames += 1
+        return frame
+    
+    def repetir(self, sala, desde):
+        """Frames de la sala con seq mayor a `desde`; None si ya no están en el historial"""
+        with self._lock:
+            frames = list(self._frames.get(sala, ()))
+            ultimo = self._seq.get(sala, 0)
+        if desde >= ultimo:
+            return []
+        if not frames or frames[0]['seq'] > desde + 1:
+            return None
+        with self._lock:
+            self.repeticiones += 1
+        return [frame for frame in frames if frame['seq'] > desde]
+    
+    def recortar(self, sala, hasta):
+        """Soltar del historial los frames de la sala con seq <= `hasta` (ya confirmados)"""
+        with self._lock:
+            frames = self._frames.get(sala)
+            recortados = 0
+            while frames and frames[0]['seq'] <= hasta:
+                frames.popleft()
+                recortados += 1
+            self.recortados += recortados
+        return recortados
+    
+    def ultimo_seq(self, sala):
+        with self._lock:
+            return self._seq.get(sala, 0)
+    
+    @staticmethod
+    def codificar(frame, formato):
+        if formato == 'msgpack':
+            import msgpack
+            return msgpack.packb(frame, use_bin_type=True)
+        return frame
+    
+    @staticmethod
+    def tamano(frame, formato):
+        """Bytes del frame en el formato indicado (para estadísticas y benchmarks)"""
+        if formato == 'msgpack':
+            return len(LotesSalas.codificar(frame, formato))
+        return len(json.dumps(frame, separators=(',', ':')))
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'origen': self.origen,
+                'max_eventos': self.max_eventos,
+                'intervalo_ms': round(self.intervalo * 1000),
+                'salas': len(self._seq),
+                'pendientes': sum(len(eventos) for _, eventos in self._pendientes.values()),
+                'eventos': self.eventos,
+                'frames': self.frames,
+                'repeticiones': self.repeticiones,
+                'guardados': sum(len(frames) for frames in self._frames.values()),
+                'recortados': self.recortados,
+                'msgpack': msgpack_disponible()
+            }
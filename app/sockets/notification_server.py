@@ -1,55 +1,186 @@
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room, leave_room, rooms
 from flask import request
 import threading
 import json
+from app.services.existencias_service import ExistenciasService
+from app.services.stock_bajo import stock_bajo
+from app.services.eventos import EVENTO_STOCK, EVENTO_STOCK_BAJO, EVENTO_STOCK_RECUPERADO, EVENTO_VENTA, eventos
+from app.sockets.lotes import FORMATOS, LotesSalas, msgpack_disponible, sala_lote
+from app.sockets.registro import RegistroEventos
+from config import Config
+
+# Salas de Socket.IO. Cada evento sale con un solo emit a las salas que le
+# interesan, en lugar de recorrer a los clientes uno por uno. Los clientes en
+# modo lote están en las mismas salas con prefijo (ver app/sockets/lotes.py)
+# y reciben los eventos agrupados en frames events_batch.
+ROOM_ALL = 'todos'
+ROOM_ALL_PRODUCTS = 'productos'  # stock de todos los productos (clientes sin lista de interés)
+ROLE_ADMIN = 'admin'
+
+def branch_room(branch):
+    return f'sucursal:{branch}'
+
+def product_room(product_id):
+    return f'producto:{product_id}'
+
+def role_room(client_type):
+    return f'rol:{client_type}'
 
 class NotificationServer:
     def __init__(self, socketio):
         self.socketio = socketio
-        self.clients = set()
+        # sid -> {'type', 'name', 'branch', 'products', 'batch', 'acks'}; acks: (src, sala) -> seq
+        self.clients = {}
         self.lock = threading.Lock()
+        # SOCKET_LOTE_MS = 0 desactiva el modo lote
+        self.lotes = LotesSalas(
+            Config.SOCKET_LOTE_MAX, Config.SOCKET_LOTE_MS / 1000, Config.SOCKET_LOTE_HISTORIAL
+        ) if Config.SOCKET_LOTE_MS > 0 else None
+        self.msgpack = msgpack_disponible()
+        # Eventos recientes para poner al día a los clientes que se reconectan;
+        # SOCKET_REGISTRO_EVENTOS = 0 lo desactiva
+        self.registro = RegistroEventos(
+            Config.SOCKET_REGISTRO_EVENTOS
+        ) if Config.SOCKET_REGISTRO_EVENTOS > 0 else None
+        # Con cola de mensajes el cliente recibe eventos de varios procesos, cada
+        # uno con su propio seq: ninguno sabe qué perdió y la reconexión es con foto
+        self.multiproceso = bool(Config.SOCKETIO_MESSAGE_QUEUE)
+        self.send_lock = threading.Lock()
         
         self.setup_handlers()
     
     def setup_handlers(self):
         @self.socketio.on('connect')
         def handle_connect():
+            # Hasta identificarse el cliente recibe lo mismo que antes: su
+            # sucursal por omisión y el stock de todos los productos
+            info = {
+                'type': 'unknown', 'name': 'Unknown', 'branch': Config.FOLIO_SUCURSAL,
+                'products': None, 'batch': None, 'acks': {}
+            }
             with self.lock:
-                self.clients.add(request.sid)
+                self.clients[request.sid] = info
+                clients_count = len(self.clients)
+            self._sync_rooms(info)
             print(f"[SOCKET] Cliente conectado: {request.sid}")
-            print(f"[SOCKET] Clientes conectados: {len(self.clients)}")
+            print(f"[SOCKET] Clientes conectados: {clients_count}")
             
             # Confirmar conexión al cliente
             emit('connection_status', {
                 'status': 'connected', 
                 'message': 'Conectado al servidor de notificaciones',
-                'clients_count': len(self.clients)
+                'clients_count': clients_count
             })
         
         @self.socketio.on('disconnect')
         def handle_disconnect():
+            # Socket.IO saca al cliente de todas sus salas al desconectarse. Lo
+            # que se pierda mientras tanto se recupera al reconectar con last_seq
             with self.lock:
-                if request.sid in self.clients:
-                    self.clients.remove(request.sid)
+                self.clients.pop(request.sid, None)
+                clients_count = len(self.clients)
             print(f"[SOCKET] Cliente desconectado: {request.sid}")
-            print(f"[SOCKET] Clientes conectados: {len(self.clients)}")
+            print(f"[SOCKET] Clientes conectados: {clients_count}")
         
         @self.socketio.on('client_identification')
         def handle_client_identification(data):
             client_type = data.get('type', 'unknown')
             client_name = data.get('name', 'Unknown')
+            branch = str(data.get('branch') or data.get('sucursal') or Config.FOLIO_SUCURSAL)
             
-            print(f"[SOCKET] Cliente identificado: {client_name} ({client_type})")
+            print(f"[SOCKET] Cliente identificado: {client_name} ({client_type}, sucursal {branch})")
+            
+            # batch: True o 'json' para frames JSON, 'msgpack' para binarios
+            batch = data.get('batch')
+            if batch is True:
+                batch = 'json'
+            if batch not in FORMATOS or self.lotes is None:
+                batch = None
+            elif batch == 'msgpack' and not self.msgpack:
+                batch = 'json'
             
             with self.lock:
-                # Podrías almacenar más información del cliente si es necesario
-                pass
+                info = self.clients.setdefault(request.sid, {'products': None, 'acks': {}})
+                info.update(type=client_type, name=client_name, branch=branch, batch=batch)
+                if 'products' in data:
+                    info['products'] = self._product_list(data.get('products'))
+            self._sync_rooms(info)
             
             emit('identification_confirmed', {
                 'status': 'identified',
-                'message': f'Cliente {client_name} identificado correctamente'
+                'message': f'Cliente {client_name} identificado correctamente',
+                'batch': batch,
+                'rooms': sorted(rooms()),
+                'src': self.registro.origen if self.registro is not None else None,
+                'last_seq': self.registro.seq if self.registro is not None else None
+            })
+            
+            # Reconexión: last_seq (y src) del último evento recibido antes de caerse
+            if data.get('last_seq') is not None:
+                self._catch_up(info, data.get('last_seq'), data.get('src'))
+        
+        @self.socketio.on('product_interest')
+        def handle_product_interest(data):
+            # Lista vacía o ausente: volver a recibir el stock de todos los productos
+            with self.lock:
+                info = self.clients.get(request.sid)
+                if info is None:
+                    return
+                info['products'] = self._product_list((data or {}).get('products'))
+            self._sync_rooms(info)
+            emit('product_interest_confirmed', {
+                'products': info['products']
             })
         
+        @self.socketio.on('events_ack')
+        def handle_events_ack(data=None):
+            # Último seq recibido completo de una sala en modo lote; el seq es
+            # del proceso `src` que armó el frame
+            data = data or {}
+            room = data.get('room')
+            seq = self._seq_valido(data.get('seq'))
+            if self.lotes is None or not room or seq is None or data.get('src') != self.lotes.origen:
+                return
+            clave = (self.lotes.origen, room)
+            with self.lock:
+                info = self.clients.get(request.sid)
+                if info is None:
+                    return
+                info['acks'][clave] = seq
+                confirmado = self._ack_minimo(clave)
+            # Lo que ya confirmaron todos los clientes de la sala no se va a repetir
+            if confirmado:
+                self.lotes.recortar(room, confirmado)
+        
+        @self.socketio.on('events_replay')
+        def handle_events_replay(data=None):
+            # Frames perdidos: los de la sala con seq mayor a `since` (por omisión, el último ack)
+            data = data or {}
+            room = data.get('room')
+            with self.lock:
+                info = dict(self.clients.get(request.sid) or {})
+                acks = dict(info.get('acks') or {})
+            formato = info.get('batch')
+            if self.lotes is None or formato is None or not room or sala_lote(room, formato) not in rooms():
+                emit('events_reset', {'room': room, 'error': 'El cliente no recibe esa sala en modo lote'})
+                return
+            if data.get('src') != self.lotes.origen:
+                # Numeración de otro proceso (o de antes de un reinicio): no hay cómo comparar
+                emit('events_reset', {'room': room, 'src': self.lotes.origen, 'seq': self.lotes.ultimo_seq(room)})
+                return
+            since = data.get('since')
+            since = acks.get((self.lotes.origen, room), 0) if since is None else self._seq_valido(since)
+            if since is None:
+                emit('events_reset', {'room': room, 'error': 'since debe ser un entero >= 0'})
+                return
+            frames = self.lotes.repetir(room, since)
+            if frames is None:
+                # Ya no están en el historial: el cliente vuelve a consultar por REST
+                emit('events_reset', {'room': room, 'src': self.lotes.origen, 'seq': self.lotes.ultimo_seq(room)})
+                return
+            for frame in frames:
+                emit('events_batch', LotesSalas.codificar(frame, formato))
+        
         @self.socketio.on('stock_update')
         def handle_stock_update(data):
             product_id = data.get('product_id')
@@ -58,15 +189,13 @@ class NotificationServer:
             
             print(f"[SOCKET] Actualización de stock - Producto: {product_id}, Nuevo stock: {new_stock}, Razón: {reason}")
             
-            # Notificar a todos los clientes conectados
-            with self.lock:
-                for client in self.clients:
-                    emit('stock_updated', {
-                        'product_id': product_id,
-                        'new_stock': new_stock,
-                        'reason': reason,
-                        'timestamp': data.get('timestamp')
-                    }, room=client)
+            # Clientes interesados en el producto (el remitente ya lo sabe)
+            self._send('stock_updated', {
+                'product_id': product_id,
+                'new_stock': new_stock,
+                'reason': reason,
+                'timestamp': data.get('timestamp')
+            }, [ROOM_ALL_PRODUCTS, product_room(product_id)], skip_sid=request.sid)
         
         @self.socketio.on('new_sale')
         def handle_new_sale(data):
@@ -76,17 +205,14 @@ class NotificationServer:
             
             print(f"[SOCKET] Nueva venta procesada - ID: {sale_id}, Total: {total}, Cliente: {client_name}")
             
-            # Notificar a todos los clientes (excepto al que envió la venta)
-            with self.lock:
-                for client in self.clients:
-                    if client != request.sid:  # No notificar al remitente
-                        emit('sale_processed', {
-                            'sale_id': sale_id,
-                            'total': total,
-                            'client_name': client_name,
-                            'timestamp': data.get('timestamp'),
-                            'message': f'Nueva venta procesada: ${total}'
-                        }, room=client)
+            # Notificar a la sucursal del remitente, sin incluirlo a él
+            self._send('sale_processed', {
+                'sale_id': sale_id,
+                'total': total,
+                'client_name': client_name,
+                'timestamp': data.get('timestamp'),
+                'message': f'Nueva venta procesada: ${total}'
+            }, [branch_room(self._branch(request.sid))], skip_sid=request.sid)
         
         @self.socketio.on('new_product')
         def handle_new_product(data):
@@ -96,14 +222,12 @@ class NotificationServer:
             print(f"[SOCKET] Nuevo producto agregado - ID: {product_id}, Nombre: {product_name}")
             
             # Notificar a todos los clientes
-            with self.lock:
-                for client in self.clients:
-                    emit('product_created', {
-                        'product_id': product_id,
-                        'product_name': product_name,
-                        'timestamp': data.get('timestamp'),
-                        'message': f'Nuevo producto: {product_name}'
-                    }, room=client)
+            self._send('product_created', {
+                'product_id': product_id,
+                'product_name': product_name,
+                'timestamp': data.get('timestamp'),
+                'message': f'Nuevo producto: {product_name}'
+            }, [ROOM_ALL])
         
         @self.socketio.on('low_stock_alert')
         def handle_low_stock_alert(data):
@@ -114,17 +238,15 @@ class NotificationServer:
             
             print(f"[SOCKET] Alerta de stock bajo - Producto: {product_name}, Stock: {current_stock}, Mínimo: {min_stock}")
             
-            # Notificar a todos los clientes administrativos
-            with self.lock:
-                for client in self.clients:
-                    emit('low_stock_warning', {
-                        'product_id': product_id,
-                        'product_name': product_name,
-                        'current_stock': current_stock,
-                        'min_stock': min_stock,
-                        'timestamp': data.get('timestamp'),
-                        'message': f'Stock bajo: {product_name} ({current_stock} unidades)'
-                    }, room=client)
+            # Clientes administrativos y los que siguen el producto
+            self._send('low_stock_warning', {
+                'product_id': product_id,
+                'product_name': product_name,
+                'current_stock': current_stock,
+                'min_stock': min_stock,
+                'timestamp': data.get('timestamp'),
+                'message': f'Stock bajo: {product_name} ({current_stock} unidades)'
+            }, self._low_stock_rooms(product_id))
         
         @self.socketio.on('system_message')
         def handle_system_message(data):
@@ -134,66 +256,263 @@ class NotificationServer:
             print(f"[SOCKET] Mensaje del sistema - Tipo: {message_type}, Mensaje: {message}")
             
             # Broadcast a todos los clientes
-            with self.lock:
-                for client in self.clients:
-                    emit('system_notification', {
-                        'message': message,
-                        'type': message_type,
-                        'timestamp': data.get('timestamp')
-                    }, room=client)
+            self._send('system_notification', {
+                'message': message,
+                'type': message_type,
+                'timestamp': data.get('timestamp')
+            }, [ROOM_ALL])
         
         @self.socketio.on('ping')
-        def handle_ping():
+        def handle_ping(data=None):
+            data = data or {}
             # Responder al ping para verificar conectividad
             emit('pong', {
                 'timestamp': data.get('timestamp'),
                 'message': 'Servidor activo'
             })
-
-    # Métodos públicos para notificaciones desde otras partes del sistema
-    def notify_stock_update(self, product_id, new_stock, reason=""):
-        """Método para notificar actualización de stock desde otros servicios"""
-        self.handle_stock_update({
-            'product_id': product_id,
-            'new_stock': new_stock,
-            'reason': reason,
+    
+    @staticmethod
+    def _product_list(products):
+        return sorted({str(product_id) for product_id in products or ()}) or None
+    
+    def _rooms_for(self, info):
+        """Salas que le tocan al cliente según su identificación"""
+        salas = {ROOM_ALL, branch_room(info['branch'])}
+        if info['type'] != 'unknown':
+            salas.add(role_room(info['type']))
+        if info['products']:
+            salas.update(product_room(product_id) for product_id in info['products'])
+        else:
+            salas.add(ROOM_ALL_PRODUCTS)
+        if info['batch']:
+            salas = {sala_lote(sala, info['batch']) for sala in salas}
+        return salas
+    
+    @staticmethod
+    def _seq_valido(seq):
+        """seq como entero >= 0, o None si el cliente mandó otra cosa"""
+        if isinstance(seq, bool):
+            return None
+        try:
+            seq = int(seq)
+        except (TypeError, ValueError):
+            return None
+        return seq if seq >= 0 else None
+    
+    def _ack_minimo(self, clave):
+        """Menor seq confirmado de (src, sala) entre los clientes en modo lote que reciben la sala.
+        
+        Un cliente sin ack para la sala cuenta como 0. Llamar con self.lock tomado.
+        """
+        sala = clave[1]
+        acks = [
+            info['acks'].get(clave, 0) for info in self.clients.values()
+            if info.get('batch') and sala_lote(sala, info['batch']) in self._rooms_for(info)
+        ]
+        return min(acks) if acks else 0
+    
+    def _sync_rooms(self, info):
+        """Entrar y salir de salas para que el cliente actual quede en las que le tocan"""
+        actuales = set(rooms()) - {request.sid}
+        deseadas = self._rooms_for(info)
+        for sala in actuales - deseadas:
+            leave_room(sala)
+        for sala in deseadas - actuales:
+            join_room(sala)
+    
+    def _send(self, evento, datos, salas, skip_sid=None):
+        """Un emit a las salas y el evento encolado en los frames de las mismas salas en modo lote"""
+        if self.registro is None:
+            self.socketio.emit(evento, datos, to=salas, skip_sid=skip_sid)
+        else:
+            # Los clientes reciben los seq en orden: numerar y emitir juntos. El
+            # seq solo vale con su src (proceso que lo numeró)
+            with self.send_lock:
+                datos = dict(datos, seq=self.registro.agregar(evento, datos, salas), src=self.registro.origen)
+                self.socketio.emit(evento, datos, to=salas, skip_sid=skip_sid)
+        if self.lotes is not None:
+            llenas = self.lotes.agregar(evento, datos, salas)
+            if llenas:
+                self._flush(llenas)
+    
+    def _flush(self, salas):
+        for sala in salas:
+            frame = self.lotes.cerrar(sala)
+            if frame is None:
+                continue
+            self.socketio.emit('events_batch', frame, to=sala_lote(sala, 'json'))
+            if self.msgpack:
+                self.socketio.emit('events_batch', LotesSalas.codificar(frame, 'msgpack'),
+                                   to=sala_lote(sala, 'msgpack'))
+    
+    def _catch_up(self, info, last_seq, src=None):
+        """Repetir al cliente actual los eventos de sus salas posteriores a last_seq.
+        
+        Los eventos repetidos llegan uno por uno (también a clientes en modo
+        lote), con su seq y src, y al final events_caught_up. Si el hueco ya no
+        está en el registro, el last_seq es de otro proceso o hay varios
+        procesos (cola de mensajes), llega events_snapshot con la existencia de
+        sus productos y el seq desde el que vuelve a estar al día.
+        """
+        if self.registro is None:
+            emit('events_reset', {'error': 'El servidor no guarda eventos para reconexión'})
+            return
+        if self.multiproceso:
+            self._snapshot(info)
+            return
+        try:
+            last_seq = int(last_seq)
+        except (TypeError, ValueError):
+            last_seq = -1
+        # Salas sin prefijo de lote: el registro guarda las salas del evento
+        salas = self._rooms_for(dict(info, batch=None))
+        delta = self.registro.desde(last_seq, salas, src) if last_seq >= 0 else None
+        if delta is not None:
+            # El stock trae la existencia completa: basta el último de cada producto
+            vistos = set()
+            ultimos = []
+            for seq, evento, datos in reversed(delta):
+                if evento == EVENTO_STOCK:
+                    if datos.get('product_id') in vistos:
+                        continue
+                    vistos.add(datos.get('product_id'))
+                ultimos.append((seq, evento, datos))
+            for seq, evento, datos in reversed(ultimos):
+                emit(evento, dict(datos, seq=seq, src=self.registro.origen))
+            emit('events_caught_up', {
+                'src': self.registro.origen,
+                'last_seq': self.registro.seq,
+                'replayed': len(ultimos),
+                'missed': len(delta)
+            })
+            return
+        self._snapshot(info)
+    
+    def _snapshot(self, info):
+        """Foto del estado para el cliente actual cuando no se le puede repetir lo perdido"""
+        # El seq se toma antes de consultar: lo que llegue después puede repetirse,
+        # pero los eventos de stock traen la existencia completa
+        seq = self.registro.seq
+        try:
+            productos = None
+            if info['products']:
+                productos = [int(product_id) for product_id in info['products'] if product_id.isdigit()]
+            existencias = ExistenciasService.existencias_activas(productos)
+            bajos = [producto['id_productos'] for producto in stock_bajo.productos()]
+        except Exception as e:
+            print(f"[SOCKET] Error armando foto para reconexión: {e}")
+            emit('events_reset', {'src': self.registro.origen, 'last_seq': seq, 'error': str(e)})
+            return
+        self.registro.foto_enviada()
+        if productos is not None:
+            bajos = [producto_id for producto_id in bajos if producto_id in existencias]
+        emit('events_snapshot', {
+            'src': self.registro.origen,
+            'last_seq': seq,
+            'stock': existencias,
+            'low_stock': bajos,
             'timestamp': self._get_timestamp()
         })
     
+    def _branch(self, sid):
+        with self.lock:
+            info = self.clients.get(sid)
+        return info['branch'] if info and info['branch'] else Config.FOLIO_SUCURSAL
+    
+    def _low_stock_rooms(self, product_id):
+        return [role_room(ROLE_ADMIN), ROOM_ALL_PRODUCTS, product_room(product_id)]
+    
+    def stats(self):
+        """Clientes conectados a este proceso, por tipo y por sucursal"""
+        with self.lock:
+            clients = list(self.clients.values())
+        por_tipo = {}
+        por_sucursal = {}
+        for info in clients:
+            por_tipo[info['type']] = por_tipo.get(info['type'], 0) + 1
+            por_sucursal[info['branch']] = por_sucursal.get(info['branch'], 0) + 1
+        return {
+            'clientes': len(clients),
+            'con_interes_por_producto': sum(1 for info in clients if info['products']),
+            'en_lote': sum(1 for info in clients if info.get('batch')),
+            'por_tipo': por_tipo,
+            'por_sucursal': por_sucursal,
+            'eventos': eventos.stats(),
+            'lotes': self.lotes.stats() if self.lotes is not None else None,
+            'registro': self.registro.stats() if self.registro is not None else None
+        }
+    
+    def dispatch_events(self):
+        """Tarea de fondo: repartir los eventos del bus a sus salas, un lote por ventana"""
+        eventos.iniciar()
+        # Sin eventos nuevos, despertar cada intervalo para cerrar los frames vencidos
+        espera = self.lotes.intervalo if self.lotes is not None else None
+        while True:
+            try:
+                for evento, datos in eventos.tomar(espera):
+                    self._send(evento, datos, self._event_rooms(evento, datos))
+                if self.lotes is not None:
+                    self._flush(self.lotes.vencidas())
+            except Exception as e:
+                print(f"[SOCKET] Error repartiendo eventos: {e}")
+                self.socketio.sleep(1)
+    
+    def _event_rooms(self, evento, datos):
+        if evento == EVENTO_STOCK:
+            return [ROOM_ALL_PRODUCTS, product_room(datos['product_id'])]
+        if evento in (EVENTO_STOCK_BAJO, EVENTO_STOCK_RECUPERADO):
+            return self._low_stock_rooms(datos['product_id'])
+        if evento == EVENTO_VENTA:
+            # Las ventas de este servidor son de su sucursal
+            return [branch_room(Config.FOLIO_SUCURSAL)]
+        return [ROOM_ALL]
+    
+    # Métodos públicos para notificaciones desde otras partes del sistema.
+    # Publican en el bus de eventos como los servicios; dispatch_events los
+    # combina y los reparte.
+    def notify_stock_update(self, product_id, new_stock, reason=""):
+        """Método para notificar actualización de stock desde otros servicios"""
+        eventos.stock({product_id: new_stock}, reason)
+    
     def notify_new_sale(self, sale_id, total, client_name="N/A"):
         """Método para notificar nueva venta desde otros servicios"""
-        self.handle_new_sale({
-            'sale_id': sale_id,
-            'total': total,
-            'client_name': client_name,
-            'timestamp': self._get_timestamp()
-        })
+        eventos.venta(sale_id, None, total, cliente=client_name)
+    
+    def notify_sale_ticket(self, ticket):
+        """Notificar el resultado de una venta encolada en modo asíncrono"""
+        eventos.ticket(ticket)
     
     def notify_new_product(self, product_id, product_name):
         """Método para notificar nuevo producto desde otros servicios"""
-        self.handle_new_product({
-            'product_id': product_id,
-            'product_name': product_name,
-            'timestamp': self._get_timestamp()
-        })
+        eventos.producto(product_id, product_name)
     
     def notify_low_stock(self, product_id, product_name, current_stock, min_stock):
         """Método para notificar stock bajo desde otros servicios"""
-        self.handle_low_stock_alert({
+        self._send('low_stock_warning', {
             'product_id': product_id,
             'product_name': product_name,
             'current_stock': current_stock,
             'min_stock': min_stock,
-            'timestamp': self._get_timestamp()
-        })
+            'timestamp': self._get_timestamp(),
+            'message': f'Stock bajo: {product_name} ({current_stock} unidades)'
+        }, self._low_stock_rooms(product_id))
     
     def _get_timestamp(self):
         """Obtener timestamp actual"""
         from datetime import datetime
         return datetime.now().isoformat()
 
+_notification_server = None
+
 def initialize_sockets(socketio):
     """Función para inicializar el servidor de sockets"""
+    global _notification_server
     notification_server = NotificationServer(socketio)
+    _notification_server = notification_server
+    socketio.start_background_task(notification_server.dispatch_events)
     print("[SOCKET] Servidor de notificaciones inicializado")
-    return notification_server
\ No newline at end of file
+    return notification_server
+
+def get_notification_server():
+    """Servidor inicializado por create_app, o None fuera del servidor (scripts, pruebas)"""
+    return _notification_server
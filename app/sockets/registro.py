@@ -0,0 +1,76 @@
+import os
+import socket
+import threading
+from collections import deque
+
+class RegistroEventos:
+    """Últimos eventos enviados por NotificationServer, con número de secuencia.
+    
+    Cada evento que sale a las salas recibe un `seq` consecutivo del proceso
+    (`origen`) y se guarda con las salas a las que fue. Cuando una terminal se
+    reconecta y manda el último seq que vio, se le repiten solo los eventos
+    posteriores de sus salas. Si ya no caben en los `capacidad` guardados o el
+    seq es de otro proceso (el servidor se reinició, otra instancia), no hay
+    forma de saber qué perdió y recibe una foto del estado en su lugar.
+    """
+    
+    def __init__(self, capacidad):
+        self.capacidad = capacidad
+        self.origen = f'{socket.gethostname()}:{os.getpid()}'
+        self._eventos = deque(maxlen=capacidad)  # (seq, evento, datos, salas)
+        self._lock = threading.Lock()
+        self.seq = 0
+        self.repeticiones = 0
+        self.repetidos = 0
+        self.fotos = 0
+    
+    def agregar(self, evento, datos, salas):
+        """Guardar el evento y regresar su seq"""
+        with self._lock:
+            self.seq += 1
+            self._eventos.append((self.seq, evento, datos, frozenset(salas)))
+            return self.seq
+    
+    def desde(self, ultimo_seq, salas, origen):
+        """Eventos con seq mayor a `ultimo_seq` enviados a alguna de `salas`.
+        
+        Regresa una lista de (seq, evento, datos) en orden, o None si el hueco
+        ya no está completo en el registro y hace falta una foto.
+        """
+        with self._lock:
+            seq = self.seq
+            eventos = list(self._eventos)
+        if origen != self.origen:
+            return None  # sin src no se sabe de qué contador es ultimo_seq
+        if ultimo_seq > seq:
+            return None  # seq de antes de un reinicio
+        if ultimo_seq == seq:
+            return []
+        if not eventos or eventos[0][0] > ultimo_seq + 1:
+            return None
+        salas = set(salas)
+        delta = [
+            (seq_evento, evento, datos) for seq_evento, evento, datos, salas_evento in eventos
+            if seq_evento > ultimo_seq and not salas_evento.isdisjoint(salas)
+        ]
+        with self._lock:
+            self.repeticiones += 1
+            self.repetidos += len(delta)
+        return delta
+    
+    def foto_enviada(self):
+        with self._lock:
+            self.fotos += 1
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'origen': self.origen,
+                'seq': self.seq,
+                'capacidad': self.capacidad,
+                'guardados': len(self._eventos),
+                'primer_seq': self._eventos[0][0] if self._eventos else None,
+                'repeticiones': self.repeticiones,
+                'repetidos': self.repetidos,
+                'fotos': self.fotos
+            }
@@ -0,0 +1,613 @@
+"""Latencia y throughput de cada ruta REST sobre datos sintéticos en SQLite.
+
+Para cada tamaño de datos genera una base SQLite nueva con
+app.database.semilla, levanta la aplicación con main.create_app() y recorre
+los escenarios con el test client de Flask (sin red ni servidor WSGI, se mide
+el handler, los servicios y la base). Por escenario reporta p50/p95/p99,
+media, máximo y peticiones por segundo; las respuestas con un status
+distinto al esperado se cuentan como errores.
+
+Cada tamaño corre en un proceso aparte: DatabaseManager, el catálogo de
+productos y las cachés son globales del proceso y se configuran al importar.
+Los escenarios de escritura corren después de las lecturas, así las lecturas
+miden los datos recién generados.
+
+Con --salida el resultado se guarda en JSON; con --base se compara contra
+un resultado anterior (por defecto el p95) y el proceso termina con 1 si
+algún escenario empeoró más de --tolerancia. Un baseline se crea guardando
+una corrida con --salida.
+
+Uso:
+    python -m benchmarks.bench_endpoints --tamanos chico mediano --salida base.json
+    python -m benchmarks.bench_endpoints --tamanos chico mediano --base base.json
+    python -m benchmarks.bench_endpoints --solo ventas reportes --repeticiones 200
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, namedtuple
+from datetime import datetime, timedelta
+
+TAMANOS = {
+    'chico': {'productos': 500, 'clientes': 200, 'empleados': 10, 'ventas': 5000, 'dias': 30},
+    'mediano': {'productos': 2000, 'clientes': 500, 'empleados': 20, 'ventas': 50000, 'dias': 90},
+    'grande': {'productos': 10000, 'clientes': 2000, 'empleados': 40, 'ventas': 500000, 'dias': 365},
+}
+
+METRICAS = ('p50_ms', 'p95_ms', 'p99_ms', 'media_ms')
+
+# Productos que usan los escenarios de venta; el máximo de renglones por ticket es 50
+PRODUCTOS_VENTA = 200
+
+Escenario = namedtuple(
+    'Escenario', 'nombre metodo regla peticion esperado preparar antes max_repeticiones',
+    defaults=((200,), None, None, None)
+)
+
+def percentil(ordenados, p):
+    """Percentil por rango más cercano sobre una lista ya ordenada"""
+    if not ordenados:
+        return None
+    indice = max(0, min(len(ordenados) - 1, int(round(p / 100 * len(ordenados) + 0.5)) - 1))
+    return ordenados[indice]
+
+# ---------------------------------------------------------------------------
+# Escenarios
+
+def _items_venta(ctx, i, renglones):
+    productos = ctx['productos_venta']
+    return [
+        {
+            'fk_productos': productos[(i * renglones + k) % len(productos)][0],
+            'cantidad_productos': 1,
+            'precio_unitario': productos[(i * renglones + k) % len(productos)][1]
+        }
+        for k in range(renglones)
+    ]
+
+def _venta(renglones, **extra):
+    def peticion(ctx, i):
+        venta = {
+            'fk_empleados': ctx['empleado_id'],
+            'fk_metodo_pago': 1,
+            'terminal': 'BENCH',
+            'items': _items_venta(ctx, i, renglones)
+        }
+        venta.update(extra)
+        return '/api/ventas', {'json': venta}
+    return peticion
+
+def _venta_credito(ctx, i):
+    url, kwargs = _venta(1, fk_ventas_tipo=2)(ctx, i)
+    kwargs['json']['fk_cliente'] = ctx['cliente_id']
+    return url, kwargs
+
+def _venta_async(ctx, i):
+    url, kwargs = _venta(1)(ctx, i)
+    return url + '?modo=async', kwargs
+
+def _venta_repetida(ctx, i):
+    # Misma llave en todas las peticiones: después de la primera es un replay
+    url, kwargs = _venta(1)(ctx, 0)
+    kwargs['headers'] = {'Idempotency-Key': f"bench-{ctx['corrida']}"}
+    return url, kwargs
+
+def _ticket(ctx, i):
+    tickets = ctx['tickets']
+    return f"/api/ventas/tickets/{tickets[i % len(tickets)]}", {}
+
+def _surtir_productos_venta(ctx, total):
+    """Existencia suficiente para todas las ventas del benchmark"""
+    from app.services.inventario_service import InventarioService
+    for producto_id, _ in ctx['productos_venta']:
+        InventarioService.ajustar_inventario(producto_id, ctx['empleado_id'], 10 ** 7, 'benchmark')
+
+def _preparar_tickets(ctx, total):
+    from app.services.venta_cola import cola_ventas
+    ctx['tickets'] = [
+        cola_ventas.encolar({
+            'fk_empleados': ctx['empleado_id'],
+            'fk_metodo_pago': 1,
+            'terminal': 'BENCH',
+            'items': _items_venta(ctx, i, 1)
+        })['ticket']
+        for i in range(min(total, 50))
+    ]
+
+def _preparar_borrables(generar, llave):
+    def preparar(ctx, total):
+        from app.database.db_connection import DatabaseManager
+        with DatabaseManager().transaction() as cursor:
+            ctx[llave] = generar(cursor, total, random.Random(total))
+    return preparar
+
+def _borrar(ruta, llave):
+    def peticion(ctx, i):
+        ids = ctx[llave]
+        return f"{ruta}/{ids[i % len(ids)]}", {}
+    return peticion
+
+def _invalidar_reportes(ctx):
+    from app.services.reporte_cache import reporte_cache
+    reporte_cache.invalidar()
+
+def _preparar_sync(ctx, total):
+    """Token de sincronización seguido de ediciones de precio, como las de un día normal"""
+    from app.services.product_service import ProductService
+    from app.services.sync_service import SyncService
+    ctx['sync_token'] = SyncService.cambios()['token']
+    for producto_id, precio in ctx['productos_venta'][:20]:
+        ProductService.update_product(producto_id, {'precio_venta': precio})
+
+def _get(url):
+    return lambda ctx, i: (url.format(**ctx), {})
+
+def _post(url, cuerpo):
+    return lambda ctx, i: (url.format(**ctx), {'json': cuerpo(ctx, i)})
+
+def _put(url, cuerpo):
+    return _post(url, cuerpo)
+
+def _reportes():
+    rutas = [
+        ('ventas_periodo', '/api/reportes/ventas/periodo'),
+        ('mas_vendidos', '/api/reportes/productos/mas-vendidos'),
+        ('empleados', '/api/reportes/ventas/empleados'),
+        ('metodos_pago', '/api/reportes/ventas/metodos-pago'),
+    ]
+    escenarios = []
+    for nombre, ruta in rutas:
+        escenarios.append(Escenario(f'reportes.{nombre}', 'GET', ruta, _get(ruta)))
+        escenarios.append(Escenario(
+            f'reportes.{nombre}.frio', 'GET', ruta, _get(ruta), antes=_invalidar_reportes
+        ))
+        escenarios.append(Escenario(
+            f'reportes.{nombre}.todo_el_rango.frio', 'GET', ruta,
+            _get(ruta + '?fecha_inicio={primera_fecha}&fecha_fin={ultima_fecha}'),
+            antes=_invalidar_reportes, max_repeticiones=50
+        ))
+    estadisticas = '/api/reportes/inventario/estadisticas'
+    escenarios.append(Escenario('reportes.estadisticas_inventario', 'GET', estadisticas, _get(estadisticas)))
+    escenarios.append(Escenario(
+        'reportes.estadisticas_inventario.ledger', 'GET', estadisticas,
+        _get(estadisticas + '?fuente=ledger'), max_repeticiones=50
+    ))
+    return escenarios
+
+def _cliente_nuevo(ctx, i):
+    return {'nombre': f'Cliente bench {i}', 'telefono': '5550000000', 'rfc': f'BEN{i:010d}'}
+
+def _empleado_nuevo(ctx, i):
+    return {'nombre': 'Empleado', 'apellido_1': f'Bench{i}', 'rfc': f'EMP{i:010d}', 'telefono': '5550000000'}
+
+def _producto_nuevo(ctx, i):
+    return {'nombre': f'Producto bench {i}', 'precio_compra': 10, 'precio_venta': 15,
+            'codigo_barras': f'99{i:011d}', 'fk_categorias': 1, 'fk_marcas': 1, 'fk_unidades_medida': 1}
+
+def _proveedor_nuevo(ctx, i):
+    return {'nombre': f'Proveedor bench {i}', 'telefono': '5550000000', 'rfc': f'PRV{i:010d}'}
+
+def escenarios():
+    """Escenarios en orden de ejecución: lecturas, escrituras y al final bajas"""
+    from app.database.semilla import generar_clientes, generar_empleados
+    
+    ventas_escritura = [
+        Escenario(f'ventas.crear.{renglones}_renglones', 'POST', '/api/ventas', _venta(renglones),
+                  preparar=_surtir_productos_venta)
+        for renglones in (1, 10, 50)
+    ]
+    return [
+        # Sistema
+        Escenario('sistema.api', 'GET', '/api', _get('/api')),
+        Escenario('sistema.health', 'GET', '/api/health', _get('/api/health')),
+        Escenario('sistema.info', 'GET', '/api/system/info', _get('/api/system/info')),
+        Escenario('sistema.pool', 'GET', '/api/system/pool', _get('/api/system/pool')),
+        Escenario('sistema.productos', 'GET', '/api/system/productos', _get('/api/system/productos')),
+        Escenario('sistema.ventas', 'GET', '/api/system/ventas', _get('/api/system/ventas')),
+        Escenario('sistema.cache', 'GET', '/api/system/cache', _get('/api/system/cache')),
+        Escenario('sistema.reportes', 'GET', '/api/system/reportes', _get('/api/system/reportes')),
+        Escenario('sistema.metrics', 'GET', '/api/system/metrics', _get('/api/system/metrics')),
+        Escenario('sistema.consultas', 'GET', '/api/system/consultas', _get('/api/system/consultas')),
+        Escenario('sistema.sockets', 'GET', '/api/system/sockets', _get('/api/system/sockets')),
+        # Productos
+        Escenario('productos.lista', 'GET', '/api/productos', _get('/api/productos?limit=50')),
+        Escenario('productos.buscar', 'GET', '/api/productos/buscar',
+                  lambda ctx, i: (f"/api/productos/buscar?q={ctx['busquedas'][i % len(ctx['busquedas'])]}", {})),
+        Escenario('productos.por_id', 'GET', '/api/productos/<int:producto_id>',
+                  _get('/api/productos/{producto_id}')),
+        Escenario('productos.por_codigo', 'GET', '/api/productos/codigo/<path:codigo_barras>',
+                  _get('/api/productos/codigo/{codigo_barras}')),
+        # Clientes, empleados, proveedores
+        Escenario('clientes.lista', 'GET', '/api/clientes', _get('/api/clientes?limit=50')),
+        Escenario('clientes.por_id', 'GET', '/api/clientes/<int:cliente_id>', _get('/api/clientes/{cliente_id}')),
+        Escenario('clientes.credito', 'GET', '/api/clientes/<int:cliente_id>/credito',
+                  _get('/api/clientes/{cliente_id}/credito')),
+        Escenario('clientes.ventas', 'GET', '/api/clientes/<int:cliente_id>/ventas',
+                  _get('/api/clientes/{cliente_id}/ventas?limit=50')),
+        Escenario('empleados.lista', 'GET', '/api/empleados', _get('/api/empleados?limit=50')),
+        Escenario('empleados.por_id', 'GET', '/api/empleados/<int:empleado_id>',
+                  _get('/api/empleados/{empleado_id}')),
+        Escenario('empleados.ventas', 'GET', '/api/empleados/<int:empleado_id>/ventas',
+                  _get('/api/empleados/{empleado_id}/ventas?limit=50')),
+        Escenario('proveedores.lista', 'GET', '/api/proveedores', _get('/api/proveedores')),
+        Escenario('proveedores.por_id', 'GET', '/api/proveedores/<int:proveedor_id>',
+                  _get('/api/proveedores/{proveedor_id}'), esperado=(200, 404)),
+        # Ventas
+        Escenario('ventas.lista', 'GET', '/api/ventas', _get('/api/ventas?limit=50')),
+        Escenario('ventas.por_id', 'GET', '/api/ventas/<int:venta_id>', _get('/api/ventas/{venta_id}')),
+        Escenario('ventas.metodos_pago', 'GET', '/api/ventas/metodos-pago', _get('/api/ventas/metodos-pago')),
+        Escenario('ventas.tipos_venta', 'GET', '/api/ventas/tipos-venta', _get('/api/ventas/tipos-venta')),
+        Escenario('ventas.exportar_7_dias', 'GET', '/api/ventas/exportar',
+                  _get('/api/ventas/exportar?fecha_inicio={semana_inicio}&fecha_fin={ultima_fecha}'),
+                  max_repeticiones=20),
+        # Inventario
+        Escenario('inventario.stock', 'GET', '/api/inventario/productos/<int:producto_id>/stock',
+                  _get('/api/inventario/productos/{producto_id}/stock')),
+        Escenario('inventario.movimientos', 'GET', '/api/inventario/productos/<int:producto_id>/movimientos',
+                  _get('/api/inventario/productos/{producto_id}/movimientos')),
+        Escenario('inventario.stock_bajo', 'GET', '/api/inventario/stock-bajo', _get('/api/inventario/stock-bajo')),
+        Escenario('inventario.exportar_7_dias', 'GET', '/api/inventario/movimientos/exportar',
+                  _get('/api/inventario/movimientos/exportar?fecha_inicio={semana_inicio}&fecha_fin={ultima_fecha}'),
+                  max_repeticiones=20),
+        # Reportes
+        *_reportes(),
+        # Sincronización de terminales
+        Escenario('sync.completa', 'GET', '/api/sync/changes', _get('/api/sync/changes'), max_repeticiones=20),
+        Escenario('sync.delta', 'GET', '/api/sync/changes', _get('/api/sync/changes?since={sync_token}'),
+                  preparar=_preparar_sync),
+        # Escrituras
+        Escenario('auth.login_desconocido', 'POST', '/api/auth/login',
+                  _post('/api/auth/login', lambda ctx, i: {'usuario': 'bench', 'password': 'x'}),
+                  esperado=(401,)),
+        *ventas_escritura,
+        Escenario('ventas.crear.credito', 'POST', '/api/ventas',
+                  _venta_credito, preparar=_surtir_productos_venta),
+        Escenario('ventas.crear.idempotente_repetida', 'POST', '/api/ventas', _venta_repetida,
+                  preparar=_surtir_productos_venta),
+        Escenario('ventas.crear.async', 'POST', '/api/ventas', _venta_async, esperado=(202, 503),
+                  preparar=_surtir_productos_venta),
+        Escenario('ventas.ticket', 'GET', '/api/ventas/tickets/<ticket_id>', _ticket,
+                  preparar=_preparar_tickets),
+        Escenario('inventario.entrada', 'POST', '/api/inventario/entrada',
+                  _post('/api/inventario/entrada', lambda ctx, i: {
+                      'producto_id': ctx['producto_id'], 'empleado_id': ctx['empleado_id'], 'cantidad': 1
+                  })),
+        Escenario('inventario.ajustar', 'POST', '/api/inventario/ajustar',
+                  _post('/api/inventario/ajustar', lambda ctx, i: {
+                      'producto_id': ctx['producto_id'], 'empleado_id': ctx['empleado_id'],
+                      'nueva_cantidad': 1000 + i % 2
+                  })),
+        Escenario('productos.crear', 'POST', '/api/productos', _post('/api/productos', _producto_nuevo)),
+        Escenario('productos.actualizar', 'PUT', '/api/productos/<int:producto_id>',
+                  _put('/api/productos/{producto_id}', lambda ctx, i: {'stock_minimo': i % 5})),
+        Escenario('clientes.crear', 'POST', '/api/clientes', _post('/api/clientes', _cliente_nuevo)),
+        Escenario('clientes.actualizar', 'PUT', '/api/clientes/<int:cliente_id>',
+                  _put('/api/clientes/{cliente_id}', lambda ctx, i: {
+                      'nombre': 'Cliente bench', 'rfc': 'BEN0000000000', 'limite_credito': 10000
+                  })),
+        Escenario('empleados.crear', 'POST', '/api/empleados', _post('/api/empleados', _empleado_nuevo)),
+        Escenario('empleados.actualizar', 'PUT', '/api/empleados/<int:empleado_id>',
+                  _put('/api/empleados/{empleado_id}', lambda ctx, i: {
+                      'nombre': 'Empleado', 'apellido_1': 'Bench', 'rfc': 'EMP0000000000'
+                  })),
+        Escenario('proveedores.crear', 'POST', '/api/proveedores', _post('/api/proveedores', _proveedor_nuevo)),
+        Escenario('sistema.cache_invalidar', 'POST', '/api/system/cache/invalidar',
+                  _post('/api/system/cache/invalidar', lambda ctx, i: {'catalogo': None})),
+        Escenario('sistema.reportes_invalidar', 'POST', '/api/system/reportes/invalidar',
+                  _post('/api/system/reportes/invalidar', lambda ctx, i: {})),
+        # Bajas lógicas sobre registros creados para el benchmark
+        Escenario('clientes.eliminar', 'DELETE', '/api/clientes/<int:cliente_id>',
+                  _borrar('/api/clientes', 'clientes_borrables'),
+                  preparar=_preparar_borrables(generar_clientes, 'clientes_borrables')),
+        Escenario('empleados.eliminar', 'DELETE', '/api/empleados/<int:empleado_id>',
+                  _borrar('/api/empleados', 'empleados_borrables'),
+                  preparar=_preparar_borrables(generar_empleados, 'empleados_borrables')),
+    ]
+
+# ---------------------------------------------------------------------------
+# Proceso trabajador: un tamaño de datos
+
+def contexto():
+    """Ids y fechas reales de la base recién generada para armar las URLs"""
+    from app.database.db_connection import execute_query
+    from config import Config
+    
+    activo = Config.ESTATUS_ACTIVO
+    productos = execute_query(
+        "SELECT TOP (?) id_productos, precio_venta, codigo_barras, nombre FROM productos "
+        "WHERE fk_estatus_general = ? ORDER BY id_productos",
+        (PRODUCTOS_VENTA, activo), fetch_all=True
+    )
+    fecha = lambda orden: (execute_query(
+        f"SELECT TOP 1 fecha_ventas FROM ventas ORDER BY fecha_ventas {orden}", fetch=True
+    ) or {}).get('fecha_ventas')
+    primero = lambda query: execute_query(query, (activo,), fetch=True)
+    proveedor = execute_query("SELECT TOP 1 id_proveedores FROM proveedores ORDER BY id_proveedores", fetch=True)
+    ultima = fecha('DESC') or datetime.now()
+    
+    return {
+        'corrida': f"{os.getpid()}-{int(time.time())}",
+        'productos_venta': [(row['id_productos'], float(row['precio_venta'])) for row in productos],
+        'producto_id': productos[0]['id_productos'],
+        'codigo_barras': productos[0]['codigo_barras'],
+        'busquedas': sorted({row['nombre'].split()[0].lower()[:4] for row in productos}),
+        'empleado_id': primero(
+            "SELECT TOP 1 id_empleados FROM empleados WHERE fk_estatus_general = ? ORDER BY id_empleados"
+        )['id_empleados'],
+        'cliente_id': primero(
+            "SELECT TOP 1 id_clientes FROM clientes WHERE fk_estatus_general = ? ORDER BY id_clientes"
+        )['id_clientes'],
+        'venta_id': primero(
+            "SELECT TOP 1 id_ventas FROM ventas WHERE fk_estatus_general = ? ORDER BY id_ventas DESC"
+        )['id_ventas'],
+        'proveedor_id': proveedor['id_proveedores'] if proveedor else 1,
+        'primera_fecha': (fecha('ASC') or ultima).strftime('%Y-%m-%d'),
+        'ultima_fecha': ultima.strftime('%Y-%m-%d'),
+        'semana_inicio': (ultima - timedelta(days=6)).strftime('%Y-%m-%d'),
+        'tickets': [],
+    }
+
+def medir(app, escenario, ctx, repeticiones, calentamiento, hilos):
+    total = min(repeticiones, escenario.max_repeticiones or repeticiones)
+    calentamiento = min(calentamiento, total)
+    if escenario.preparar:
+        escenario.preparar(ctx, total + calentamiento)
+    
+    def peticion(cliente, indice):
+        url, kwargs = escenario.peticion(ctx, indice)
+        if escenario.antes:
+            escenario.antes(ctx)
+        inicio = time.perf_counter()
+        respuesta = cliente.open(url, method=escenario.metodo, **kwargs)
+        respuesta.get_data()  # consumir respuestas en streaming dentro de la medición
+        return (time.perf_counter() - inicio) * 1000, respuesta
+    
+    cliente = app.test_client()
+    for indice in range(calentamiento):
+        peticion(cliente, indice)
+    
+    latencias = []
+    estados = Counter()
+    primer_error = []
+    lock = threading.Lock()
+    siguiente = iter(range(calentamiento, calentamiento + total))
+    
+    def trabajar():
+        cliente = app.test_client()
+        while True:
+            with lock:
+                indice = next(siguiente, None)
+            if indice is None:
+                return
+            ms, respuesta = peticion(cliente, indice)
+            with lock:
+                latencias.append(ms)
+                estados[respuesta.status_code] += 1
+                if respuesta.status_code not in escenario.esperado and not primer_error:
+                    primer_error.append(respuesta.get_data(as_text=True)[:300])
+    
+    inicio = time.perf_counter()
+    threads = [threading.Thread(target=trabajar) for _ in range(hilos)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    segundos = time.perf_counter() - inicio
+    
+    latencias.sort()
+    return {
+        'metodo': escenario.metodo,
+        'regla': escenario.regla,
+        'peticiones': len(latencias),
+        'errores': sum(n for estado, n in estados.items() if estado not in escenario.esperado),
+        'estados': {str(estado): n for estado, n in sorted(estados.items())},
+        'p50_ms': percentil(latencias, 50),
+        'p95_ms': percentil(latencias, 95),
+        'p99_ms': percentil(latencias, 99),
+        'media_ms': sum(latencias) / len(latencias) if latencias else None,
+        'max_ms': latencias[-1] if latencias else None,
+        'peticiones_por_segundo': len(latencias) / segundos if segundos else None,
+        'primer_error': primer_error[0] if primer_error else None,
+    }
+
+def rutas_sin_escenario(app, lista):
+    cubiertas = {(escenario.regla, escenario.metodo) for escenario in lista}
+    faltantes = []
+    for regla in app.url_map.iter_rules():
+        if regla.endpoint == 'static':
+            continue
+        for metodo in sorted(regla.methods - {'HEAD', 'OPTIONS'}):
+            if (regla.rule, metodo) not in cubiertas:
+                faltantes.append(f"{metodo} {regla.rule}")
+    return sorted(faltantes)
+
+def trabajador(args):
+    """Generar los datos del tamaño, correr los escenarios y escribir el JSON"""
+    from app.database.semilla import conteos, sembrar
+    
+    parametros = TAMANOS[args.trabajador]
+    generacion = None
+    if not args.reusar or conteos()['ventas'] == 0:
+        generacion = sembrar(semilla=args.semilla, **parametros)
+    
+    from main import create_app
+    app, _ = create_app()
+    ctx = contexto()
+    lista = [
+        escenario for escenario in escenarios()
+        if not args.solo or any(filtro in escenario.nombre for filtro in args.solo)
+    ]
+    
+    resultados = {}
+    for escenario in lista:
+        resultados[escenario.nombre] = medir(
+            app, escenario, ctx, args.repeticiones, args.calentamiento, args.hilos
+        )
+        print(f"[BENCH] {args.trabajador} {escenario.nombre}: "
+              f"p50={resultados[escenario.nombre]['p50_ms']:.2f}ms", file=sys.stderr)
+    
+    with open(args.resultado, 'w', encoding='utf-8') as archivo:
+        json.dump({
+            'parametros': parametros,
+            'generacion': generacion,
+            'escenarios': resultados,
+            'rutas_sin_escenario': rutas_sin_escenario(app, escenarios()),
+        }, archivo, indent=2, default=str)
+
+# ---------------------------------------------------------------------------
+# Proceso principal: un trabajador por tamaño, resultados y comparación
+
+def correr_tamano(args, tamano, directorio):
+    ruta_bd = os.path.join(directorio, f'bench_{tamano}.db')
+    if not args.reusar:
+        for sufijo in ('', '-wal', '-shm'):
+            if os.path.exists(ruta_bd + sufijo):
+                os.remove(ruta_bd + sufijo)
+    resultado = os.path.join(directorio, f'resultado_{tamano}.json')
+    
+    comando = [
+        sys.executable, '-m', 'benchmarks.bench_endpoints', '--trabajador', tamano,
+        '--resultado', resultado, '--repeticiones', str(args.repeticiones),
+        '--calentamiento', str(args.calentamiento), '--hilos', str(args.hilos),
+    ]
+    if args.semilla is not None:
+        comando += ['--semilla', str(args.semilla)]
+    if args.reusar:
+        comando.append('--reusar')
+    if args.solo:
+        comando += ['--solo', *args.solo]
+    
+    entorno = dict(os.environ, DB_BACKEND='sqlite', SQLITE_RUTA=ruta_bd, SQLITE_CREAR_ESQUEMA='true')
+    proceso = subprocess.run(
+        comando, env=entorno, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        stdout=subprocess.PIPE, stderr=None if args.verbose else subprocess.PIPE, text=True
+    )
+    if proceso.returncode != 0:
+        salida = (proceso.stderr or '') + proceso.stdout
+        raise SystemExit(f"El tamaño {tamano} falló:\n{salida[-3000:]}")
+    with open(resultado, encoding='utf-8') as archivo:
+        return json.load(archivo)
+
+def version_codigo():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def comparar(actual, base, metrica, tolerancia, minimo_ms):
+    """Escenarios cuyo valor de `metrica` empeoró más de `tolerancia` contra la base"""
+    filas = []
+    for tamano, datos in actual['tamanos'].items():
+        base_tamano = base.get('tamanos', {}).get(tamano, {}).get('escenarios', {})
+        for nombre, resultado in datos['escenarios'].items():
+            anterior = base_tamano.get(nombre, {}).get(metrica)
+            valor = resultado.get(metrica)
+            if anterior is None or valor is None:
+                continue
+            cambio = (valor - anterior) / anterior if anterior else 0.0
+            filas.append({
+                'tamano': tamano,
+                'escenario': nombre,
+                'base': anterior,
+                'actual': valor,
+                'cambio': cambio,
+                'regresion': cambio > tolerancia and valor - anterior > minimo_ms
+            })
+    return filas
+
+def imprimir(resultados):
+    for tamano, datos in resultados['tamanos'].items():
+        print(f"\n== {tamano} {datos['parametros']}")
+        print(f"{'escenario':<44} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9} {'err':>4}")
+        for nombre, r in datos['escenarios'].items():
+            print(f"{nombre:<44} {r['peticiones']:>5} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} "
+                  f"{r['p99_ms']:>9.2f} {r['peticiones_por_segundo']:>9.1f} {r['errores']:>4}")
+        if datos['rutas_sin_escenario']:
+            print(f"Rutas sin escenario: {', '.join(datos['rutas_sin_escenario'])}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tamanos', nargs='+', choices=list(TAMANOS), default=['chico'])
+    parser.add_argument('--repeticiones', type=int, default=100)
+    parser.add_argument('--calentamiento', type=int, default=5)
+    parser.add_argument('--hilos', type=int, default=1, help='Clientes concurrentes por escenario')
+    parser.add_argument('--solo', nargs='+', help='Correr solo los escenarios que contengan estos textos')
+    parser.add_argument('--semilla', type=int, default=1, help='Semilla de los datos sintéticos')
+    parser.add_argument('--directorio', help='Dónde dejar las bases SQLite; por defecto uno temporal')
+    parser.add_argument('--reusar', action='store_true', help='Reusar las bases de --directorio sin regenerarlas')
+    parser.add_argument('--salida', help='Guardar el resultado en este JSON')
+    parser.add_argument('--base', help='Resultado anterior contra el cual comparar')
+    parser.add_argument('--metrica', choices=METRICAS, default='p95_ms')
+    parser.add_argument('--tolerancia', type=float, default=0.20, help='Empeoramiento relativo permitido')
+    parser.add_argument('--minimo-ms', type=float, default=1.0,
+                        help='Diferencia absoluta mínima para contar una regresión')
+    parser.add_argument('--json', action='store_true')
+    parser.add_argument('--verbose', action='store_true', help='Mostrar la salida de los trabajadores')
+    parser.add_argument('--trabajador', choices=list(TAMANOS), help=argparse.SUPPRESS)
+    parser.add_argument('--resultado', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.trabajador:
+        trabajador(args)
+        return
+    
+    if args.directorio:
+        os.makedirs(args.directorio, exist_ok=True)
+        directorio = args.directorio
+    else:
+        directorio = tempfile.mkdtemp(prefix='bench_endpoints_')
+    
+    resultados = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'version': version_codigo(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'backend': 'sqlite',
+        'repeticiones': args.repeticiones,
+        'calentamiento': args.calentamiento,
+        'hilos': args.hilos,
+        'tamanos': {}
+    }
+    for tamano in args.tamanos:
+        resultados['tamanos'][tamano] = correr_tamano(args, tamano, directorio)
+    
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as archivo:
+            json.dump(resultados, archivo, indent=2)
+    
+    regresiones = []
+    if args.base:
+        with open(args.base, encoding='utf-8') as archivo:
+            base = json.load(archivo)
+        comparacion = comparar(resultados, base, args.metrica, args.tolerancia, args.minimo_ms)
+        resultados['comparacion'] = {
+            'base': args.base,
+            'metrica': args.metrica,
+            'tolerancia': args.tolerancia,
+            'escenarios': comparacion
+        }
+        regresiones = [fila for fila in comparacion if fila['regresion']]
+    
+    if args.json:
+        print(json.dumps(resultados, indent=2))
+    else:
+        imprimir(resultados)
+        if args.base:
+            print(f"\nComparación contra {args.base} ({args.metrica}, tolerancia {args.tolerancia:.0%})")
+            for fila in resultados['comparacion']['escenarios']:
+                marca = '  REGRESIÓN' if fila['regresion'] else ''
+                print(f"{fila['tamano']:<8} {fila['escenario']:<44} {fila['base']:>9.2f} -> "
+                      f"{fila['actual']:>9.2f} ({fila['cambio']:+.0%}){marca}")
+    raise SystemExit(1 if regresiones else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""Estadísticas de inventario sobre un ledger sintético en SQLite.
+
+Genera --productos productos y --movimientos renglones de
+movimiento_detalles (entradas y salidas) en una base SQLite y mide:
+
+    subconsultas  la consulta anterior, cuatro SUM correlacionados por producto
+    ledger        ReporteService con fuente='ledger', un GROUP BY sobre el ledger
+    existencias   ReporteService con fuente='existencias', saldo materializado
+
+Las tres rutas deben dar el mismo número de productos con stock bajo. La
+generación de 10M de movimientos tarda unos minutos; --archivo conserva la
+base para repetir la medición sin regenerarla.
+
+Uso:
+    python -m benchmarks.bench_estadisticas_inventario --productos 20000 --movimientos 10000000
+"""
+import argparse
+import json
+import os
+import sqlite3
+import time
+
+from app.services.reporte_service import ESTADISTICAS_INVENTARIO_QUERY, ESTADISTICAS_ORIGENES
+from config import Config
+
+ESQUEMA = """
+CREATE TABLE productos (
+    id_productos INTEGER PRIMARY KEY,
+    fk_categorias INTEGER,
+    stock_minimo INTEGER,
+    precio_compra REAL,
+    precio_venta REAL,
+    fk_estatus_general INTEGER
+);
+CREATE TABLE movimiento (
+    id_movimiento INTEGER PRIMARY KEY,
+    fk_movimiento_tipo INTEGER
+);
+CREATE TABLE movimiento_detalles (
+    id_movimiento_detalles INTEGER PRIMARY KEY,
+    fk_movimiento INTEGER,
+    fk_productos INTEGER,
+    cantidad INTEGER,
+    existencia_anterior INTEGER,
+    existencia_nueva INTEGER
+);
+CREATE TABLE productos_existencias (
+    fk_productos INTEGER PRIMARY KEY,
+    existencia INTEGER
+);
+"""
+
+# Consulta anterior a la reescritura: cuatro subconsultas correlacionadas por producto
+SUBCONSULTAS_QUERY = """
+SELECT
+    COUNT(*) as total_productos,
+    SUM(CASE
+        WHEN (
+            SELECT COALESCE(SUM(md.cantidad), 0)
+            FROM movimiento_detalles md
+            INNER JOIN movimiento m ON md.fk_movimiento = m.id_movimiento
+            WHERE md.fk_productos = p.id_productos AND m.fk_movimiento_tipo = 1
+        ) -
+        COALESCE((
+            SELECT SUM(md.cantidad)
+            FROM movimiento_detalles md
+            INNER JOIN movimiento m ON md.fk_movimiento = m.id_movimiento
+            WHERE md.fk_productos = p.id_productos AND m.fk_movimiento_tipo = 2
+        ), 0) <= p.stock_minimo THEN 1 ELSE 0
+    END) as productos_stock_bajo,
+    SUM(p.precio_venta * (
+        SELECT COALESCE(SUM(md.cantidad), 0)
+        FROM movimiento_detalles md
+        INNER JOIN movimiento m ON md.fk_movimiento = m.id_movimiento
+        WHERE md.fk_productos = p.id_productos AND m.fk_movimiento_tipo = 1
+    ) -
+    COALESCE((
+        SELECT SUM(md.cantidad)
+        FROM movimiento_detalles md
+        INNER JOIN movimiento m ON md.fk_movimiento = m.id_movimiento
+        WHERE md.fk_productos = p.id_productos AND m.fk_movimiento_tipo = 2
+    ), 0)) as valor_inventario_estimado
+FROM productos p
+WHERE p.fk_estatus_general = ?
+"""
+
+def generar(conexion, productos, movimientos, categorias):
+    """Ledger sintético: 60% entradas, 40% salidas, un movimiento por cada 10 renglones"""
+    inicio = time.perf_counter()
+    conexion.executescript(ESQUEMA)
+    conexion.execute(f"""
+    WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {productos})
+    INSERT INTO productos
+    SELECT i, i % {categorias} + 1, i % 15, 10 + i % 90, (10 + i % 90) * 1.35,
+           CASE WHEN i % 50 = 0 THEN 2 ELSE {Config.ESTATUS_ACTIVO} END
+    FROM n
+    """)
+    conexion.execute(f"""
+    WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {movimientos // 10 + 1})
+    INSERT INTO movimiento SELECT i, CASE WHEN abs(random()) % 10 < 6 THEN 1 ELSE 2 END FROM n
+    """)
+    conexion.execute(f"""
+    WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {movimientos})
+    INSERT INTO movimiento_detalles
+    SELECT i, i / 10 + 1, abs(random()) % {productos} + 1, abs(random()) % 5 + 1, 0, 0 FROM n
+    """)
+    conexion.execute("CREATE INDEX ix_md_producto ON movimiento_detalles (fk_productos, fk_movimiento)")
+    conexion.execute(f"""
+    INSERT INTO productos_existencias
+    SELECT fk_productos, existencia FROM {ESTADISTICAS_ORIGENES['ledger']}
+    """)
+    conexion.commit()
+    return time.perf_counter() - inicio
+
+def medir(conexion, query, params):
+    inicio = time.perf_counter()
+    filas = conexion.execute(query, params).fetchall()
+    return (time.perf_counter() - inicio) * 1000, filas
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--productos', type=int, default=20000)
+    parser.add_argument('--movimientos', type=int, default=10_000_000)
+    parser.add_argument('--categorias', type=int, default=40)
+    parser.add_argument('--archivo', help='Base SQLite a reutilizar; por defecto en memoria')
+    parser.add_argument('--sin-subconsultas', action='store_true',
+                        help='Omitir la consulta anterior, que puede tardar minutos')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+    
+    existe = args.archivo and os.path.exists(args.archivo)
+    conexion = sqlite3.connect(args.archivo or ':memory:')
+    generacion = 0.0 if existe else generar(conexion, args.productos, args.movimientos, args.categorias)
+    
+    activo = Config.ESTATUS_ACTIVO
+    resultados = {'generacion_s': generacion}
+    stock_bajo = {}
+    
+    for fuente, origen in ESTADISTICAS_ORIGENES.items():
+        ms, filas = medir(conexion, ESTADISTICAS_INVENTARIO_QUERY.format(origen=origen), (activo,) * 6)
+        resultados[f'{fuente}_ms'] = ms
+        stock_bajo[fuente] = sum(fila[3] for fila in filas)
+    
+    if not args.sin_subconsultas:
+        ms, filas = medir(conexion, SUBCONSULTAS_QUERY, (activo,))
+        resultados['subconsultas_ms'] = ms
+        stock_bajo['subconsultas'] = filas[0][1]
+    
+    resultados['productos_stock_bajo'] = stock_bajo
+    resultados['coinciden'] = len(set(stock_bajo.values())) == 1
+    
+    if args.json:
+        print(json.dumps(resultados, indent=2))
+    else:
+        for llave, valor in resultados.items():
+            print(f"{llave:>22}: {valor}")
+    raise SystemExit(0 if resultados['coinciden'] else 1)
+
+if __name__ == '__main__':
+    main()
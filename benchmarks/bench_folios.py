@@ -0,0 +1,112 @@
+"""Rendimiento del generador de folios con muchos hilos de venta concurrentes.
+
+Cada corrida usa una terminal nueva (serie propia en folios_series), reparte
+los folios entre N hilos y verifica que no se repitan ni se salgan del rango
+apartado. Los viajes a la base se cuentan con los préstamos del pool.
+Con --memoria los bloques se apartan con un contador local para medir solo
+el costo en proceso del asignador.
+
+Como referencia se imprime la probabilidad de colisión del folio aleatorio
+anterior (VTA-XXX-NNNN, 26^3 * 10^4 combinaciones) para la misma cantidad.
+
+Uso:
+    python -m benchmarks.bench_folios --hilos 1 8 32 --folios 2000 --bloques 1 50 200
+"""
+import argparse
+import itertools
+import json
+import math
+import threading
+import time
+import uuid
+
+from app.database.db_connection import DatabaseManager
+from app.services.folio_service import FolioAllocator
+
+COMBINACIONES_FOLIO_ALEATORIO = 26 ** 3 * 10 ** 4
+
+def reservar_en_memoria():
+    contadores = {}
+    lock = threading.Lock()
+    
+    def reservar(serie, cantidad):
+        with lock:
+            inicio = contadores.get(serie, 1)
+            contadores[serie] = inicio + cantidad
+            return inicio
+    return reservar
+
+def correr(hilos, total, bloque, memoria):
+    allocator = FolioAllocator('BM', bloque, reservar_en_memoria() if memoria else None)
+    terminal = uuid.uuid4().hex[:10]
+    por_hilo = total // hilos
+    folios = [[] for _ in range(hilos)]
+    barrera = threading.Barrier(hilos + 1)
+    
+    def trabajar(indice):
+        barrera.wait()
+        destino = folios[indice]
+        for _ in range(por_hilo):
+            destino.append(allocator.siguiente(terminal))
+    
+    threads = [threading.Thread(target=trabajar, args=(i,)) for i in range(hilos)]
+    for thread in threads:
+        thread.start()
+    
+    checkouts = None if memoria else DatabaseManager().pool_stats()['checkouts']
+    barrera.wait()
+    inicio = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    segundos = time.perf_counter() - inicio
+    
+    todos = list(itertools.chain.from_iterable(folios))
+    numeros = [int(folio.rsplit('-', 1)[1]) for folio in todos]
+    # Dentro de cada hilo los folios deben ser crecientes
+    monotonos = all(
+        all(a < b for a, b in zip(lista, lista[1:]))
+        for lista in ([int(f.rsplit('-', 1)[1]) for f in hilo] for hilo in folios)
+    )
+    entregados = len(todos)
+    return {
+        'hilos': hilos,
+        'bloque': bloque,
+        'folios': entregados,
+        'folios_por_segundo': entregados / segundos if segundos else None,
+        'us_por_folio': segundos / entregados * 1e6 if entregados else None,
+        'viajes': None if memoria else DatabaseManager().pool_stats()['checkouts'] - checkouts,
+        'duplicados': entregados - len(set(todos)),
+        'monotonos_por_hilo': monotonos,
+        'rango': [min(numeros), max(numeros)] if numeros else None,
+        'colision_folio_aleatorio': 1 - math.exp(-entregados * (entregados - 1) / (2 * COMBINACIONES_FOLIO_ALEATORIO))
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hilos', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--folios', type=int, default=2000, help='Folios por corrida, repartidos entre los hilos')
+    parser.add_argument('--bloques', type=int, nargs='+', default=[1, 50, 200])
+    parser.add_argument('--memoria', action='store_true', help='Apartar bloques sin base de datos')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+    
+    resultados = [
+        correr(hilos, args.folios, bloque, args.memoria)
+        for bloque in args.bloques
+        for hilos in args.hilos
+    ]
+    
+    if args.json:
+        print(json.dumps(resultados, indent=2))
+        return
+    
+    print(f"{'bloque':>7} {'hilos':>6} {'folios/s':>12} {'us/folio':>10} {'viajes':>7} {'duplicados':>11} {'P(colisión) aleatorio':>22}")
+    for r in resultados:
+        viajes = '-' if r['viajes'] is None else r['viajes']
+        print(
+            f"{r['bloque']:>7} {r['hilos']:>6} {r['folios_por_segundo']:>12.0f} {r['us_por_folio']:>10.2f} "
+            f"{viajes:>7} {r['duplicados']:>11} {r['colision_folio_aleatorio']:>22.4%}"
+        )
+
+if __name__ == '__main__':
+    main()
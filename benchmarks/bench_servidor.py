@@ -0,0 +1,375 @@
+"""Terminales concurrentes sostenidas por cada modo de servidor.
+
+A diferencia de bench_endpoints, aquí se levanta el servidor real
+(`python main.py`) con SERVER_MODE=threading, eventlet o gevent sobre una
+base SQLite sintética y se le pega por HTTP con conexiones keep-alive. Cada
+terminal es un hilo que repite el ciclo de caja: buscar un producto por
+código de barras, registrar la venta y esperar --pausa segundos (el cajero
+escaneando). Por nivel de terminales reporta peticiones por segundo,
+p50/p95/p99 y tasa de errores; el nivel sostenido de un modo es el más alto
+con p95 menor a --objetivo-ms y menos de 1% de errores.
+
+Al terminar cada modo se manda SIGTERM con ventas en curso y se reporta
+cuánto tardó en drenar y si alguna venta aceptada se perdió.
+
+Con --instancias N se levantan N procesos en puertos consecutivos que
+comparten eventos por `python manage.py broker`; las terminales se reparten
+entre ellos. Los modos cuya biblioteca no está instalada se reportan como
+no disponibles. El cliente también es Python: con cientos de terminales en
+una sola máquina conviene correrlo en otra para no medir al cliente.
+
+Uso:
+    python -m benchmarks.bench_servidor --modos threading eventlet
+    python -m benchmarks.bench_servidor --terminales 10 50 100 --duracion 20 --salida servidor.json
+    python -m benchmarks.bench_servidor --modos eventlet --instancias 2
+"""
+import argparse
+import http.client
+import importlib.util
+import json
+import os
+import platform
+import random
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from benchmarks.bench_endpoints import TAMANOS, percentil, version_codigo
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODOS = {'threading': None, 'eventlet': 'eventlet', 'gevent': 'gevent'}
+
+PRODUCTOS_VENTA = 200
+
+def disponible(modo):
+    modulo = MODOS[modo]
+    return modulo is None or importlib.util.find_spec(modulo) is not None
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+# ---------------------------------------------------------------------------
+# Datos y procesos
+
+def sembrar(ruta_bd, tamano, semilla):
+    datos = TAMANOS[tamano]
+    comando = [sys.executable, 'manage.py', 'semilla', '--semilla', str(semilla)]
+    for campo, valor in datos.items():
+        comando += [f'--{campo}', str(valor)]
+    subprocess.run(comando, env=entorno_base(ruta_bd), cwd=RAIZ, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+def contexto(ruta_bd):
+    """Productos, códigos de barras y empleado que usan las terminales"""
+    with sqlite3.connect(ruta_bd) as conexion:
+        productos = conexion.execute(
+            "SELECT id_productos, precio_venta, codigo_barras FROM productos "
+            "WHERE fk_estatus_general = 1 ORDER BY id_productos LIMIT ?", (PRODUCTOS_VENTA,)
+        ).fetchall()
+        empleado = conexion.execute(
+            "SELECT id_empleados FROM empleados WHERE fk_estatus_general = 1 ORDER BY id_empleados LIMIT 1"
+        ).fetchone()
+    return {
+        'productos': [(fila[0], float(fila[1]), fila[2]) for fila in productos],
+        'empleado_id': empleado[0]
+    }
+
+def entorno_base(ruta_bd):
+    return dict(os.environ, DB_BACKEND='sqlite', SQLITE_RUTA=ruta_bd, SQLITE_CREAR_ESQUEMA='true',
+                DEBUG='false', PYTHONUNBUFFERED='1')
+
+class Servidor:
+    """Un proceso `python main.py` en el modo y puerto indicados"""
+    
+    def __init__(self, modo, puerto, ruta_bd, bitacora, cola=''):
+        self.modo = modo
+        self.puerto = puerto
+        self.bitacora = open(bitacora, 'w', encoding='utf-8')
+        entorno = dict(entorno_base(ruta_bd), SERVER_MODE=modo, SERVER_HOST='127.0.0.1',
+                       SERVER_PORT=str(puerto), SOCKETIO_MESSAGE_QUEUE=cola)
+        self.proceso = subprocess.Popen(
+            [sys.executable, 'main.py'], env=entorno, cwd=RAIZ,
+            stdout=self.bitacora, stderr=subprocess.STDOUT
+        )
+    
+    def esperar_listo(self, timeout=60):
+        limite = time.monotonic() + timeout
+        while time.monotonic() < limite:
+            if self.proceso.poll() is not None:
+                raise RuntimeError(f"El servidor {self.modo} terminó al arrancar (ver {self.bitacora.name})")
+            try:
+                conexion = http.client.HTTPConnection('127.0.0.1', self.puerto, timeout=2)
+                conexion.request('GET', '/api/health')
+                if conexion.getresponse().status == 200:
+                    return
+            except OSError:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError(f"El servidor {self.modo} no respondió en {timeout}s")
+    
+    def detener(self, timeout=60):
+        """SIGTERM y esperar a que salga; regresa (segundos, código de salida)"""
+        inicio = time.perf_counter()
+        if self.proceso.poll() is None:
+            self.proceso.send_signal(signal.SIGTERM)
+        try:
+            codigo = self.proceso.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self.proceso.kill()
+            codigo = self.proceso.wait()
+        self.bitacora.close()
+        return round(time.perf_counter() - inicio, 3), codigo
+
+# ---------------------------------------------------------------------------
+# Terminales
+
+class Terminal(threading.Thread):
+    """Ciclo de caja sobre una conexión keep-alive"""
+    
+    def __init__(self, numero, puerto, ctx, fin, pausa):
+        super().__init__(daemon=True)
+        self.numero = numero
+        self.puerto = puerto
+        self.ctx = ctx
+        self.fin = fin
+        self.pausa = pausa
+        self.azar = random.Random(numero)
+        self.latencias = []
+        self.errores = 0
+        self.ventas = 0
+        self.conexion = None
+    
+    def peticion(self, metodo, url, cuerpo=None):
+        if self.conexion is None:
+            self.conexion = http.client.HTTPConnection('127.0.0.1', self.puerto, timeout=30)
+        datos = json.dumps(cuerpo).encode('utf-8') if cuerpo is not None else None
+        encabezados = {'Content-Type': 'application/json'} if datos else {}
+        inicio = time.perf_counter()
+        try:
+            self.conexion.request(metodo, url, body=datos, headers=encabezados)
+            respuesta = self.conexion.getresponse()
+            respuesta.read()
+            status = respuesta.status
+        except (OSError, http.client.HTTPException):
+            self.conexion.close()
+            self.conexion = None
+            status = None
+        self.latencias.append(time.perf_counter() - inicio)
+        if status != 200:
+            self.errores += 1
+        return status
+    
+    def run(self):
+        productos = self.ctx['productos']
+        while time.monotonic() < self.fin:
+            renglones = self.azar.sample(productos, self.azar.randint(1, 3))
+            for _, _, codigo in renglones:
+                self.peticion('GET', f'/api/productos/codigo/{codigo}')
+            status = self.peticion('POST', '/api/ventas', {
+                'fk_empleados': self.ctx['empleado_id'],
+                'fk_metodo_pago': 1,
+                'terminal': f'T{self.numero}',
+                'items': [
+                    {'fk_productos': producto_id, 'cantidad_productos': 1, 'precio_unitario': precio}
+                    for producto_id, precio, _ in renglones
+                ]
+            })
+            if status == 200:
+                self.ventas += 1
+            if self.pausa:
+                time.sleep(self.azar.uniform(0.5, 1.5) * self.pausa)
+        if self.conexion is not None:
+            self.conexion.close()
+
+def surtir(puerto, ctx):
+    """Existencia suficiente para todas las ventas de la corrida"""
+    conexion = http.client.HTTPConnection('127.0.0.1', puerto, timeout=30)
+    for producto_id, _, _ in ctx['productos']:
+        cuerpo = json.dumps({'producto_id': producto_id, 'empleado_id': ctx['empleado_id'],
+                             'nueva_cantidad': 10 ** 7, 'motivo': 'benchmark'})
+        conexion.request('POST', '/api/inventario/ajustar', body=cuerpo,
+                         headers={'Content-Type': 'application/json'})
+        respuesta = conexion.getresponse()
+        respuesta.read()
+        if respuesta.status != 200:
+            raise RuntimeError(f"No se pudo surtir el producto {producto_id}: {respuesta.status}")
+    conexion.close()
+
+def correr_nivel(puertos, ctx, terminales, duracion, pausa):
+    fin = time.monotonic() + duracion
+    hilos = [Terminal(i, puertos[i % len(puertos)], ctx, fin, pausa) for i in range(terminales)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    segundos = time.perf_counter() - inicio
+    
+    latencias = sorted(latencia for hilo in hilos for latencia in hilo.latencias)
+    errores = sum(hilo.errores for hilo in hilos)
+    ms = lambda valor: round(valor * 1000, 3) if valor is not None else None
+    return {
+        'terminales': terminales,
+        'peticiones': len(latencias),
+        'ventas': sum(hilo.ventas for hilo in hilos),
+        'errores': errores,
+        'tasa_errores': round(errores / len(latencias), 4) if latencias else 1.0,
+        'rps': round(len(latencias) / segundos, 1),
+        'p50_ms': ms(percentil(latencias, 50)),
+        'p95_ms': ms(percentil(latencias, 95)),
+        'p99_ms': ms(percentil(latencias, 99)),
+        'max_ms': ms(latencias[-1] if latencias else None)
+    }
+
+def ventas_registradas(ruta_bd):
+    with sqlite3.connect(ruta_bd) as conexion:
+        return conexion.execute("SELECT COUNT(*) FROM ventas").fetchone()[0]
+
+def apagado_con_ventas(servidores, puertos, ctx, ruta_bd, terminales):
+    """SIGTERM a media carga: ninguna venta respondida con 200 debe faltar en la base"""
+    antes = ventas_registradas(ruta_bd)
+    fin = time.monotonic() + 2
+    hilos = [Terminal(10000 + i, puertos[i % len(puertos)], ctx, fin, 0) for i in range(terminales)]
+    for hilo in hilos:
+        hilo.start()
+    time.sleep(1)
+    detenciones = [servidor.detener() for servidor in servidores]
+    for hilo in hilos:
+        hilo.join()
+    aceptadas = sum(hilo.ventas for hilo in hilos)
+    registradas = ventas_registradas(ruta_bd) - antes
+    return {
+        'segundos': max(segundos for segundos, _ in detenciones),
+        'codigos_salida': [codigo for _, codigo in detenciones],
+        'ventas_aceptadas': aceptadas,
+        'ventas_registradas': registradas,
+        'perdidas': max(0, aceptadas - registradas)
+    }
+
+def correr_modo(args, modo, ruta_bd, ctx, directorio):
+    puertos = [puerto_libre() for _ in range(args.instancias)]
+    broker = None
+    cola = ''
+    if args.instancias > 1:
+        puerto_broker = puerto_libre()
+        broker = subprocess.Popen(
+            [sys.executable, 'manage.py', 'broker', '--puerto', str(puerto_broker)],
+            cwd=RAIZ, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        cola = f'pos://127.0.0.1:{puerto_broker}'
+    
+    servidores = [
+        Servidor(modo, puerto, ruta_bd, os.path.join(directorio, f'{modo}_{puerto}.log'), cola)
+        for puerto in puertos
+    ]
+    try:
+        for servidor in servidores:
+            servidor.esperar_listo()
+        surtir(puertos[0], ctx)
+        
+        niveles = []
+        for terminales in args.terminales:
+            nivel = correr_nivel(puertos, ctx, terminales, args.duracion, args.pausa)
+            nivel['sostenido'] = (nivel['p95_ms'] is not None and nivel['p95_ms'] < args.objetivo_ms
+                                  and nivel['tasa_errores'] < 0.01)
+            niveles.append(nivel)
+            if args.verbose:
+                print(f"[{modo}] {terminales} terminales: p95 {nivel['p95_ms']} ms, "
+                      f"errores {nivel['tasa_errores']:.2%}", file=sys.stderr)
+        apagado = apagado_con_ventas(servidores, puertos, ctx, ruta_bd, min(args.terminales))
+    finally:
+        for servidor in servidores:
+            if servidor.proceso.poll() is None:
+                servidor.detener()
+        if broker is not None:
+            broker.terminate()
+            broker.wait()
+    
+    sostenidos = [nivel['terminales'] for nivel in niveles if nivel['sostenido']]
+    return {
+        'disponible': True,
+        'niveles': niveles,
+        'max_terminales': max(sostenidos) if sostenidos else 0,
+        'apagado': apagado
+    }
+
+def imprimir(resultados):
+    print(f"{'modo':<10} {'terminales':>10} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'p99 ms':>9} {'errores':>8}")
+    for modo, resultado in resultados['modos'].items():
+        if not resultado['disponible']:
+            print(f"{modo:<10} no disponible ({resultado['motivo']})")
+            continue
+        for nivel in resultado['niveles']:
+            marca = '' if nivel['sostenido'] else '  *'
+            print(f"{modo:<10} {nivel['terminales']:>10} {nivel['rps']:>8} {nivel['p50_ms']:>9} "
+                  f"{nivel['p95_ms']:>9} {nivel['p99_ms']:>9} {nivel['tasa_errores']:>8.2%}{marca}")
+        apagado = resultado['apagado']
+        print(f"{modo:<10} sostiene {resultado['max_terminales']} terminales; apagado en "
+              f"{apagado['segundos']}s, {apagado['perdidas']} ventas perdidas "
+              f"de {apagado['ventas_aceptadas']}")
+    print(f"\n* p95 >= {resultados['objetivo_ms']} ms o errores >= 1%")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modos', nargs='+', choices=list(MODOS), default=list(MODOS))
+    parser.add_argument('--terminales', nargs='+', type=int, default=[10, 50, 100, 200, 500])
+    parser.add_argument('--duracion', type=float, default=10, help='Segundos por nivel de terminales')
+    parser.add_argument('--pausa', type=float, default=0.5, help='Segundos promedio entre ventas por terminal')
+    parser.add_argument('--objetivo-ms', type=float, default=300, help='p95 máximo para considerar un nivel sostenido')
+    parser.add_argument('--instancias', type=int, default=1, help='Procesos por modo compartiendo el broker local')
+    parser.add_argument('--tamano', choices=list(TAMANOS), default='chico')
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--directorio', help='Dónde dejar la base y las bitácoras; por defecto uno temporal')
+    parser.add_argument('--salida', help='Guardar el resultado en este JSON')
+    parser.add_argument('--json', action='store_true')
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+    
+    directorio = args.directorio or tempfile.mkdtemp(prefix='bench_servidor_')
+    os.makedirs(directorio, exist_ok=True)
+    
+    resultados = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'version': version_codigo(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'tamano': args.tamano,
+        'duracion': args.duracion,
+        'pausa': args.pausa,
+        'objetivo_ms': args.objetivo_ms,
+        'instancias': args.instancias,
+        'modos': {}
+    }
+    for modo in args.modos:
+        if not disponible(modo):
+            resultados['modos'][modo] = {'disponible': False, 'motivo': f'{MODOS[modo]} no está instalado'}
+            continue
+        # Base nueva por modo: las ventas de un modo no inflan las del siguiente
+        ruta_bd = os.path.join(directorio, f'servidor_{modo}.db')
+        for sufijo in ('', '-wal', '-shm'):
+            if os.path.exists(ruta_bd + sufijo):
+                os.remove(ruta_bd + sufijo)
+        sembrar(ruta_bd, args.tamano, args.semilla)
+        resultados['modos'][modo] = correr_modo(args, modo, ruta_bd, contexto(ruta_bd), directorio)
+    
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as archivo:
+            json.dump(resultados, archivo, indent=2)
+    
+    if args.json:
+        print(json.dumps(resultados, indent=2))
+    else:
+        imprimir(resultados)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,344 @@
+"""Costo de difundir eventos de Socket.IO con cientos de terminales conectadas.
+
+Conecta N clientes de prueba de Flask-SocketIO (en el mismo proceso, sin
+red: se mide el trabajo del servidor para repartir un evento) y compara:
+
+- ciclo: un emit por cliente recorriendo NotificationServer.clients con el
+  lock tomado, como se difundía antes de usar salas;
+- sala: un solo emit a la sala de la sucursal con skip_sid del remitente;
+- stock: una actualización de stock cuando la mitad de las terminales sigue
+  solo algunos productos (sala por producto) y la otra mitad sigue todos.
+
+Por escenario reporta p50/p95 del tiempo por evento, el tiempo con el lock
+de clientes tomado y cuántos mensajes se entregaron por evento.
+
+Con --rafaga se simula además un conteo de inventario: --rafaga eventos de
+stock seguidos a la sala de todos los productos, enviados uno por uno o en
+frames del modo lote (JSON y, si está instalado, MessagePack). Se reporta
+eventos por segundo entregados a los clientes, mensajes de Socket.IO y bytes
+por evento del paquete codificado.
+
+Con --reconexion se mide una tormenta de reconexiones: todas las terminales
+se caen, se pierden --reconexion actualizaciones de stock y vuelven. Se
+compara ponerse al día con last_seq (solo los eventos perdidos de sus
+salas), la foto de existencias que reciben cuando el hueco ya no está en el
+registro, y recargar el catálogo completo de GET /api/productos como hacían
+antes. Reporta milisegundos y bytes por terminal.
+
+Uso:
+    python -m benchmarks.bench_sockets
+    python -m benchmarks.bench_sockets --clientes 500 1000 2000 --eventos 500
+    python -m benchmarks.bench_sockets --clientes 500 --rafaga 2000
+    python -m benchmarks.bench_sockets --clientes 200 --reconexion 500 --productos 2000
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import tempfile
+import time
+from datetime import datetime
+
+from socketio import packet
+
+from benchmarks.bench_endpoints import percentil, version_codigo
+
+# Productos que siguen las terminales con lista de interés
+PRODUCTOS_INTERES = 10
+
+def conectar(app, socketio, total):
+    """Clientes de prueba identificados; la mitad sigue solo algunos productos"""
+    clientes = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(total):
+            cliente = socketio.test_client(app)
+            identificacion = {'type': 'caja', 'name': f'Caja {i}', 'branch': '01'}
+            if i % 2:
+                identificacion['products'] = [(i + k) % 100 for k in range(PRODUCTOS_INTERES)]
+            cliente.emit('client_identification', identificacion)
+            cliente.get_received()
+            clientes.append(cliente)
+    return clientes
+
+def desconectar(clientes):
+    with contextlib.redirect_stdout(io.StringIO()):
+        for cliente in clientes:
+            cliente.disconnect()
+
+def entregados(clientes):
+    return sum(len(cliente.get_received()) for cliente in clientes)
+
+def medir(nombre, difundir, clientes, eventos):
+    tiempos = []
+    tiempos_lock = []
+    mensajes = 0
+    for i in range(eventos):
+        inicio = time.perf_counter()
+        tiempo_lock = difundir(i)
+        tiempos.append(time.perf_counter() - inicio)
+        tiempos_lock.append(tiempo_lock)
+        # Vaciar las colas de los clientes fuera de la medición
+        mensajes += entregados(clientes)
+    tiempos.sort()
+    tiempos_lock.sort()
+    ms = lambda valor: round(valor * 1000, 4)
+    return {
+        'escenario': nombre,
+        'clientes': len(clientes),
+        'eventos': eventos,
+        'p50_ms': ms(percentil(tiempos, 50)),
+        'p95_ms': ms(percentil(tiempos, 95)),
+        'lock_p95_ms': ms(percentil(tiempos_lock, 95)),
+        'mensajes_por_evento': round(mensajes / eventos, 1)
+    }
+
+def correr(app, socketio, servidor, total, eventos):
+    from app.sockets.notification_server import ROOM_ALL_PRODUCTS, branch_room, product_room
+    
+    clientes = conectar(app, socketio, total)
+    remitente = next(iter(servidor.clients))
+    venta = {'sale_id': 1, 'total': 100.0, 'client_name': 'N/A', 'message': 'Nueva venta procesada: $100.0'}
+    
+    def ciclo(i):
+        inicio = time.perf_counter()
+        with servidor.lock:
+            for client in servidor.clients:
+                if client != remitente:
+                    socketio.emit('sale_processed', venta, to=client)
+        return time.perf_counter() - inicio
+    
+    def sala(i):
+        socketio.emit('sale_processed', venta, to=branch_room('01'), skip_sid=remitente)
+        return 0.0
+    
+    def stock(i):
+        producto = i % 100
+        socketio.emit('stock_updated', {'product_id': producto, 'new_stock': i, 'reason': 'bench'},
+                      to=[ROOM_ALL_PRODUCTS, product_room(producto)], skip_sid=remitente)
+        return 0.0
+    
+    try:
+        return [
+            medir('ciclo', ciclo, clientes, eventos),
+            medir('sala', sala, clientes, eventos),
+            medir('stock', stock, clientes, eventos)
+        ]
+    finally:
+        desconectar(clientes)
+
+def bytes_paquete(evento, datos):
+    """Tamaño del paquete EVENT de Socket.IO tal como sale por el socket"""
+    codificado = packet.Packet(packet.EVENT, data=[evento, datos]).encode()
+    if isinstance(codificado, list):
+        # Paquete binario: encabezado de texto más los adjuntos
+        return sum(len(parte) for parte in codificado)
+    return len(codificado)
+
+def correr_rafaga(app, socketio, servidor, total, eventos, formato):
+    """Ráfaga de stock_updated a la sala de todos los productos; formato None = un emit por evento"""
+    from app.sockets.lotes import LotesSalas, sala_lote
+    from app.sockets.notification_server import ROOM_ALL_PRODUCTS
+    
+    clientes = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(total):
+            cliente = socketio.test_client(app)
+            cliente.emit('client_identification', {'type': 'caja', 'name': f'Caja {i}', 'batch': formato or False})
+            cliente.get_received()
+            clientes.append(cliente)
+    
+    ahora = datetime.now().isoformat()
+    datos = [
+        {'product_id': i % 500, 'new_stock': i, 'reason': 'conteo', 'timestamp': ahora, 'coalesced': 1}
+        for i in range(eventos)
+    ]
+    lotes = LotesSalas(servidor.lotes.max_eventos, servidor.lotes.intervalo, servidor.lotes.historial)
+    bytes_totales = 0
+    inicio = time.perf_counter()
+    if formato is None:
+        for evento in datos:
+            socketio.emit('stock_updated', evento, to=ROOM_ALL_PRODUCTS)
+            bytes_totales += bytes_paquete('stock_updated', evento)
+    else:
+        def enviar(frame):
+            carga = LotesSalas.codificar(frame, formato)
+            socketio.emit('events_batch', carga, to=sala_lote(ROOM_ALL_PRODUCTS, formato))
+            return bytes_paquete('events_batch', carga)
+        for evento in datos:
+            if lotes.agregar('stock_updated', evento, [ROOM_ALL_PRODUCTS]):
+                bytes_totales += enviar(lotes.cerrar(ROOM_ALL_PRODUCTS))
+        frame = lotes.cerrar(ROOM_ALL_PRODUCTS)
+        if frame is not None:
+            bytes_totales += enviar(frame)
+    segundos = time.perf_counter() - inicio
+    
+    recibidos = [cliente.get_received() for cliente in clientes]
+    mensajes = sum(len(paquetes) for paquetes in recibidos)
+    # Cada frame lleva todos los eventos en orden: quien recibió algo recibió la ráfaga completa
+    entregados = eventos * sum(1 for paquetes in recibidos if paquetes)
+    desconectar(clientes)
+    return {
+        'escenario': f"rafaga.{formato or 'individual'}",
+        'clientes': total,
+        'eventos': eventos,
+        'segundos': round(segundos, 4),
+        'eventos_por_segundo': round(entregados / segundos),
+        'mensajes_por_cliente': round(mensajes / total, 1),
+        'bytes_por_evento': round(bytes_totales / eventos, 1)
+    }
+
+def correr_reconexion(app, socketio, servidor, total, perdidos):
+    """Terminales que se reconectan después de perder `perdidos` eventos de stock"""
+    from app.sockets.notification_server import ROOM_ALL_PRODUCTS, product_room
+    from config import Config
+    
+    clientes = conectar(app, socketio, total)
+    # La identificación de cada terminal y el último seq que alcanzó a ver
+    identificaciones = []
+    for i in range(total):
+        identificacion = {'type': 'caja', 'name': f'Caja {i}', 'branch': '01'}
+        if i % 2:
+            identificacion['products'] = [(i + k) % 100 for k in range(PRODUCTOS_INTERES)]
+        identificaciones.append(identificacion)
+    ultimo = servidor.registro.seq
+    desconectar(clientes)
+    
+    ahora = datetime.now().isoformat()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(perdidos):
+            producto = i % 100
+            servidor._send('stock_updated', {'product_id': producto, 'new_stock': i, 'reason': 'conteo', 'timestamp': ahora},
+                           [ROOM_ALL_PRODUCTS, product_room(producto)])
+    
+    def reconectar(nombre, extra):
+        tiempos = []
+        bytes_totales = 0
+        recibidos = 0
+        reconectados = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for identificacion in identificaciones:
+                cliente = socketio.test_client(app)
+                cliente.get_received()
+                inicio = time.perf_counter()
+                cliente.emit('client_identification', dict(identificacion, **extra))
+                paquetes = cliente.get_received()
+                tiempos.append(time.perf_counter() - inicio)
+                bytes_totales += sum(bytes_paquete(paquete['name'], paquete['args'][0]) for paquete in paquetes)
+                recibidos += len(paquetes)
+                reconectados.append(cliente)
+        desconectar(reconectados)
+        return _fila_reconexion(nombre, tiempos, bytes_totales, recibidos)
+    
+    def recargar():
+        # Lo que hacía una terminal al reconectarse: todas las páginas de productos
+        tiempos = []
+        bytes_totales = 0
+        recibidos = 0
+        http = app.test_client()
+        for _ in identificaciones:
+            inicio = time.perf_counter()
+            cursor = None
+            while True:
+                url = f'/api/productos?limit={Config.PAGINACION_LIMITE_MAX}'
+                respuesta = http.get(url + (f'&cursor={cursor}' if cursor else ''))
+                bytes_totales += len(respuesta.data)
+                recibidos += 1
+                cursor = respuesta.get_json()['pagination']['next_cursor']
+                if not cursor:
+                    break
+            tiempos.append(time.perf_counter() - inicio)
+        return _fila_reconexion('recarga_rest', tiempos, bytes_totales, recibidos)
+    
+    src = servidor.registro.origen
+    return [
+        reconectar('last_seq', {'last_seq': ultimo, 'src': src}),
+        reconectar('foto', {'last_seq': ultimo, 'src': 'otro:0'}),
+        recargar()
+    ]
+
+def _fila_reconexion(nombre, tiempos, bytes_totales, mensajes):
+    total = len(tiempos)
+    tiempos.sort()
+    return {
+        'escenario': f'reconexion.{nombre}',
+        'clientes': total,
+        'p50_ms': round(percentil(tiempos, 50) * 1000, 4),
+        'p95_ms': round(percentil(tiempos, 95) * 1000, 4),
+        'total_ms': round(sum(tiempos) * 1000, 1),
+        'mensajes_por_cliente': round(mensajes / total, 1),
+        'kb_por_cliente': round(bytes_totales / total / 1024, 2)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clientes', nargs='+', type=int, default=[100, 500, 1000])
+    parser.add_argument('--eventos', type=int, default=200)
+    parser.add_argument('--rafaga', type=int, default=0, help='Eventos de stock de la ráfaga; 0 la omite')
+    parser.add_argument('--reconexion', type=int, default=0, help='Eventos perdidos por terminal; 0 omite la prueba')
+    parser.add_argument('--productos', type=int, default=500, help='Productos sembrados para la prueba de reconexión')
+    parser.add_argument('--salida', help='Guardar el resultado en este JSON')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+    
+    # La aplicación necesita una base aunque aquí no se consulte
+    os.environ.setdefault('DB_BACKEND', 'sqlite')
+    os.environ.setdefault('SQLITE_RUTA', os.path.join(tempfile.mkdtemp(prefix='bench_sockets_'), 'pos.db'))
+    with contextlib.redirect_stdout(io.StringIO()):
+        from main import create_app
+        from app.sockets.notification_server import get_notification_server
+        app, socketio = create_app()
+    servidor = get_notification_server()
+    if args.reconexion:
+        from app.database.semilla import sembrar
+        from app.services.stock_bajo import stock_bajo
+        with contextlib.redirect_stdout(io.StringIO()):
+            sembrar(productos=args.productos, clientes=10, empleados=2, ventas=0, semilla=1)
+            stock_bajo.cargar()
+    from app.sockets.lotes import msgpack_disponible
+    formatos = [None, 'json'] + (['msgpack'] if msgpack_disponible() else [])
+    
+    resultados = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'version': version_codigo(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'escenarios': [],
+        'rafaga': [],
+        'reconexion': []
+    }
+    for total in args.clientes:
+        resultados['escenarios'] += correr(app, socketio, servidor, total, args.eventos)
+        if args.rafaga:
+            resultados['rafaga'] += [
+                correr_rafaga(app, socketio, servidor, total, args.rafaga, formato) for formato in formatos
+            ]
+        if args.reconexion:
+            resultados['reconexion'] += correr_reconexion(app, socketio, servidor, total, args.reconexion)
+    
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as archivo:
+            json.dump(resultados, archivo, indent=2)
+    
+    if args.json:
+        print(json.dumps(resultados, indent=2))
+        return
+    print(f"{'escenario':<10} {'clientes':>8} {'p50 ms':>9} {'p95 ms':>9} {'lock p95':>9} {'msgs/evento':>12}")
+    for fila in resultados['escenarios']:
+        print(f"{fila['escenario']:<10} {fila['clientes']:>8} {fila['p50_ms']:>9} {fila['p95_ms']:>9} "
+              f"{fila['lock_p95_ms']:>9} {fila['mensajes_por_evento']:>12}")
+    if resultados['rafaga']:
+        print(f"\n{'ráfaga':<20} {'clientes':>8} {'eventos/s':>10} {'msgs/cliente':>13} {'bytes/evento':>13}")
+        for fila in resultados['rafaga']:
+            print(f"{fila['escenario']:<20} {fila['clientes']:>8} {fila['eventos_por_segundo']:>10} "
+                  f"{fila['mensajes_por_cliente']:>13} {fila['bytes_por_evento']:>13}")
+    if resultados['reconexion']:
+        print(f"\n{'reconexión':<24} {'clientes':>8} {'p50 ms':>9} {'p95 ms':>9} {'total ms':>10} "
+              f"{'msgs/cliente':>13} {'KB/cliente':>11}")
+        for fila in resultados['reconexion']:
+            print(f"{fila['escenario']:<24} {fila['clientes']:>8} {fila['p50_ms']:>9} {fila['p95_ms']:>9} "
+                  f"{fila['total_ms']:>10} {fila['mensajes_por_cliente']:>13} {fila['kb_por_cliente']:>11}")
+
+if __name__ == '__main__':
+    main()
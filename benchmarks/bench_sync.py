@@ -0,0 +1,127 @@
+"""Tamaño y tiempo de sincronizar una terminal: recarga completa contra /api/sync/changes.
+
+La recarga completa es lo que hace hoy una terminal al arrancar: recorrer
+todas las páginas de GET /api/productos y GET /api/clientes. La
+sincronización completa es GET /api/sync/changes sin token y la
+incremental pide con el token de la anterior después de --cambios
+ediciones de precio (y una edición de cliente por cada cinco).
+
+Corre contra la base configurada con el test client de Flask y modifica
+precios y clientes: usar una base de pruebas (DB_BACKEND=sqlite y
+`python manage.py semilla`). Reporta KB sin comprimir y con gzip, y
+milisegundos por sincronización.
+
+Uso:
+    DB_BACKEND=sqlite SQLITE_RUTA=/tmp/pos.db python -m benchmarks.bench_sync --cambios 0 10 100 1000
+"""
+import argparse
+import contextlib
+import gzip
+import io
+import json
+import statistics
+import time
+
+from app.database.db_connection import execute_query
+from config import Config
+
+def descargar(cliente, url):
+    """Bytes de la respuesta; falla si no es 200"""
+    respuesta = cliente.get(url)
+    if respuesta.status_code != 200:
+        raise SystemExit(f"{url}: {respuesta.status_code} {respuesta.get_data(as_text=True)[:200]}")
+    return respuesta.data
+
+def recarga_completa(cliente):
+    cuerpos = []
+    for ruta in ('/api/productos', '/api/clientes'):
+        cursor = None
+        while True:
+            url = f'{ruta}?limit={Config.PAGINACION_LIMITE_MAX}' + (f'&cursor={cursor}' if cursor else '')
+            cuerpo = descargar(cliente, url)
+            cuerpos.append(cuerpo)
+            cursor = json.loads(cuerpo)['pagination']['next_cursor']
+            if not cursor:
+                break
+    return cuerpos
+
+def sincronizar(cliente, token=None):
+    cuerpos = []
+    while True:
+        cuerpo = descargar(cliente, '/api/sync/changes' + (f'?since={token}' if token else ''))
+        cuerpos.append(cuerpo)
+        datos = json.loads(cuerpo)['data']
+        token = datos['token']
+        if not datos['has_more']:
+            return cuerpos, token
+
+def medir(nombre, funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        cuerpos = funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    crudo = sum(len(cuerpo) for cuerpo in cuerpos)
+    comprimido = sum(len(gzip.compress(cuerpo)) for cuerpo in cuerpos)
+    return {
+        'escenario': nombre,
+        'peticiones': len(cuerpos),
+        'kb': round(crudo / 1024, 1),
+        'kb_gzip': round(comprimido / 1024, 1),
+        'p50_ms': round(statistics.median(tiempos), 2)
+    }
+
+def editar(cliente, productos, clientes, cambios, ronda):
+    """Ediciones por la API para que queden en la bitácora de cambios"""
+    for i in range(cambios):
+        producto_id = productos[i % len(productos)]
+        cliente.put(f'/api/productos/{producto_id}', json={'precio_venta': 100 + ronda + i % 7})
+    for i in range(cambios // 5):
+        cliente_id = clientes[i % len(clientes)]
+        cliente.put(f'/api/clientes/{cliente_id}', json={
+            'nombre': f'Cliente {cliente_id}', 'rfc': 'SYN0000000000', 'limite_credito': 1000 + ronda
+        })
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cambios', type=int, nargs='+', default=[0, 10, 100, 1000])
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        from main import create_app
+        app, _ = create_app()
+    cliente = app.test_client()
+    
+    activo = (Config.ESTATUS_ACTIVO,)
+    productos = [row['id_productos'] for row in execute_query(
+        "SELECT id_productos FROM productos WHERE fk_estatus_general = ? ORDER BY id_productos", activo, fetch_all=True
+    ) or []]
+    clientes = [row['id_clientes'] for row in execute_query(
+        "SELECT id_clientes FROM clientes WHERE fk_estatus_general = ? ORDER BY id_clientes", activo, fetch_all=True
+    ) or []]
+    if not productos or not clientes:
+        raise SystemExit("No hay productos o clientes activos: generar datos con `python manage.py semilla`")
+    
+    resultados = [
+        medir('recarga_completa', lambda: recarga_completa(cliente), args.repeticiones),
+        medir('sync.completa', lambda: sincronizar(cliente)[0], args.repeticiones)
+    ]
+    for ronda, cambios in enumerate(args.cambios):
+        _, token = sincronizar(cliente)
+        with contextlib.redirect_stdout(io.StringIO()):
+            editar(cliente, productos, clientes, cambios, ronda)
+        # Cada repetición parte del mismo token: mide el mismo delta
+        resultados.append(medir(f'sync.{cambios}_cambios', lambda: sincronizar(cliente, token)[0], args.repeticiones))
+    
+    if args.json:
+        print(json.dumps(resultados, indent=2))
+        return
+    print(f"productos: {len(productos)}  clientes: {len(clientes)}")
+    print(f"{'escenario':<22} {'peticiones':>10} {'KB':>10} {'KB gzip':>10} {'p50 ms':>10}")
+    for fila in resultados:
+        print(f"{fila['escenario']:<22} {fila['peticiones']:>10} {fila['kb']:>10} {fila['kb_gzip']:>10} {fila['p50_ms']:>10}")
+
+if __name__ == '__main__':
+    main()
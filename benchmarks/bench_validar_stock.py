@@ -0,0 +1,88 @@
+"""Viajes a la base de datos y latencia de la validación de stock por tamaño de ticket.
+
+Compara la validación renglón por renglón (check_stock_sufficient +
+get_product_by_id por producto) contra la validación en lote de
+VentaService.verificar_stock_items. Los viajes se cuentan con los préstamos
+del pool de conexiones, cada execute_query toma exactamente una conexión.
+
+Uso:
+    python -m benchmarks.bench_validar_stock --tamanos 1 10 40 --repeticiones 20
+"""
+import argparse
+import json
+import statistics
+import time
+
+from app.database.db_connection import DatabaseManager, execute_query
+from app.services.product_service import ProductService
+from app.services.venta_service import VentaService
+from config import Config
+
+def validar_por_renglon(items):
+    """Ruta anterior: dos o tres consultas por renglón"""
+    errores = []
+    for item in items:
+        if not ProductService.check_stock_sufficient(item['fk_productos'], item['cantidad_productos']):
+            producto = ProductService.get_product_by_id(item['fk_productos'])
+            nombre_producto = producto['nombre'] if producto else f"ID {item['fk_productos']}"
+            errores.append(f"Stock insuficiente para {nombre_producto}")
+    return len(errores) == 0, errores
+
+def medir(funcion, items, repeticiones):
+    db = DatabaseManager()
+    latencias = []
+    viajes = []
+    for _ in range(repeticiones):
+        checkouts = db.pool_stats()['checkouts']
+        inicio = time.perf_counter()
+        funcion(items)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        viajes.append(db.pool_stats()['checkouts'] - checkouts)
+    return {
+        'viajes': statistics.median(viajes),
+        'p50_ms': statistics.median(latencias),
+        'max_ms': max(latencias)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tamanos', type=int, nargs='+', default=[1, 5, 10, 20, 40])
+    parser.add_argument('--repeticiones', type=int, default=10)
+    parser.add_argument('--cantidad', type=int, default=1,
+                        help='Cantidad por renglón; usa un valor alto para forzar faltantes')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+    
+    productos = execute_query(
+        "SELECT TOP (?) id_productos FROM productos WHERE fk_estatus_general = ? ORDER BY id_productos",
+        (max(args.tamanos), Config.ESTATUS_ACTIVO), fetch_all=True
+    )
+    ids = [row['id_productos'] for row in productos]
+    if not ids:
+        raise SystemExit("No hay productos activos para el benchmark")
+    
+    resultados = []
+    for tamano in args.tamanos:
+        items = [
+            {'fk_productos': ids[i % len(ids)], 'cantidad_productos': args.cantidad}
+            for i in range(tamano)
+        ]
+        resultados.append({
+            'renglones': tamano,
+            'por_renglon': medir(validar_por_renglon, items, args.repeticiones),
+            'lote': medir(VentaService.validar_stock_venta, items, args.repeticiones)
+        })
+    
+    if args.json:
+        print(json.dumps(resultados, indent=2))
+        return
+    
+    print(f"{'renglones':>10} {'viajes/renglon':>15} {'viajes/lote':>12} {'p50 renglon ms':>15} {'p50 lote ms':>12}")
+    for r in resultados:
+        print(
+            f"{r['renglones']:>10} {r['por_renglon']['viajes']:>15} {r['lote']['viajes']:>12} "
+            f"{r['por_renglon']['p50_ms']:>15.2f} {r['lote']['p50_ms']:>12.2f}"
+        )
+
+if __name__ == '__main__':
+    main()
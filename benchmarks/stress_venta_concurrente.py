@@ -0,0 +1,108 @@
+"""Prueba de estrés: cientos de ventas concurrentes contra un solo producto.
+
+Ajusta la existencia del producto a --stock unidades, dispara --ventas ventas
+de --cantidad unidades desde --hilos hilos a la vez y verifica al final que
+    ventas aceptadas * cantidad <= stock inicial
+    existencia final == stock inicial - unidades vendidas >= 0
+Imprime las ventas por segundo y cualquier violación encontrada. Registra
+ventas reales: úsese contra una base de pruebas.
+
+Uso:
+    python -m benchmarks.stress_venta_concurrente --producto 1 --empleado 1 --metodo-pago 1 \\
+        --stock 50 --ventas 300 --hilos 32
+"""
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.bloqueos import bloqueos_stock
+from app.services.existencias_service import ExistenciasService
+from app.services.inventario_service import InventarioService
+from app.services.venta_service import VentaService
+
+def vender(args):
+    inicio = time.perf_counter()
+    resultado = VentaService.procesar_venta({
+        'fk_empleados': args.empleado,
+        'fk_metodo_pago': args.metodo_pago,
+        'terminal': 'STRESS',
+        'items': [{
+            'fk_productos': args.producto,
+            'cantidad_productos': args.cantidad,
+            'precio_unitario': 1
+        }]
+    })
+    return resultado, (time.perf_counter() - inicio) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--producto', type=int, required=True)
+    parser.add_argument('--empleado', type=int, required=True)
+    parser.add_argument('--metodo-pago', type=int, required=True)
+    parser.add_argument('--stock', type=int, default=50)
+    parser.add_argument('--ventas', type=int, default=300)
+    parser.add_argument('--cantidad', type=int, default=1)
+    parser.add_argument('--hilos', type=int, default=32)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+    
+    ok, mensaje = InventarioService.ajustar_inventario(args.producto, args.empleado, args.stock, 'stress test')
+    if not ok:
+        raise SystemExit(mensaje)
+    stock_inicial = ExistenciasService.obtener_existencia(args.producto)
+    
+    barrera = threading.Barrier(min(args.hilos, args.ventas))
+    
+    def tarea(indice):
+        # Arrancar los primeros hilos a la vez para forzar la contención
+        if indice < min(args.hilos, args.ventas):
+            barrera.wait()
+        return vender(args)
+    
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.hilos) as executor:
+        resultados = list(executor.map(tarea, range(args.ventas)))
+    segundos = time.perf_counter() - inicio
+    
+    aceptadas = sum(1 for resultado, _ in resultados if resultado['success'])
+    por_stock = sum(1 for resultado, _ in resultados if resultado.get('faltantes'))
+    errores = [resultado['error'] for resultado, _ in resultados
+               if not resultado['success'] and not resultado.get('faltantes')]
+    existencia_final = ExistenciasService.obtener_existencia(args.producto)
+    vendidas = aceptadas * args.cantidad
+    latencias = sorted(ms for _, ms in resultados)
+    
+    violaciones = []
+    if vendidas > stock_inicial:
+        violaciones.append(f'sobreventa: {vendidas} vendidas con {stock_inicial} en existencia')
+    if existencia_final != stock_inicial - vendidas:
+        violaciones.append(f'existencia final {existencia_final} != {stock_inicial} - {vendidas}')
+    if existencia_final < 0:
+        violaciones.append(f'existencia negativa: {existencia_final}')
+    
+    reporte = {
+        'stock_inicial': stock_inicial,
+        'ventas_intentadas': args.ventas,
+        'aceptadas': aceptadas,
+        'rechazadas_por_stock': por_stock,
+        'errores': len(errores),
+        'primer_error': errores[0] if errores else None,
+        'existencia_final': existencia_final,
+        'ventas_por_segundo': args.ventas / segundos,
+        'p50_ms': latencias[len(latencias) // 2],
+        'p99_ms': latencias[min(len(latencias) - 1, int(len(latencias) * 0.99))],
+        'bloqueos': bloqueos_stock.stats(),
+        'violaciones': violaciones
+    }
+    
+    if args.json:
+        print(json.dumps(reporte, indent=2))
+    else:
+        for llave, valor in reporte.items():
+            print(f"{llave:>22}: {valor}")
+    raise SystemExit(1 if violaciones else 0)
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,12 @@ from dotenv import load_dotenv
 load_dotenv()
 
 class Config:
+    # Backend de base de datos: 'mssql' (producción) o 'sqlite' (pruebas locales y de carga)
+    DB_BACKEND = os.getenv('DB_BACKEND', 'mssql')
+    SQLITE_RUTA = os.getenv('SQLITE_RUTA', 'pos_local.db')  # ':memory:' para una base en memoria
+    SQLITE_BUSY_TIMEOUT = float(os.getenv('SQLITE_BUSY_TIMEOUT', '30'))  # segundos esperando el lock de escritura
+    SQLITE_CREAR_ESQUEMA = os.getenv('SQLITE_CREAR_ESQUEMA', 'true').lower() == 'true'
+    
     # Configuración de SQL Server
     DB_HOST = os.getenv('DB_HOST', 'localhost')
     DB_USER = os.getenv('DB_USER', 'sa')
@@ -11,6 +17,94 @@ class Config:
     DB_NAME = os.getenv('DB_NAME', 'POS_Refaccionaria')
     DB_PORT = os.getenv('DB_PORT', '1433')
     
+    # Pool de conexiones
+    DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', '2'))
+    DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', '20'))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))  # segundos esperando una conexión libre
+    DB_POOL_MAX_LIFETIME = float(os.getenv('DB_POOL_MAX_LIFETIME', '1800'))  # segundos antes de reciclar
+    DB_POOL_MAX_IDLE = float(os.getenv('DB_POOL_MAX_IDLE', '300'))  # segundos inactiva antes de cerrar
+    DB_POOL_PING_IDLE = float(os.getenv('DB_POOL_PING_IDLE', '10'))  # verificar con SELECT 1 si estuvo inactiva más de esto
+    
+    # Paginación de listados
+    PAGINACION_LIMITE_DEFAULT = int(os.getenv('PAGINACION_LIMITE_DEFAULT', '100'))
+    PAGINACION_LIMITE_MAX = int(os.getenv('PAGINACION_LIMITE_MAX', '1000'))
+    
+    # Búsqueda de productos
+    BUSQUEDA_LIMITE_DEFAULT = int(os.getenv('BUSQUEDA_LIMITE_DEFAULT', '20'))
+    BUSQUEDA_LIMITE_MAX = int(os.getenv('BUSQUEDA_LIMITE_MAX', '100'))
+    
+    # Exportaciones en streaming
+    STREAMING_BATCH_SIZE = int(os.getenv('STREAMING_BATCH_SIZE', '500'))  # renglones por fetchmany
+    
+    # Caché de catálogos (metodo_pago, ventas_tipo, estatus, marcas, ...)
+    CATALOGO_CACHE_TTL = int(os.getenv('CATALOGO_CACHE_TTL', '300'))  # segundos
+    # Catálogo de productos en memoria: recarga completa para ver los cambios de
+    # otros procesos o hechos directo en la base; 0 la desactiva
+    PRODUCTOS_RECARGA = float(os.getenv('PRODUCTOS_RECARGA', '300'))  # segundos
+    
+    # Caché de resultados de reportes
+    REPORTES_CACHE_TTL = int(os.getenv('REPORTES_CACHE_TTL', '60'))  # segundos, solo rangos que incluyen hoy
+    REPORTES_CACHE_MAX = int(os.getenv('REPORTES_CACHE_MAX', '256'))
+    # Segundos después de medianoche en que un día sigue abierto para los resúmenes
+    # (ventas fechadas antes de las 00:00 que confirman después)
+    RESUMENES_VENTANA_SEGUNDOS = int(os.getenv('RESUMENES_VENTANA_SEGUNDOS', '900'))
+    
+    # Procesamiento de ventas
+    IDEMPOTENCIA_TTL = int(os.getenv('IDEMPOTENCIA_TTL', '86400'))  # segundos que se recuerda una Idempotency-Key
+    VENTAS_ASYNC_WORKERS = int(os.getenv('VENTAS_ASYNC_WORKERS', '4'))
+    VENTAS_ASYNC_MAX_PENDIENTES = int(os.getenv('VENTAS_ASYNC_MAX_PENDIENTES', '200'))
+    VENTAS_TICKET_TTL = int(os.getenv('VENTAS_TICKET_TTL', '3600'))  # segundos que se conserva un ticket terminado
+    
+    # Locks en proceso por producto al descontar stock
+    STOCK_LOCK_FRANJAS = int(os.getenv('STOCK_LOCK_FRANJAS', '64'))
+    
+    # Folios de venta: VTA-<sucursal>-<terminal>-<consecutivo>
+    FOLIO_SUCURSAL = os.getenv('FOLIO_SUCURSAL', '01')
+    FOLIO_TERMINAL = os.getenv('FOLIO_TERMINAL', '01')  # cuando la venta no indica terminal
+    FOLIO_BLOQUE = int(os.getenv('FOLIO_BLOQUE', '50'))  # folios apartados por viaje a la base
+    
+    # Métricas de peticiones y consultas (GET /api/system/metrics)
+    SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '500'))  # 0 desactiva el log de consultas lentas
+    SLOW_REQUEST_MS = float(os.getenv('SLOW_REQUEST_MS', '2000'))  # 0 desactiva el log de peticiones lentas
+    METRICAS_MAX_CONSULTAS = int(os.getenv('METRICAS_MAX_CONSULTAS', '500'))  # huellas de consulta distintas
+    CONSULTAS_LENTAS_HISTORIAL = int(os.getenv('CONSULTAS_LENTAS_HISTORIAL', '100'))
+    
+    # Servidor: 'threading' es el servidor de desarrollo de Werkzeug; en producción
+    # eventlet o gevent (miles de conexiones por proceso) o gunicorn con wsgi.py
+    SERVER_MODE = os.getenv('SERVER_MODE', 'threading')
+    SERVER_HOST = os.getenv('SERVER_HOST', '0.0.0.0')
+    SERVER_PORT = int(os.getenv('SERVER_PORT', '5000'))
+    SERVER_KEEPALIVE = float(os.getenv('SERVER_KEEPALIVE', '75'))  # segundos, mayor que el del balanceador
+    SERVER_MAX_CONEXIONES = int(os.getenv('SERVER_MAX_CONEXIONES', '1000'))  # greenlets por proceso
+    APAGADO_TIMEOUT = float(os.getenv('APAGADO_TIMEOUT', '30'))  # segundos para drenar ventas al detenerse
+    
+    # Socket.IO entre varios procesos: redis://host:6379/0, o pos://127.0.0.1:5555 con
+    # el broker local (`python manage.py broker`); vacío con un solo proceso
+    SOCKETIO_MESSAGE_QUEUE = os.getenv('SOCKETIO_MESSAGE_QUEUE', '')
+    SOCKETIO_PING_INTERVAL = int(os.getenv('SOCKETIO_PING_INTERVAL', '25'))
+    SOCKETIO_PING_TIMEOUT = int(os.getenv('SOCKETIO_PING_TIMEOUT', '20'))
+    
+    # Eventos de stock/ventas/productos que se empujan a las terminales
+    EVENTOS_VENTANA_MS = float(os.getenv('EVENTOS_VENTANA_MS', '100'))  # cambios del mismo producto se combinan
+    EVENTOS_MAX_PENDIENTES = int(os.getenv('EVENTOS_MAX_PENDIENTES', '10000'))
+    # Modo lote de Socket.IO (clientes con batch en client_identification): un frame
+    # por sala cada SOCKET_LOTE_MS o SOCKET_LOTE_MAX eventos; 0 lo desactiva
+    SOCKET_LOTE_MS = float(os.getenv('SOCKET_LOTE_MS', '250'))
+    SOCKET_LOTE_MAX = int(os.getenv('SOCKET_LOTE_MAX', '200'))
+    SOCKET_LOTE_HISTORIAL = int(os.getenv('SOCKET_LOTE_HISTORIAL', '50'))  # frames por sala para repetir
+    # Eventos recientes que se repiten a un cliente que se reconecta con last_seq;
+    # con un hueco mayor recibe una foto de existencias. 0 lo desactiva
+    SOCKET_REGISTRO_EVENTOS = int(os.getenv('SOCKET_REGISTRO_EVENTOS', '5000'))
+    
+    # Productos con stock bajo: salen del conjunto al superar stock_minimo por esta fracción
+    STOCK_BAJO_HISTERESIS = float(os.getenv('STOCK_BAJO_HISTERESIS', '0.1'))
+    STOCK_BAJO_RECARGA = float(os.getenv('STOCK_BAJO_RECARGA', '300'))  # segundos; cubre otros procesos
+    
+    # Sincronización de terminales (GET /api/sync/changes): renglones de la bitácora por respuesta
+    SYNC_LIMITE_CAMBIOS = int(os.getenv('SYNC_LIMITE_CAMBIOS', '5000'))
+    # Segundos de bitácora que cada delta vuelve a leer (cambios que confirmaron tarde); 0 lo desactiva
+    SYNC_VENTANA_SEGUNDOS = int(os.getenv('SYNC_VENTANA_SEGUNDOS', '120'))
+    
     # Configuración Flask
     SECRET_KEY = os.getenv('SECRET_KEY', 'clave_por_defecto_no_segura')
     DEBUG = os.getenv('DEBUG', 'True').lower() == 'true'
@@ -20,4 +114,45 @@ class Config:
     
     # Estatus general (según tu BD)
     ESTATUS_ACTIVO = 1
-    ESTATUS_INACTIVO = 2
\ No newline at end of file
+    ESTATUS_INACTIVO = 2
+    
+    @classmethod
+    def validate_config(cls):
+        """Validar que la configuración de base de datos sea utilizable"""
+        if cls.DB_BACKEND not in ('mssql', 'sqlite'):
+            raise ValueError(f"DB_BACKEND debe ser 'mssql' o 'sqlite', no '{cls.DB_BACKEND}'")
+        
+        requeridas = ('DB_HOST', 'DB_NAME', 'DB_USER') if cls.DB_BACKEND == 'mssql' else ('SQLITE_RUTA',)
+        faltantes = [
+            nombre for nombre in requeridas
+            if not getattr(cls, nombre)
+        ]
+        if faltantes:
+            raise ValueError(f"Faltan variables de configuración: {', '.join(faltantes)}")
+        
+        if cls.DB_POOL_MIN_SIZE < 0 or cls.DB_POOL_MAX_SIZE < 1:
+            raise ValueError("DB_POOL_MIN_SIZE debe ser >= 0 y DB_POOL_MAX_SIZE >= 1")
+        if cls.DB_POOL_MIN_SIZE > cls.DB_POOL_MAX_SIZE:
+            raise ValueError("DB_POOL_MIN_SIZE no puede ser mayor que DB_POOL_MAX_SIZE")
+        if cls.SERVER_MODE not in ('threading', 'eventlet', 'gevent'):
+            raise ValueError(f"SERVER_MODE debe ser 'threading', 'eventlet' o 'gevent', no '{cls.SERVER_MODE}'")
+        if cls.STOCK_LOCK_FRANJAS < 1:
+            raise ValueError("STOCK_LOCK_FRANJAS debe ser >= 1")
+        if cls.FOLIO_BLOQUE < 1:
+            raise ValueError("FOLIO_BLOQUE debe ser >= 1")
+        if cls.EVENTOS_MAX_PENDIENTES < 1:
+            raise ValueError("EVENTOS_MAX_PENDIENTES debe ser >= 1")
+        if cls.SOCKET_LOTE_MAX < 1 or cls.SOCKET_LOTE_HISTORIAL < 1:
+            raise ValueError("SOCKET_LOTE_MAX y SOCKET_LOTE_HISTORIAL deben ser >= 1")
+        if cls.SOCKET_REGISTRO_EVENTOS < 0:
+            raise ValueError("SOCKET_REGISTRO_EVENTOS debe ser >= 0")
+        if cls.RESUMENES_VENTANA_SEGUNDOS < 0:
+            raise ValueError("RESUMENES_VENTANA_SEGUNDOS debe ser >= 0")
+        if cls.PRODUCTOS_RECARGA < 0:
+            raise ValueError("PRODUCTOS_RECARGA debe ser >= 0")
+        if cls.STOCK_BAJO_HISTERESIS < 0:
+            raise ValueError("STOCK_BAJO_HISTERESIS debe ser >= 0")
+        if cls.SYNC_LIMITE_CAMBIOS < 1:
+            raise ValueError("SYNC_LIMITE_CAMBIOS debe ser >= 1")
+        if cls.SYNC_VENTANA_SEGUNDOS < 0:
+            raise ValueError("SYNC_VENTANA_SEGUNDOS debe ser >= 0")
@@ -0,0 +1,29 @@
+"""Configuración de gunicorn: gunicorn -c gunicorn.conf.py wsgi:app
+
+Socket.IO necesita que cada terminal regrese siempre al mismo proceso y
+gunicorn no reparte las conexiones con afinidad, así que cada instancia
+corre un solo worker asíncrono. Para usar más núcleos se levantan varias
+instancias en puertos distintos detrás de un balanceador con afinidad por IP
+y todas comparten SOCKETIO_MESSAGE_QUEUE.
+"""
+from config import Config
+
+WORKERS = {
+    'threading': 'gthread',
+    'eventlet': 'eventlet',
+    'gevent': 'geventwebsocket.gunicorn.workers.GeventWebSocketWorker'
+}
+
+bind = f"{Config.SERVER_HOST}:{Config.SERVER_PORT}"
+workers = 1
+worker_class = WORKERS[Config.SERVER_MODE]
+# gthread: un hilo por conexión; eventlet/gevent: conexiones simultáneas por worker
+threads = Config.SERVER_MAX_CONEXIONES if Config.SERVER_MODE == 'threading' else 1
+worker_connections = Config.SERVER_MAX_CONEXIONES
+keepalive = Config.SERVER_KEEPALIVE
+graceful_timeout = Config.APAGADO_TIMEOUT
+
+def worker_exit(server, worker):
+    # Las peticiones abiertas ya terminaron (graceful_timeout); faltan las ventas encoladas
+    from app.servidor import drenar
+    drenar()
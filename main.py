@@ -1,7 +1,26 @@
-from flask import Flask, jsonify
+# eventlet/gevent deben parchar la biblioteca estándar antes de cualquier otro import
+from app.servidor import instalar_senales, opciones_run, opciones_socketio, parchar_biblioteca_estandar
+parchar_biblioteca_estandar()
+
+import atexit
+import time
+from flask import Flask, Response, g, jsonify, request
 from flask_socketio import SocketIO
 from flask_cors import CORS
 from config import Config
+from app.database.db_connection import DatabaseManager
+from app.services.catalogo_service import CATALOGOS, CatalogoService
+from app.services.apagado import apagado
+from app.services.bloqueos import bloqueos_stock
+from app.services.existencias_service import ExistenciasService
+from app.services.folio_service import folio_allocator
+from app.services.idempotencia import idempotencia_ventas
+from app.services.metricas import metricas
+from app.services.product_catalog import product_catalog
+from app.services.reporte_cache import reporte_cache
+from app.services.stock_bajo import stock_bajo
+from app.services.sync_service import SyncService
+from app.services.venta_cola import cola_ventas
 
 # Importar blueprints
 from app.api.auth import auth_bp
@@ -12,7 +31,8 @@ from app.api.clientes import clientes_bp
 from app.api.inventario import inventario_bp
 from app.api.empleados import empleados_bp
 from app.api.reportes import reportes_bp
-from app.sockets.notification_server import initialize_sockets
+from app.api.sync import sync_bp
+from app.sockets.notification_server import get_notification_server, initialize_sockets
 
 def create_app():
     app = Flask(__name__)
@@ -22,7 +42,7 @@ def create_app():
     CORS(app, origins=Config.CORS_ORIGINS)
     
     # Configurar SocketIO
-    socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+    socketio = SocketIO(app, cors_allowed_origins="*", **opciones_socketio())
     
     # Registrar blueprints
     app.register_blueprint(auth_bp)
@@ -33,10 +53,66 @@ def create_app():
     app.register_blueprint(inventario_bp)
     app.register_blueprint(empleados_bp)
     app.register_blueprint(reportes_bp)
+    app.register_blueprint(sync_bp)
+    
+    # Duración de cada petición por ruta (la regla, no la URL, para acotar las etiquetas)
+    @app.before_request
+    def iniciar_medicion():
+        g.inicio_peticion = time.perf_counter()
+    
+    @app.after_request
+    def registrar_medicion(response):
+        inicio = g.pop('inicio_peticion', None)
+        if inicio is None:
+            return response
+        metodo = request.method
+        ruta = request.url_rule.rule if request.url_rule else 'sin_ruta'
+        observar = lambda: metricas.observar_peticion(metodo, ruta, response.status_code, time.perf_counter() - inicio)
+        if response.is_streamed:
+            # El cuerpo (exportaciones) se genera después de este hook: medir al cerrar la respuesta
+            response.call_on_close(observar)
+        else:
+            observar()
+        return response
+    
+    # Catálogo de productos en memoria para las búsquedas por código de barras
+    try:
+        product_catalog.load()
+    except Exception as e:
+        print(f"[CATALOGO] No se pudo cargar al iniciar, se cargará en la primera consulta: {e}")
+    
+    # Saldos de inventario: crear la tabla y calcular desde el ledger los que falten
+    try:
+        ExistenciasService.asegurar_tabla()
+    except Exception as e:
+        print(f"[EXISTENCIAS] No se pudo preparar la tabla al iniciar, se intentará en la primera consulta: {e}")
+    
+    # Bitácora de cambios para terminales: lista antes de la primera venta a crédito
+    try:
+        SyncService.asegurar_tabla()
+    except Exception as e:
+        print(f"[SYNC] No se pudo crear cambios_sync al iniciar, se intentará en el primer cambio: {e}")
+    
+    # Productos con stock bajo; después se actualiza con cada movimiento
+    try:
+        stock_bajo.cargar()
+    except Exception as e:
+        print(f"[STOCK BAJO] No se pudo cargar al iniciar, se cargará en la primera consulta: {e}")
+    
+    # Devolver los folios apartados sin usar al detener el servidor
+    atexit.register(folio_allocator.devolver_sobrantes)
     
     # Ruta de verificación de salud
     @app.route('/api/health', methods=['GET'])
     def health_check():
+        # Durante el apagado el balanceador deja de mandar terminales a este proceso
+        if apagado.drenando:
+            return jsonify({
+                'status': 'draining',
+                'service': 'POS Refaccionaria API',
+                'message': 'El servidor se está deteniendo'
+            }), 503
+        
         return jsonify({
             'status': 'healthy',
             'service': 'POS Refaccionaria API',
@@ -49,12 +125,17 @@ def create_app():
                 'productos': {
                     'listar': 'GET /api/productos',
                     'obtener': 'GET /api/productos/{id}',
-                    'crear': 'POST /api/productos'
+                    'por_codigo': 'GET /api/productos/codigo/{codigo_barras}',
+                    'buscar': 'GET /api/productos/buscar?q=&limite=',
+                    'crear': 'POST /api/productos',
+                    'actualizar': 'PUT /api/productos/{id}'
                 },
                 'ventas': {
                     'listar': 'GET /api/ventas',
                     'obtener': 'GET /api/ventas/{id}',
-                    'crear': 'POST /api/ventas',
+                    'crear': 'POST /api/ventas (Idempotency-Key opcional, ?modo=async)',
+                    'ticket': 'GET /api/ventas/tickets/{ticket}',
+                    'exportar': 'GET /api/ventas/exportar?formato=ndjson|json',
                     'metodos_pago': 'GET /api/ventas/metodos-pago',
                     'tipos_venta': 'GET /api/ventas/tipos-venta'
                 },
@@ -74,6 +155,7 @@ def create_app():
                     'stock': 'GET /api/inventario/productos/{id}/stock',
                     'movimientos': 'GET /api/inventario/productos/{id}/movimientos',
                     'stock_bajo': 'GET /api/inventario/stock-bajo',
+                    'exportar_movimientos': 'GET /api/inventario/movimientos/exportar?formato=ndjson|json',
                     'ajustar': 'POST /api/inventario/ajustar',
                     'entrada': 'POST /api/inventario/entrada'
                 },
@@ -90,9 +172,20 @@ def create_app():
                     'ventas_metodos_pago': 'GET /api/reportes/ventas/metodos-pago',
                     'estadisticas_inventario': 'GET /api/reportes/inventario/estadisticas'
                 },
+                'sync': {
+                    'cambios': 'GET /api/sync/changes?since={token}'
+                },
                 'system': {
                     'health': 'GET /api/health',
-                    'info': 'GET /api/system/info'
+                    'info': 'GET /api/system/info',
+                    'pool': 'GET /api/system/pool',
+                    'cache': 'GET /api/system/cache',
+                    'productos': 'GET /api/system/productos',
+                    'ventas': 'GET /api/system/ventas',
+                    'cache_invalidar': 'POST /api/system/cache/invalidar',
+                    'reportes': 'GET /api/system/reportes',
+                    'reportes_invalidar': 'POST /api/system/reportes/invalidar',
+                    'sockets': 'GET /api/system/sockets'
                 }
             }
         })
@@ -133,6 +226,133 @@ def create_app():
             ]
         })
     
+    # Estadísticas del pool de conexiones
+    @app.route('/api/system/pool', methods=['GET'])
+    def pool_stats():
+        try:
+            return jsonify({
+                'success': True,
+                'data': DatabaseManager().pool_stats()
+            })
+        except Exception as e:
+            return jsonify({
+                'success': False,
+                'error': f'Error obteniendo estadísticas del pool: {str(e)}'
+            }), 500
+    
+    # Estadísticas del catálogo de productos en memoria
+    @app.route('/api/system/productos', methods=['GET'])
+    def product_catalog_stats():
+        data = product_catalog.stats()
+        data['stock_bajo'] = stock_bajo.stats()
+        return jsonify({
+            'success': True,
+            'data': data
+        })
+    
+    # Estado de la cola de ventas asíncronas y de las llaves de idempotencia
+    @app.route('/api/system/ventas', methods=['GET'])
+    def ventas_async_stats():
+        return jsonify({
+            'success': True,
+            'data': {
+                'cola': cola_ventas.stats(),
+                'idempotencia': idempotencia_ventas.stats(),
+                'folios': folio_allocator.stats(),
+                'bloqueos_stock': bloqueos_stock.stats(),
+                'apagado': apagado.stats()
+            }
+        })
+    
+    # Estadísticas de la caché de catálogos
+    @app.route('/api/system/cache', methods=['GET'])
+    def cache_stats():
+        return jsonify({
+            'success': True,
+            'data': CatalogoService.estadisticas()
+        })
+    
+    # Forzar la recarga de catálogos tras editarlos directamente en la base
+    @app.route('/api/system/cache/invalidar', methods=['POST'])
+    def cache_invalidar():
+        data = request.get_json(silent=True) or {}
+        catalogo = data.get('catalogo')
+        if catalogo is not None and catalogo not in CATALOGOS:
+            return jsonify({
+                'success': False,
+                'error': f'Catálogo desconocido: {catalogo}'
+            }), 400
+        
+        CatalogoService.invalidar(catalogo)
+        return jsonify({
+            'success': True,
+            'data': CatalogoService.estadisticas()
+        })
+    
+    # Estadísticas de la caché de resultados de reportes
+    @app.route('/api/system/reportes', methods=['GET'])
+    def reportes_cache_stats():
+        return jsonify({
+            'success': True,
+            'data': reporte_cache.stats()
+        })
+    
+    # Vaciar la caché de reportes tras `manage.py resumenes --reconstruir` o correcciones a mano
+    @app.route('/api/system/reportes/invalidar', methods=['POST'])
+    def reportes_cache_invalidar():
+        reporte_cache.invalidar()
+        return jsonify({
+            'success': True,
+            'data': reporte_cache.stats()
+        })
+    
+    # Terminales conectadas por Socket.IO a este proceso
+    @app.route('/api/system/sockets', methods=['GET'])
+    def sockets_stats():
+        return jsonify({
+            'success': True,
+            'data': get_notification_server().stats()
+        })
+    
+    # Métricas en formato de texto de Prometheus
+    @app.route('/api/system/metrics', methods=['GET'])
+    def metrics():
+        pool = DatabaseManager().pool_stats()
+        reportes = reporte_cache.stats()
+        cola = cola_ventas.stats()
+        texto = metricas.prometheus({
+            'pos_db_pool_size': ('Conexiones físicas abiertas', pool['size']),
+            'pos_db_pool_in_use': ('Conexiones prestadas', pool['in_use']),
+            'pos_db_pool_waits_total': ('Préstamos que tuvieron que esperar', pool['waits']),
+            'pos_db_pool_timeouts_total': ('Préstamos que agotaron DB_POOL_TIMEOUT', pool['timeouts']),
+            'pos_reportes_cache_hits_total': ('Aciertos de la caché de reportes', reportes['hits']),
+            'pos_reportes_cache_misses_total': ('Fallos de la caché de reportes', reportes['misses']),
+            'pos_ventas_cola_pendientes': ('Ventas asíncronas en cola', cola['pendientes']),
+            'pos_ventas_en_curso': ('Ventas síncronas en proceso', apagado.stats()['en_curso']),
+            'pos_socket_clientes': ('Terminales conectadas por Socket.IO', get_notification_server().stats()['clientes'])
+        })
+        return Response(texto, content_type='text/plain; version=0.0.4; charset=utf-8')
+    
+    # Consultas más costosas y log de consultas lentas (SLOW_QUERY_MS)
+    @app.route('/api/system/consultas', methods=['GET'])
+    def consultas_stats():
+        try:
+            limite = int(request.args.get('limite', 20))
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': 'limite debe ser un número entero'
+            }), 400
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'resumen': metricas.stats(),
+                'mas_costosas': metricas.resumen_consultas(limite),
+                'lentas': metricas.consultas_lentas()
+            }
+        })
+    
     # Ruta de documentación de la API
     @app.route('/api', methods=['GET'])
     def api_documentation():
@@ -185,8 +405,9 @@ if __name__ == '__main__':
         print("SERVIDOR POS REFACCIONARIA - SISTEMA COMPLETO")
         print("=" * 70)
         print("[SERVER] Iniciando servidor...")
-        print("[SERVER] API REST disponible en: http://localhost:5000")
-        print("[SERVER] WebSockets disponible en: http://localhost:5000")
+        print(f"[SERVER] Modo: {Config.SERVER_MODE}")
+        print(f"[SERVER] API REST disponible en: http://localhost:{Config.SERVER_PORT}")
+        print(f"[SERVER] WebSockets disponible en: http://localhost:{Config.SERVER_PORT}")
         print("")
         
         print("[ENDPOINTS PRINCIPALES]")
@@ -197,9 +418,13 @@ if __name__ == '__main__':
         print("    GET  /api/productos                 - Listar productos")
         print("    POST /api/productos                 - Crear producto")
         print("    GET  /api/productos/{id}            - Obtener producto")
+        print("    PUT  /api/productos/{id}            - Actualizar producto")
+        print("    GET  /api/productos/codigo/{codigo} - Buscar por código de barras")
+        print("    GET  /api/productos/buscar?q=       - Búsqueda por nombre, marca o categoría")
         print("")
         print("  VENTAS")
-        print("    POST /api/ventas                    - Procesar venta")
+        print("    POST /api/ventas                    - Procesar venta (?modo=async, Idempotency-Key)")
+        print("    GET  /api/ventas/tickets/{ticket}   - Estado de una venta asíncrona")
         print("    GET  /api/ventas                    - Listar ventas")
         print("    GET  /api/ventas/{id}               - Obtener venta")
         print("    GET  /api/ventas/metodos-pago       - Métodos de pago")
@@ -226,15 +451,25 @@ if __name__ == '__main__':
         print("    GET  /api/reportes/productos/mas-vendidos   - Productos más vendidos")
         print("    GET  /api/reportes/ventas/empleados         - Ventas por empleado")
         print("")
+        print("  SINCRONIZACIÓN")
+        print("    GET  /api/sync/changes?since=       - Cambios de productos, clientes y catálogos")
+        print("")
         print("  SISTEMA")
         print("    GET  /api/health                    - Estado del servidor")
         print("    GET  /api/system/info               - Información del sistema")
+        print("    GET  /api/system/pool               - Estadísticas del pool de conexiones")
+        print("    GET  /api/system/cache              - Estadísticas de la caché de catálogos")
+        print("    GET  /api/system/reportes           - Estadísticas de la caché de reportes")
+        print("    GET  /api/system/metrics            - Métricas de peticiones y consultas (Prometheus)")
+        print("    GET  /api/system/consultas          - Consultas más costosas y consultas lentas")
+        print("    GET  /api/system/sockets            - Terminales conectadas por Socket.IO")
         print("")
         
         print("[SOCKETS DISPONIBLES]")
         print("  connect               - Conexión de cliente")
         print("  disconnect            - Desconexión de cliente")
-        print("  client_identification - Identificación de cliente")
+        print("  client_identification - Identificación de cliente (type, name, branch, products)")
+        print("  product_interest      - Productos cuyo stock recibe el cliente")
         print("  stock_update          - Actualización de stock")
         print("  new_sale              - Nueva venta procesada")
         print("  new_product           - Nuevo producto agregado")
@@ -254,17 +489,19 @@ if __name__ == '__main__':
         print(f"  CORS: {Config.CORS_ORIGINS}")
         print("")
         
-        print("[SERVER] Servidor listo y escuchando en puerto 5000")
+        print(f"[SERVER] Servidor listo y escuchando en puerto {Config.SERVER_PORT}")
         print("[SERVER] Presiona Ctrl+C para detener el servidor")
         print("=" * 70)
         
+        # SIGTERM drena las ventas en proceso antes de salir
+        instalar_senales()
+        
         # Iniciar servidor
         socketio.run(
             app, 
-            host='0.0.0.0', 
-            port=5000, 
-            debug=Config.DEBUG,
-            allow_unsafe_werkzeug=True
+            host=Config.SERVER_HOST, 
+            port=Config.SERVER_PORT, 
+            **opciones_run()
         )
         
     except KeyboardInterrupt:
@@ -278,11 +515,11 @@ if __name__ == '__main__':
         print("[ERROR] Verifica la configuración:")
         print("  1. Archivo .env con las credenciales correctas")
         print("  2. SQL Server ejecutándose y accesible")
-        print("  3. Puerto 5000 disponible")
+        print(f"  3. Puerto {Config.SERVER_PORT} disponible")
         print("  4. Dependencias de Python instaladas (requirements.txt)")
         print("")
         print("[TROUBLESHOOTING]")
         print("  - Ejecuta: python -c \"import pyodbc; print('pyODBC instalado correctamente')\"")
-        print("  - Verifica: netstat -an | findstr 5000")
+        print(f"  - Verifica: netstat -an | findstr {Config.SERVER_PORT}")
         print("  - Revisa: SQL Server Configuration Manager")
         print("")
\ No newline at end of file
@@ -0,0 +1,144 @@
+import argparse
+import json
+import sys
+
+def comando_existencias(args):
+    """Verificar o reconstruir los saldos de productos_existencias desde el ledger"""
+    from app.services.existencias_service import ExistenciasService
+    
+    resultado = ExistenciasService.verificar(reparar=args.reconstruir)
+    
+    print(f"[EXISTENCIAS] Productos revisados: {resultado['productos_revisados']}")
+    print(f"[EXISTENCIAS] Productos con diferencia: {resultado['productos_con_diferencia']}")
+    for diferencia in resultado['diferencias'][:args.mostrar]:
+        print(
+            f"  Producto {diferencia['fk_productos']}: "
+            f"tabla={diferencia['existencia_tabla']} ledger={diferencia['existencia_ledger']}"
+        )
+    if resultado['reparado']:
+        print("[EXISTENCIAS] Saldos reconstruidos desde movimiento_detalles")
+    
+    if args.json:
+        print(json.dumps(resultado, indent=2, default=str))
+    
+    # Código de salida distinto de cero si quedaron diferencias sin reparar
+    return 1 if resultado['productos_con_diferencia'] and not resultado['reparado'] else 0
+
+def comando_folios(args):
+    """Huecos de numeración por serie de folios"""
+    from app.services.folio_service import FolioAllocator
+    
+    series = args.serie or FolioAllocator.series_registradas()
+    resultados = [FolioAllocator.auditar(serie) for serie in series]
+    
+    for resultado in resultados:
+        print(
+            f"[FOLIOS] {resultado['serie']}: ventas={resultado['ventas']} "
+            f"ultimo={resultado['ultimo']} huecos={resultado['huecos']} "
+            f"apartados_sin_usar={resultado['apartados_sin_usar']}"
+        )
+    
+    if args.json:
+        print(json.dumps(resultados, indent=2, default=str))
+    return 0
+
+def comando_resumenes(args):
+    """Consolidar los resúmenes diarios de ventas usados por los reportes"""
+    from datetime import date
+    from app.services.resumen_ventas_service import ResumenVentasService
+    
+    if args.reconstruir:
+        if not args.desde:
+            print("[RESUMENES] --reconstruir requiere --desde")
+            return 2
+        desde = date.fromisoformat(args.desde)
+        hasta = date.fromisoformat(args.hasta) if args.hasta else date.today()
+        consolidado = ResumenVentasService.reconstruir(desde, hasta)
+    else:
+        consolidado = ResumenVentasService.asegurar_consolidado()
+    
+    estado = ResumenVentasService.estado()
+    print(f"[RESUMENES] Consolidado hasta: {consolidado}")
+    if args.json:
+        print(json.dumps(estado, indent=2, default=str))
+    return 0
+
+def comando_semilla(args):
+    """Generar datos sintéticos para pruebas de carga"""
+    from app.database.semilla import conteos, sembrar
+    
+    def progreso(hechas, total):
+        print(f"\r[SEMILLA] Ventas: {hechas}/{total}", end='', flush=True)
+    
+    resultado = sembrar(
+        productos=args.productos, clientes=args.clientes, empleados=args.empleados,
+        ventas=args.ventas, dias=args.dias, semilla=args.semilla, progreso=progreso
+    )
+    print()
+    print(f"[SEMILLA] Generado en {resultado['segundos']}s: {resultado}")
+    if args.json:
+        print(json.dumps(conteos(), indent=2))
+    return 0
+
+def comando_broker(args):
+    """Broker local para compartir eventos de Socket.IO entre varios procesos"""
+    from app.sockets.broker_local import BrokerLocal
+    
+    broker = BrokerLocal(args.host, args.puerto)
+    print(f"[BROKER] Escuchando en pos://{args.host}:{args.puerto}")
+    try:
+        broker.serve_forever()
+    except KeyboardInterrupt:
+        print(f"[BROKER] Detenido; {broker.mensajes} mensajes reenviados")
+    finally:
+        broker.server_close()
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Tareas de mantenimiento del servidor POS')
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+    
+    existencias = subparsers.add_parser('existencias', help='Saldos materializados de inventario')
+    existencias.add_argument('--reconstruir', action='store_true',
+                             help='Reescribir los saldos con el valor calculado del ledger')
+    existencias.add_argument('--mostrar', type=int, default=20,
+                             help='Número máximo de diferencias a imprimir')
+    existencias.add_argument('--json', action='store_true', help='Imprimir el resultado completo en JSON')
+    existencias.set_defaults(func=comando_existencias)
+    
+    folios = subparsers.add_parser('folios', help='Auditoría de huecos en los folios de venta')
+    folios.add_argument('--serie', action='append',
+                        help='Serie a revisar (VTA-<sucursal>-<terminal>); por defecto todas')
+    folios.add_argument('--json', action='store_true', help='Imprimir el resultado completo en JSON')
+    folios.set_defaults(func=comando_folios)
+    
+    resumenes = subparsers.add_parser('resumenes', help='Resúmenes diarios de ventas para reportes')
+    resumenes.add_argument('--reconstruir', action='store_true',
+                           help='Recalcular días ya consolidados (requiere --desde)')
+    resumenes.add_argument('--desde', help='Primer día a recalcular (YYYY-MM-DD)')
+    resumenes.add_argument('--hasta', help='Último día a recalcular (YYYY-MM-DD); por defecto ayer')
+    resumenes.add_argument('--json', action='store_true', help='Imprimir el estado en JSON')
+    resumenes.set_defaults(func=comando_resumenes)
+    
+    semilla = subparsers.add_parser('semilla', help='Datos sintéticos para pruebas de carga '
+                                    '(usar con DB_BACKEND=sqlite o una base de pruebas)')
+    semilla.add_argument('--productos', type=int, default=2000)
+    semilla.add_argument('--clientes', type=int, default=500)
+    semilla.add_argument('--empleados', type=int, default=20)
+    semilla.add_argument('--ventas', type=int, default=100000)
+    semilla.add_argument('--dias', type=int, default=90, help='Días hacia atrás en que se reparten las ventas')
+    semilla.add_argument('--semilla', type=int, help='Semilla del generador aleatorio, para repetir el conjunto')
+    semilla.add_argument('--json', action='store_true', help='Imprimir los renglones por tabla en JSON')
+    semilla.set_defaults(func=comando_semilla)
+    
+    broker = subparsers.add_parser('broker', help='Cola de mensajes local de Socket.IO '
+                                   '(SOCKETIO_MESSAGE_QUEUE=pos://host:puerto)')
+    broker.add_argument('--host', default='127.0.0.1')
+    broker.add_argument('--puerto', type=int, default=5555)
+    broker.set_defaults(func=comando_broker)
+    
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,8 @@
+"""Punto de entrada para gunicorn: gunicorn -c gunicorn.conf.py wsgi:app"""
+from app.servidor import parchar_biblioteca_estandar
+
+parchar_biblioteca_estandar()
+
+from main import create_app
+
+app, socketio = create_app()